@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Instr_Transfer.py 組譯器效能量測
+產生一個涵蓋所有指令格式的合成程式（預設一百萬行，每 16 行一個標籤，分支/跳躍同時有向前與向後的標籤引用），
+量測 assemble() 與輸出 IM.dat / IM.bin 的時間，並回報每秒行數
+"""
+
+import argparse
+import time
+
+from Instr_Transfer import assemble, format_dat, format_bin
+
+# 每 16 行為一個區塊，{n} 為區塊編號；區塊開頭定義標籤 L{n}，B/J-type 引用前一個與下一個區塊的標籤
+BLOCK_TEMPLATE = """L{n}: ADDI x1, x1, 1
+ADD x3, x3, x1
+SUB x4, x3, x2  // comment
+SLLI x5, x4, 3
+LW x6, 8(x2)
+SW x6, -4(x2)
+LUI x7, 0x12345
+MUL x8, x6, x5
+DIVU x9, x8, x1
+BEQ x1, x2, L{next}
+BLE x3, x4, L{prev}
+ANDI x10, x9, 0x7F
+JAL x0, L{next}
+CSRRS x11, rdcycle, x0
+XORI x12, x11, -1
+JALR x0, x1, 0
+"""
+
+def generate(lines):
+    """產生約 lines 行的合成組合語言程式"""
+    blocks = max(1, lines // 16)
+    return ''.join(BLOCK_TEMPLATE.format(n=n, prev=max(n - 1, 0), next=min(n + 1, blocks - 1))
+                   for n in range(blocks)).splitlines(keepends=True)
+
+def timed(fn, *args):
+    """回傳 (結果, 秒數)"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=1000000,
+                        help='合成程式的行數（預設 1000000）')
+    args = parser.parse_args()
+
+    lines = generate(args.lines)
+
+    print("=" * 60)
+    print(f"Instr_Transfer.py Benchmark ({len(lines):,} lines)")
+    print("=" * 60)
+
+    (records, labels), elapsed = timed(assemble, lines)
+    print(f"  assemble      {elapsed:>8.2f} s  {len(lines) / elapsed:>12,.0f} lines/s"
+          f"  ({len(records):,} instructions, {len(labels):,} labels)")
+    dat, elapsed = timed(format_dat, records)
+    print(f"  format_dat    {elapsed:>8.2f} s  {len(dat):>12,} bytes")
+    image, elapsed = timed(format_bin, records)
+    print(f"  format_bin    {elapsed:>8.2f} s  {len(image):>12,} bytes")
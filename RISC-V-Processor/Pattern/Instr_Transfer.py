@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 # RISC-V RV32I + RV32M 指令轉換器（支援標籤）
 
+import hashlib
+import os
 import re
 import sys
 
+# 二進位映像檔格式由 Testbench/Golden_Result.py 定義
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Testbench'))
+
 # 指令編碼表
 OPCODES = {
     # R-type (RV32I)
@@ -68,25 +73,46 @@ def parse_csr(csr_name):
         return int(csr_name, 16)
     return int(csr_name)
 
+# Load/Store 的位址運算元，例如 -4(x2)
+MEM_OPERAND = re.compile(r'(-?\d+)\(x(\d+)\)')
+
 def parse_register(reg):
     """解析暫存器名稱，返回數字"""
+    reg = reg.rstrip(',')
     if reg.startswith('x'):
         return int(reg[1:])
     return 0
 
-def parse_immediate(imm, labels=None, current_addr=0):
-    """解析立即數或標籤"""
-    # 如果是標籤引用
-    if labels and imm in labels:
-        offset = labels[imm] - current_addr
-        return offset
-    # 如果是數字
+def parse_number(imm):
+    """解析數字立即數；不是數字（視為標籤）時回傳 None"""
     if imm.startswith('0x'):
         return int(imm, 16)
     if imm.lstrip('-').isdigit():
         return int(imm)
-    # 無法解析，返回 0
-    return 0
+    return None
+
+class ParseCache(dict):
+    """以運算元字串為 key 的解析結果快取，第一次遇到時才呼叫 parse"""
+
+    def __init__(self, parse, initial=()):
+        super().__init__(initial)
+        self.parse = parse
+
+    def __missing__(self, key):
+        value = self[key] = self.parse(key)
+        return value
+
+# 運算元 → 暫存器編號 / 數字立即數（不是數字時為 None），組譯時以查表取代逐次解析
+REG = ParseCache(parse_register, {f'x{i}{sep}': i for i in range(32) for sep in ('', ',')})
+NUMBER = ParseCache(parse_number)
+
+def parse_immediate(imm, labels=None, current_addr=0):
+    """解析立即數或標籤（標籤為相對於 current_addr 的位移，無法解析時返回 0）"""
+    # 如果是標籤引用
+    if labels and imm in labels:
+        return labels[imm] - current_addr
+    value = parse_number(imm)
+    return 0 if value is None else value
 
 def sign_extend(value, bits):
     """符號擴展"""
@@ -94,197 +120,240 @@ def sign_extend(value, bits):
         value -= (1 << bits)
     return value
 
-def collect_labels(lines):
-    """第一次掃描：收集所有標籤及其位址"""
-    labels = {}
-    address = 0
-
-    for line in lines:
-        line = line.strip()
+# ----------------------------------------------------------------------------
+# 各格式的編碼函式
+# encode_*(base, ops) 回傳 (不含立即數的機器碼, 立即數字串或 None)；base 已含 opcode/funct3/funct7，
+# ops 為助記符之後的運算元。立即數由 imm_* 放到各格式的位元位置，標籤可在組譯結束後再填入
+# ----------------------------------------------------------------------------
+
+def imm_i(imm):
+    """I-type：imm[11:0] → inst[31:20]（負數即 12-bit 二補數）"""
+    return (imm & 0xFFF) << 20
+
+def imm_shamt(imm):
+    """移位量 → inst[24:20]"""
+    return (imm & 0x1F) << 20
+
+def imm_s(imm):
+    """S-type：imm[11:5] → inst[31:25]，imm[4:0] → inst[11:7]"""
+    imm &= 0xFFF
+    return ((imm >> 5) << 25) | ((imm & 0x1F) << 7)
+
+def imm_b(imm):
+    """B-type：13-bit 位移，imm[12|10:5] → inst[31:25]，imm[4:1|11] → inst[11:7]"""
+    imm &= 0x1FFE
+    return (((imm >> 12) & 1) << 31) | (((imm >> 5) & 0x3F) << 25) | (((imm >> 1) & 0xF) << 8) | (((imm >> 11) & 1) << 7)
+
+def imm_u(imm):
+    """U-type：imm[19:0] → inst[31:12]"""
+    return (imm & 0xFFFFF) << 12
+
+def imm_j(imm):
+    """J-type：21-bit 位移，imm[20|10:1|11|19:12] → inst[31:12]"""
+    imm &= 0x1FFFFE
+    return (((imm >> 20) & 1) << 31) | (((imm >> 1) & 0x3FF) << 21) | (((imm >> 11) & 1) << 20) | (((imm >> 12) & 0xFF) << 12)
+
+def imm_csr(imm):
+    """CSR 立即數版本的 uimm → inst[19:15]"""
+    return (imm & 0x1F) << 15
+
+def encode_r(base, ops):
+    """rd, rs1, rs2"""
+    return base | (REG[ops[2]] << 20) | (REG[ops[1]] << 15) | (REG[ops[0]] << 7), None
+
+def encode_i(base, ops):
+    """rd, rs1, imm（立即數運算、移位、JALR）"""
+    return base | (REG[ops[1]] << 15) | (REG[ops[0]] << 7), ops[2]
+
+def encode_mem(ops):
+    """解析 offset(xN)，回傳 (offset, rs1)"""
+    match = MEM_OPERAND.match(ops[1])
+    if match is None:
+        raise ValueError(f"invalid memory operand '{ops[1]}'")
+    return int(match.group(1)), int(match.group(2))
+
+def encode_load(base, ops):
+    """rd, offset(rs1)"""
+    imm, rs1 = encode_mem(ops)
+    return base | imm_i(imm) | (rs1 << 15) | (REG[ops[0]] << 7), None
+
+def encode_store(base, ops):
+    """rs2, offset(rs1)"""
+    imm, rs1 = encode_mem(ops)
+    return base | imm_s(imm) | (REG[ops[0]] << 20) | (rs1 << 15), None
+
+def encode_b(base, ops):
+    """rs1, rs2, label"""
+    return base | (REG[ops[1]] << 20) | (REG[ops[0]] << 15), ops[2]
+
+def encode_b_swapped(base, ops):
+    """偽指令 BLE/BLEU/BGT/BGTU：rs1, rs2 對調後以 BGE/BGEU/BLT/BLTU 編碼"""
+    return base | (REG[ops[0]] << 20) | (REG[ops[1]] << 15), ops[2]
+
+def encode_u(base, ops):
+    """rd, imm（LUI/AUIPC/JAL）"""
+    return base | (REG[ops[0]] << 7), ops[1]
+
+def encode_csr(base, ops):
+    """rd, csr, rs1"""
+    return base | (parse_csr(ops[1].rstrip(',')) << 20) | (REG[ops[2]] << 15) | (REG[ops[0]] << 7), None
+
+def encode_csri(base, ops):
+    """rd, csr, uimm"""
+    return base | (parse_csr(ops[1].rstrip(',')) << 20) | (REG[ops[0]] << 7), ops[2]
+
+def encode_system(base, ops):
+    """ECALL / EBREAK（無運算元）"""
+    return base, None
+
+# (助記符, 編碼函式, 立即數放置函式)
+INSTRUCTION_FORMATS = (
+    (('ADD', 'SUB', 'SLL', 'SLT', 'SLTU', 'XOR', 'SRL', 'SRA', 'OR', 'AND',
+      'MUL', 'MULH', 'MULHSU', 'MULHU', 'DIV', 'DIVU', 'REM', 'REMU'), encode_r, None),
+    (('ADDI', 'SLTI', 'SLTIU', 'XORI', 'ORI', 'ANDI', 'JALR'), encode_i, imm_i),
+    (('SLLI', 'SRLI', 'SRAI'), encode_i, imm_shamt),
+    (('LB', 'LH', 'LW', 'LBU', 'LHU'), encode_load, None),
+    (('SB', 'SH', 'SW'), encode_store, None),
+    (('BEQ', 'BNE', 'BLT', 'BGE', 'BLTU', 'BGEU'), encode_b, imm_b),
+    (('BLE', 'BLEU', 'BGT', 'BGTU'), encode_b_swapped, imm_b),
+    (('LUI', 'AUIPC'), encode_u, imm_u),
+    (('JAL',), encode_u, imm_j),
+    (('CSRRW', 'CSRRS', 'CSRRC'), encode_csr, None),
+    (('CSRRWI', 'CSRRSI', 'CSRRCI'), encode_csri, imm_csr),
+    (('ECALL', 'EBREAK'), encode_system, None),
+)
+
+def build_encoders():
+    """由 OPCODES / FUNCT3 / FUNCT7 預先算好每個助記符的固定位元，回傳 {助記符: (編碼函式, 立即數放置函式, base)}"""
+    encoders = {}
+    for names, encoder, place_imm in INSTRUCTION_FORMATS:
+        for name in names:
+            base = (FUNCT7.get(name, 0) << 25) | (FUNCT3.get(name, 0) << 12) | OPCODES[name]
+            encoders[name] = (encoder, place_imm, base)
+    encoders['EBREAK'] = (encode_system, None, 0x100073)
+    assert encoders.keys() == OPCODES.keys()
+    # 小寫助記符直接查表，其他大小寫混用的寫法再轉大寫
+    encoders.update({name.lower(): entry for name, entry in encoders.items()})
+    return encoders
+
+ENCODERS = build_encoders()
 
-        # 跳過空行和註解
-        if not line or line.startswith('//'):
+def encode_instruction(parts, labels=None, current_addr=0):
+    """編碼單一指令（parts 為以空白切開的助記符與運算元）"""
+    entry = ENCODERS.get(parts[0].upper())
+    if entry is None:
+        return 0
+    encoder, place_imm, base = entry
+    machine_code, imm = encoder(base, parts[1:])
+    if imm is not None:
+        machine_code |= place_imm(parse_immediate(imm, labels, current_addr))
+    return machine_code
+
+def assemble(lines, line_numbers=None):
+    """
+    單次掃描組譯原始碼行，回傳 ([(註解, 機器碼), ...], 標籤表)。
+    立即數為標籤的指令先以 0 編碼並記下待修補項目，讀完所有行後再填入相對位移
+    （標籤重複定義時以最後一次為準，未定義的標籤位移為 0）。
+    給定 line_numbers（list）時，依序附加每筆 record 的原始碼行號（從 1 起算）
+    """
+    records = []
+    labels = {}
+    fixups = []            # (records 索引, 標籤, 立即數放置函式)
+    encoders = ENCODERS
+    numbers = NUMBER
+
+    for number, line in enumerate(lines, 1):
+        original_line = line.strip()
+
+        # 跳過空行和註解；移除行尾註解（輸出的註解保留整行）
+        cut = original_line.find('//')
+        if cut < 0:
+            code_part = original_line
+            if not code_part:
+                continue
+        elif cut == 0:
             continue
-
-        # 移除行尾註解（以 // 開頭的部分）
-        if '//' in line:
-            code_part = line.split('//')[0].strip()
         else:
-            code_part = line
-
-        # 檢查是否為標籤定義（只在代碼部分檢查冒號）
-        if ':' in code_part:
-            parts = code_part.split(':', 1)
-            if len(parts) >= 2:
-                label_name = parts[0].strip()
-                # 記錄標籤位址
-                labels[label_name] = address
-
-                # 檢查標籤後是否有指令
-                rest = parts[1].strip()
-                if rest:
-                    # 標籤後有指令，計入位址
-                    address += 4
+            code_part = original_line[:cut].strip()
+        comment = original_line
+
+        # 處理標籤定義（只在代碼部分檢查冒號），標籤位址即為下一道指令的位址
+        colon = code_part.find(':')
+        if colon >= 0:
+            labels[code_part[:colon].strip()] = len(records) << 2
+            code_part = code_part[colon + 1:].strip()
+            if not code_part:
                 continue
+            comment = code_part
 
-        # 一般指令，位址 +4
+        # 解析指令
         parts = code_part.split()
-        if parts and parts[0].upper() in OPCODES:
-            address += 4
-
-    return labels
-
-def encode_instruction(parts, labels=None, current_addr=0):
-    """編碼單一指令"""
-    opcode_name = parts[0].upper()
-
-    # 處理偽指令 BLE, BLEU, BGT, BGTU
-    if opcode_name in ['BLE', 'BLEU', 'BGT', 'BGTU']:
-        # BLE rs1, rs2, label => BGE rs2, rs1, label
-        # BGT rs1, rs2, label => BLT rs2, rs1, label
-        rs1 = parts[1].rstrip(',')
-        rs2 = parts[2].rstrip(',')
-        target = parts[3]
-
-        if opcode_name == 'BLE':
-            return encode_instruction(['BGE', rs2, rs1, target], labels, current_addr)
-        elif opcode_name == 'BLEU':
-            return encode_instruction(['BGEU', rs2, rs1, target], labels, current_addr)
-        elif opcode_name == 'BGT':
-            return encode_instruction(['BLT', rs2, rs1, target], labels, current_addr)
-        elif opcode_name == 'BGTU':
-            return encode_instruction(['BLTU', rs2, rs1, target], labels, current_addr)
-
-    opcode = OPCODES.get(opcode_name, 0)
-
-    # R-type 指令 (包含 RV32I 和 RV32M)
-    if opcode_name in ['ADD', 'SUB', 'SLL', 'SLT', 'SLTU', 'XOR', 'SRL', 'SRA', 'OR', 'AND',
-                       'MUL', 'MULH', 'MULHSU', 'MULHU', 'DIV', 'DIVU', 'REM', 'REMU']:
-        rd = parse_register(parts[1].rstrip(','))
-        rs1 = parse_register(parts[2].rstrip(','))
-        rs2 = parse_register(parts[3])
-        funct3 = FUNCT3[opcode_name]
-        funct7 = FUNCT7[opcode_name]
-        return (funct7 << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode
-
-    # I-type 立即數運算
-    elif opcode_name in ['ADDI', 'SLTI', 'SLTIU', 'XORI', 'ORI', 'ANDI']:
-        rd = parse_register(parts[1].rstrip(','))
-        rs1 = parse_register(parts[2].rstrip(','))
-        imm = parse_immediate(parts[3], labels, current_addr)
-        # 處理負數偏移量：轉換成 12-bit 二補數
-        if imm < 0:
-            imm = (1 << 12) + imm
-        imm = imm & 0xFFF
-        funct3 = FUNCT3[opcode_name]
-        return (imm << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode
-
-    # I-type 移位
-    elif opcode_name in ['SLLI', 'SRLI', 'SRAI']:
-        rd = parse_register(parts[1].rstrip(','))
-        rs1 = parse_register(parts[2].rstrip(','))
-        shamt = parse_immediate(parts[3], labels, current_addr) & 0x1F
-        funct3 = FUNCT3[opcode_name]
-        funct7 = FUNCT7[opcode_name]
-        imm = (funct7 << 5) | shamt
-        return (imm << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode
-
-    # I-type 載入指令
-    elif opcode_name in ['LB', 'LH', 'LW', 'LBU', 'LHU']:
-        rd = parse_register(parts[1].rstrip(','))
-        match = re.match(r'(-?\d+)\(x(\d+)\)', parts[2])
-        imm = parse_immediate(match.group(1), labels, current_addr)
-        # 處理負數偏移量：轉換成 12-bit 二補數
-        if imm < 0:
-            imm = (1 << 12) + imm
-        imm = imm & 0xFFF
-        rs1 = int(match.group(2))
-        funct3 = FUNCT3[opcode_name]
-        return (imm << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode
-
-    # S-type 儲存指令
-    elif opcode_name in ['SB', 'SH', 'SW']:
-        rs2 = parse_register(parts[1].rstrip(','))
-        match = re.match(r'(-?\d+)\(x(\d+)\)', parts[2])
-        imm = parse_immediate(match.group(1), labels, current_addr)
-        # 處理負數偏移量：轉換成 12-bit 二補數
-        if imm < 0:
-            imm = (1 << 12) + imm
-        imm = imm & 0xFFF
-        rs1 = int(match.group(2))
-        funct3 = FUNCT3[opcode_name]
-        imm_11_5 = (imm >> 5) & 0x7F
-        imm_4_0 = imm & 0x1F
-        return (imm_11_5 << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) | (imm_4_0 << 7) | opcode
-
-    # B-type 分支指令
-    elif opcode_name in ['BEQ', 'BNE', 'BLT', 'BGE', 'BLTU', 'BGEU']:
-        rs1 = parse_register(parts[1].rstrip(','))
-        rs2 = parse_register(parts[2].rstrip(','))
-        imm = parse_immediate(parts[3], labels, current_addr)
-        # 處理負數偏移量：轉換成 13-bit 二補數
-        if imm < 0:
-            imm = (1 << 13) + imm
-        imm = imm & 0x1FFE
-        funct3 = FUNCT3[opcode_name]
-        imm_12 = (imm >> 12) & 1
-        imm_11 = (imm >> 11) & 1
-        imm_10_5 = (imm >> 5) & 0x3F
-        imm_4_1 = (imm >> 1) & 0xF
-        return (imm_12 << 31) | (imm_10_5 << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) | (imm_4_1 << 8) | (imm_11 << 7) | opcode
-
-    # U-type 指令
-    elif opcode_name in ['LUI', 'AUIPC']:
-        rd = parse_register(parts[1].rstrip(','))
-        imm = parse_immediate(parts[2], labels, current_addr) & 0xFFFFF
-        return (imm << 12) | (rd << 7) | opcode
-
-    # J-type JAL
-    elif opcode_name == 'JAL':
-        rd = parse_register(parts[1].rstrip(','))
-        imm = parse_immediate(parts[2], labels, current_addr)
-        # 處理負數偏移量：轉換成 21-bit 二補數
-        if imm < 0:
-            imm = (1 << 21) + imm
-        imm = imm & 0x1FFFFE
-        imm_20 = (imm >> 20) & 1
-        imm_19_12 = (imm >> 12) & 0xFF
-        imm_11 = (imm >> 11) & 1
-        imm_10_1 = (imm >> 1) & 0x3FF
-        return (imm_20 << 31) | (imm_10_1 << 21) | (imm_11 << 20) | (imm_19_12 << 12) | (rd << 7) | opcode
-
-    # I-type JALR
-    elif opcode_name == 'JALR':
-        rd = parse_register(parts[1].rstrip(','))
-        rs1 = parse_register(parts[2].rstrip(','))
-        imm = parse_immediate(parts[3], labels, current_addr)
-        # 處理負數偏移量：轉換成 12-bit 二補數
-        if imm < 0:
-            imm = (1 << 12) + imm
-        imm = imm & 0xFFF
-        funct3 = FUNCT3[opcode_name]
-        return (imm << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode
-
-    # CSR 指令
-    elif opcode_name in ['CSRRW', 'CSRRS', 'CSRRC', 'CSRRWI', 'CSRRSI', 'CSRRCI']:
-        rd = parse_register(parts[1].rstrip(','))
-        csr_addr = parse_csr(parts[2].rstrip(','))
-        funct3 = FUNCT3[opcode_name]
-
-        if opcode_name.endswith('I'):  # 立即數版本
-            uimm = parse_immediate(parts[3], labels, current_addr) & 0x1F
-            return (csr_addr << 20) | (uimm << 15) | (funct3 << 12) | (rd << 7) | opcode
-        else:  # 暫存器版本
-            rs1 = parse_register(parts[3])
-            return (csr_addr << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode
-
-    # 系統指令
-    elif opcode_name == 'ECALL':
-        return 0x73
-    elif opcode_name == 'EBREAK':
-        return 0x100073
+        entry = encoders.get(parts[0]) or encoders.get(parts[0].upper())
+        if entry is None:
+            continue
+        encoder, place_imm, base = entry
+
+        try:
+            machine_code, imm = encoder(base, parts[1:])
+            if imm is not None:
+                value = numbers[imm]
+                if value is None:
+                    fixups.append((len(records), imm, place_imm))
+                else:
+                    machine_code |= place_imm(value)
+        except Exception as e:
+            print(f"Error processing line: {original_line}")
+            print(f"Error: {e}")
+            continue
 
-    return 0
+        records.append((comment, machine_code))
+        if line_numbers is not None:
+            line_numbers.append(number)
+
+    # 回填標籤位移
+    for index, label, place_imm in fixups:
+        target = labels.get(label)
+        if target is not None:
+            comment, machine_code = records[index]
+            records[index] = (comment, machine_code | place_imm(target - (index << 2)))
+
+    return records, labels
+
+def to_image(records):
+    """將組譯結果轉為指令記憶體位元組（大端序）"""
+    return b''.join(machine_code.to_bytes(4, 'big') for _, machine_code in records)
+
+def format_dat(records):
+    """將組譯結果轉為 IM.dat 文字格式（每道指令一行註解 + 4 行 hex byte）"""
+    out = []
+    for comment, machine_code in records:
+        # 註解 + 十六進制位元組（大寫，大端序）
+        h = f"{machine_code:08X}"
+        out.append(f"// {comment}\n{h[0:2]}\n{h[2:4]}\n{h[4:6]}\n{h[6:8]}\n")
+    return ''.join(out)
+
+def image_to_bin(image, load_addr=0):
+    """將指令記憶體位元組（大端序 word）加上二進位映像檔標頭（Golden_Result.image_header）"""
+    import Golden_Result as golden
+    return golden.image_header(len(image), load_addr) + image
+
+def format_bin(records, load_addr=0):
+    """將組譯結果轉為二進位映像檔（標頭 + 大端序 word），可由 Golden_Result / dat2coe 直接讀取"""
+    return image_to_bin(to_image(records), load_addr)
+
+# ============================================================================
+# 組譯器版本（Verify_Script.py 組譯結果快取的 key）
+# ============================================================================
+
+_version = None
+
+def assembler_version():
+    """組譯器版本：本檔內容的 SHA-256，修改組譯器後舊的快取自動失效"""
+    global _version
+    if _version is None:
+        with open(os.path.abspath(__file__), 'rb') as f:
+            _version = hashlib.sha256(f.read()).hexdigest()
+    return _version
 
 def convert_instructions(input_file, output_file):
     """轉換指令檔案（支援標籤）"""
@@ -292,85 +361,29 @@ def convert_instructions(input_file, output_file):
     with open(input_file, 'r', encoding='utf-8') as f:
         lines = f.readlines()
 
-    # 第一次掃描：收集標籤
-    labels = collect_labels(lines)
+    records, labels = assemble(lines)
 
     if labels:
         print(f"找到 {len(labels)} 個標籤:")
         for label, addr in labels.items():
             print(f"  {label}: 0x{addr:04X}")
 
-    # 第二次掃描：轉換指令
-    with open(output_file, 'w', encoding='utf-8') as f_out:
-        address = 0
-
-        for line in lines:
-            original_line = line.strip()
-
-            # 跳過空行和註解
-            if not original_line or original_line.startswith('//'):
-                continue
-
-            # 移除行尾註解
-            if '//' in original_line:
-                code_part = original_line.split('//')[0].strip()
-                original_line_for_comment = original_line  # 保留完整註解用於輸出
-            else:
-                code_part = original_line
-                original_line_for_comment = original_line
-
-            # 處理標籤定義（只在代碼部分檢查冒號）
-            if ':' in code_part:
-                parts = code_part.split(':', 1)
-                label_name = parts[0].strip()
-
-                # 檢查標籤後是否有指令
-                if len(parts) > 1:
-                    rest = parts[1].strip()
-                    if rest:
-                        # 標籤後有指令，處理該指令
-                        code_part = rest
-                        original_line_for_comment = rest
-                    else:
-                        # 只有標籤，跳過
-                        continue
-                else:
-                    continue
-
-            # 解析指令
-            parts = code_part.split()
-            if not parts or parts[0].upper() not in OPCODES:
-                continue
-
-            try:
-                # 編碼指令
-                machine_code = encode_instruction(parts, labels, address)
-
-                # 轉換為大端序位元組
-                bytes_data = machine_code.to_bytes(4, 'big')
-
-                # 寫入註解
-                f_out.write(f"// {original_line_for_comment}\n")
-
-                # 寫入十六進制位元組（大寫）
-                for byte in bytes_data:
-                    f_out.write(f"{byte:02X}\n")
-
-                # 更新位址
-                address += 4
-
-            except Exception as e:
-                print(f"Error processing line: {original_line}")
-                print(f"Error: {e}")
+    if output_file.endswith('.bin'):
+        with open(output_file, 'wb') as f_out:
+            f_out.write(format_bin(records))
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f_out:
+            f_out.write(format_dat(records))
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("使用方法: python rv32i_transfer.py <instruction_file>")
+    if len(sys.argv) not in (2, 3):
+        print("使用方法: python rv32i_transfer.py <instruction_file> [output_file]")
         print("範例: python rv32i_transfer.py Pattern/TestCase1.dat")
+        print("      python rv32i_transfer.py Pattern/TestCase1.dat IM.bin   # 二進位映像檔")
         sys.exit(1)
 
     input_file = sys.argv[1]
-    output_file = "IM.dat"
+    output_file = sys.argv[2] if len(sys.argv) == 3 else "IM.dat"
 
     try:
         convert_instructions(input_file, output_file)
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+RISC-V RV32IM 受限隨機程式產生器
+以 Instr_Transfer.py 的 OPCODES / FUNCT3 / FUNCT7 表產生可由 seed 重現的隨機程式：
+有界迴圈、對齊且落在 DATA_MEM_SIZE 內的 Load/Store、密集的 RAW 相依
+（觸發 Forwarding_Unit 與 Hazard_Unit）、前向 Branch/JAL/JALR 以及 RV32M 的邊界運算元。
+
+程式在同一個 process 中組譯並由 golden model 執行（有 NumPy 時以 Golden_Batch 批次執行），
+再交給 Verify_Script.py 的模擬器後端比對 RTL。只輸出失敗的 seed，重現所需的檔案
+（seed_<n>.dat 原始碼、IM/DM、golden 與 RTL 輸出、verify.log）留在 Testbench/Work/Random/seed_<n>/。
+
+使用方法:
+  python Pattern/Random_Gen.py --seed 1 --count 1000 --sim verilator -j 8
+  python Pattern/Random_Gen.py --count 20000 --sim none    # 只跑 golden（確認程式都會結束）
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import functools
+import io
+import os
+import random
+import shutil
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BASE_DIR)
+sys.path[:0] = [BASE_DIR, PROJECT_DIR, os.path.join(PROJECT_DIR, 'Testbench')]
+
+from Instr_Transfer import OPCODES, FUNCT3, FUNCT7, assemble, to_image
+import Verify_Script as verify_script
+import dat2coe
+
+DATA_MEM_SIZE = dat2coe.SYSTEM_DEFINES['DATA_MEM_SIZE']
+RANDOM_ROOT = os.path.join('Testbench', 'Work', 'Random')
+
+# 暫存器分配：迴圈計數器與 Load/Store 基底保留，其餘為一般資料暫存器
+LOOP_REGS = (31, 30)                    # 外層、內層迴圈
+BASE_REG = 29
+POOL = tuple(range(1, 29))
+
+# 指令分類（由組譯器的編碼表推得）
+R_BASE = sorted(m for m, f7 in FUNCT7.items() if OPCODES[m] == 0x33 and f7 != 0x01)
+R_MEXT = sorted(m for m, f7 in FUNCT7.items() if f7 == 0x01)
+I_SHIFT = sorted(m for m in FUNCT7 if OPCODES[m] == 0x13)
+I_ALU = sorted(m for m, op in OPCODES.items() if op == 0x13 and m not in FUNCT7)
+LOADS = sorted(m for m, op in OPCODES.items() if op == 0x03)
+STORES = sorted(m for m, op in OPCODES.items() if op == 0x23)
+BRANCHES = sorted(m for m, op in OPCODES.items() if op == 0x63)
+
+# RV32M 邊界運算元（除以零、溢位、正負極值）
+CORNER_VALUES = (0, 1, 0xFFFFFFFF, 0x80000000, 0x7FFFFFFF, 0xFFFFFFFE, 0x80000001)
+
+def access_width(mnemonic):
+    """Load/Store 存取寬度：funct3 低 2 位 0/1/2 => 1/2/4 bytes"""
+    return 1 << (FUNCT3[mnemonic] & 3)
+
+# ============================================================================
+# 程式產生
+# ============================================================================
+
+class ProgramGenerator:
+    """
+    以 seed 產生一個隨機程式；lines 為 Instr_Transfer.assemble() 可接受的原始碼行，
+    length 為靜態指令數的下限（迴圈執行次數有上限，程式必定結束）
+    """
+
+    def __init__(self, seed, length=64, dep_rate=0.7):
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.length = length
+        self.dep_rate = dep_rate
+        self.lines = []
+        self.count = 0          # 已產生的指令數
+        self.recent = []        # 最近寫入的暫存器（RAW 相依來源）
+        self.labels = 0
+
+    def emit(self, text):
+        self.lines.append(text)
+        self.count += 1
+
+    def label(self):
+        self.labels += 1
+        return f"L{self.labels}"
+
+    def wrote(self, rd):
+        """記錄寫入 rd，之後的指令優先讀它（距離 1-3 道指令的 RAW）"""
+        if rd != 0:
+            self.recent = ([rd] + [r for r in self.recent if r != rd])[:3]
+
+    def source(self):
+        """來源暫存器：dep_rate 機率取最近寫入者，否則任選（含 x0）"""
+        if self.recent and self.rng.random() < self.dep_rate:
+            return self.rng.choice(self.recent)
+        return self.rng.choice(POOL + (0,))
+
+    def dest(self):
+        """目的暫存器：偶爾與最近寫入者相同（WAW / rs1 == rd）"""
+        if self.recent and self.rng.random() < 0.2:
+            return self.rng.choice(self.recent)
+        return self.rng.choice(POOL)
+
+    def load_constant(self, rd, value):
+        """以 LUI + ADDI 將 32-bit 常數載入 rd"""
+        value &= 0xFFFFFFFF
+        hi = ((value + 0x800) >> 12) & 0xFFFFF
+        lo = value - (hi << 12)
+        if lo >= 0x800:
+            lo -= 0x100000000
+        self.emit(f"LUI x{rd}, 0x{hi:x}")
+        if lo:
+            self.emit(f"ADDI x{rd}, x{rd}, {lo}")
+        self.wrote(rd)
+
+    # ------------------------------------------------------------------------
+    # 指令種類
+    # ------------------------------------------------------------------------
+
+    def alu(self):
+        rng = self.rng
+        kind = rng.random()
+        rd = self.dest()
+        if kind < 0.45:
+            op = rng.choice(R_BASE)
+            self.emit(f"{op} x{rd}, x{self.source()}, x{self.source()}")
+        elif kind < 0.8:
+            op = rng.choice(I_ALU)
+            self.emit(f"{op} x{rd}, x{self.source()}, {rng.randint(-2048, 2047)}")
+        elif kind < 0.95:
+            op = rng.choice(I_SHIFT)
+            self.emit(f"{op} x{rd}, x{self.source()}, {rng.randint(0, 31)}")
+        else:
+            op = rng.choice(('LUI', 'AUIPC'))
+            self.emit(f"{op} x{rd}, 0x{rng.getrandbits(20):x}")
+        self.wrote(rd)
+
+    def mext(self):
+        rng = self.rng
+        op = rng.choice(R_MEXT)
+        rs1, rs2 = self.source(), self.source()
+        if rng.random() < 0.4:
+            # 邊界運算元：先把常數載入來源暫存器（x0 不可寫，改用一般暫存器）
+            rs1 = rs1 or rng.choice(POOL)
+            rs2 = rs2 or rng.choice(POOL)
+            self.load_constant(rs1, rng.choice(CORNER_VALUES))
+            if rs2 != rs1:
+                self.load_constant(rs2, rng.choice(CORNER_VALUES))
+        rd = self.dest()
+        self.emit(f"{op} x{rd}, x{rs1}, x{rs2}")
+        self.wrote(rd)
+
+    def memory(self):
+        """對齊且落在資料記憶體內的 Load/Store（基底為 x0 或 BASE_REG）"""
+        rng = self.rng
+        store = rng.random() < 0.45
+        op = rng.choice(STORES if store else LOADS)
+        width = access_width(op)
+        addr = rng.randrange(0, DATA_MEM_SIZE - width + 1, width)
+        base, base_value = rng.choice(((0, 0), (BASE_REG, self.base_value)))
+        offset = addr - base_value
+        if store:
+            self.emit(f"{op} x{self.source()}, {offset}(x{base})")
+        else:
+            rd = self.dest()
+            self.emit(f"{op} x{rd}, {offset}(x{base})")
+            self.wrote(rd)
+
+    def simple(self):
+        """不改變控制流程的單一指令"""
+        r = self.rng.random()
+        if r < 0.55:
+            self.alu()
+        elif r < 0.75:
+            self.mext()
+        else:
+            self.memory()
+
+    def branch(self):
+        """前向 Branch 略過 1-3 道指令"""
+        target = self.label()
+        op = self.rng.choice(BRANCHES)
+        self.emit(f"{op} x{self.source()}, x{self.source()}, {target}")
+        for _ in range(self.rng.randint(1, 3)):
+            self.simple()
+        self.lines.append(f"{target}:")
+
+    def jump(self):
+        """前向 JAL，或 AUIPC + JALR 跳過 1-2 道指令"""
+        rng = self.rng
+        skip = rng.randint(1, 2)
+        rd = self.dest()
+        if rng.random() < 0.5:
+            target = self.label()
+            self.emit(f"JAL x{rd}, {target}")
+            self.wrote(rd)
+            for _ in range(skip):
+                self.simple()
+            self.lines.append(f"{target}:")
+        else:
+            rt = rng.choice(POOL)
+            self.emit(f"AUIPC x{rt}, 0")
+            self.wrote(rt)
+            # JALR 在 AUIPC 之後 4 bytes，目標再往後 skip 道指令
+            self.emit(f"JALR x{rd}, x{rt}, {8 + 4 * skip}")
+            self.wrote(rd)
+            for _ in range(skip):
+                self.simple()
+
+    def loop(self, depth=0):
+        """有界迴圈：計數器為 LOOP_REGS[depth]，執行 1-6 次（內層 1-3 次）"""
+        rng = self.rng
+        counter = LOOP_REGS[depth]
+        top = self.label()
+        self.emit(f"ADDI x{counter}, x0, {rng.randint(1, 6 if depth == 0 else 3)}")
+        self.lines.append(f"{top}:")
+        for _ in range(rng.randint(2, 8)):
+            r = rng.random()
+            if r < 0.15:
+                self.branch()
+            elif r < 0.2 and depth + 1 < len(LOOP_REGS):
+                self.loop(depth + 1)
+            else:
+                self.simple()
+        self.emit(f"ADDI x{counter}, x{counter}, -1")
+        self.emit(f"BNE x{counter}, x0, {top}")
+
+    def generate(self):
+        """產生整個程式，回傳 (原始碼行, 資料記憶體初值)"""
+        rng = self.rng
+        self.lines.append(f"// Random_Gen seed {self.seed}")
+        self.base_value = rng.randrange(0, DATA_MEM_SIZE, 4)
+        self.emit(f"ADDI x{BASE_REG}, x0, {self.base_value}")
+        for rd in rng.sample(POOL, 6):
+            self.load_constant(rd, rng.choice(CORNER_VALUES + (rng.getrandbits(32),)))
+
+        while self.count < self.length:
+            r = rng.random()
+            if r < 0.08:
+                self.loop()
+            elif r < 0.18:
+                self.branch()
+            elif r < 0.24:
+                self.jump()
+            else:
+                self.simple()
+
+        dm = bytes(rng.getrandbits(8) for _ in range(DATA_MEM_SIZE))
+        return self.lines, dm
+
+def generate(seed, length=64):
+    """seed 對應的 (原始碼行, 資料記憶體初值)"""
+    return ProgramGenerator(seed, length).generate()
+
+def write_dm(dm, path):
+    """以 DM.dat 格式（每行一個 hex byte）寫出資料記憶體初值"""
+    with open(path, 'w') as f:
+        f.write("// Data Memory Initialization File (DM.dat)\n")
+        f.write("// Format: 8-bit data in hexadecimal (Little Endian)\n")
+        for byte in dm:
+            f.write(f"{byte:02X}\n")
+
+# ============================================================================
+# Golden 與 RTL 比對
+# ============================================================================
+
+def run_golden(golden, images, dms, im_size, max_steps):
+    """
+    以 golden model 執行所有程式，回傳每個程式的 (是否結束, 指令數, save_golden(rf_path, dm_path))。
+    有 NumPy 時以 Golden_Batch.BatchMachine 同步執行，否則逐一以 Golden_Result.Machine 執行。
+    """
+    try:
+        import Golden_Batch
+    except ImportError:
+        Golden_Batch = None
+
+    results = []
+    if Golden_Batch is None:
+        for image, dm in zip(images, dms):
+            m = golden.Machine(im_size=im_size, dm_size=DATA_MEM_SIZE)
+            m.load_im_bytes(image)
+            m.load_dm_bytes(dm)
+            steps = m.run(max_steps)
+            results.append((m.halted(), steps, m.save_golden))
+        return results, 'scalar'
+
+    chunk = 2000
+    for start in range(0, len(images), chunk):
+        part = images[start:start + chunk]
+        batch = Golden_Batch.BatchMachine(len(part), im_size=im_size, dm_size=DATA_MEM_SIZE)
+        for i, image in enumerate(part):
+            batch.load_im_bytes(i, image)
+            batch.load_dm_bytes(i, dms[start + i])
+        steps = batch.run(max_steps)
+        halted = batch.halted()
+        results += [(bool(halted[i]), int(steps[i]), functools.partial(batch.save_golden, i))
+                    for i in range(len(part))]
+    return results, 'NumPy batch'
+
+def check_rtl(seed, work_dir, image, backend):
+    """
+    在 work_dir 執行 RTL 模擬並與 golden 比對（於 worker process 執行）。
+    失敗時以純量 golden model 補上 Trace.golden 找出第一個分歧的指令；通過時刪除 work_dir。
+    回傳 (seed, 是否通過, 摘要)。
+    """
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        result = verify_script.verify(work_dir) if backend.run(work_dir) else None
+        if result and not result['success']:
+            golden = verify_script.load_module("Golden_Result", "Testbench/Golden_Result.py")
+            m = golden.Machine(im_size=4 * dat2coe.BRAM_DEPTH, dm_size=DATA_MEM_SIZE)
+            m.load_im_bytes(image)
+            m.load_dm(os.path.join(work_dir, 'DM.dat'))
+            m.trace(os.path.join(work_dir, 'Trace.golden'), verify_script.GOLDEN_MAX_STEPS)
+            result = verify_script.verify(work_dir)
+
+    if result and result['success']:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        return seed, True, ''
+
+    with open(os.path.join(work_dir, 'verify.log'), 'w', encoding='utf-8') as f:
+        f.write(log.getvalue())
+    if result is None:
+        return seed, False, 'simulation failed'
+    if result.get('timeout'):
+        return seed, False, 'TIMEOUT'
+    summary = f"RF {'PASS' if result['rf_pass'] else 'FAIL'}, DM {'PASS' if result['dm_pass'] else 'FAIL'}"
+    if result.get('trace_pass') is False:
+        summary += f", trace diverges at retirement #{result['retired'] + 1}"
+    return seed, False, summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seed', type=int, default=1, help='第一個 seed（預設 1）')
+    parser.add_argument('--count', type=int, default=100, help='程式數，seed 依序遞增（預設 100）')
+    parser.add_argument('--length', type=int, default=64, help='每個程式的靜態指令數（預設 64）')
+    parser.add_argument('--sim', default='auto', help="模擬器：auto/vivado/verilator/icarus，或 none 只跑 golden（預設 auto）")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='平行模擬數（預設 CPU 數）')
+    args = parser.parse_args()
+
+    # Verify_Script.py 的路徑皆相對於 RISC-V-Processor/
+    os.chdir(PROJECT_DIR)
+    golden = verify_script.load_module("Golden_Result", "Testbench/Golden_Result.py")
+
+    backend = None
+    if args.sim != 'none':
+        if args.sim not in verify_script.SIMULATORS:
+            parser.error(f"--sim must be one of {', '.join(verify_script.SIMULATORS + ['none'])}")
+        with contextlib.redirect_stdout(io.StringIO()) as log:
+            backend = verify_script.select_backend(args.sim)
+            ready = backend is not None and backend.prepare()
+        if not ready:
+            print(log.getvalue(), end='')
+            sys.exit(1)
+
+    # 產生與組譯
+    start = time.perf_counter()
+    seeds = range(args.seed, args.seed + args.count)
+    sources, images, dms = [], [], []
+    for seed in seeds:
+        lines, dm = generate(seed, args.length)
+        records, _ = assemble(lines)
+        sources.append(lines)
+        images.append(to_image(records) + verify_script.ECALL)
+        dms.append(dm)
+    gen_time = time.perf_counter() - start
+
+    # Golden
+    start = time.perf_counter()
+    golden_results, engine = run_golden(golden, images, dms, 4 * dat2coe.BRAM_DEPTH,
+                                        verify_script.GOLDEN_MAX_STEPS)
+    golden_time = time.perf_counter() - start
+    instructions = sum(steps for _, steps, _ in golden_results)
+
+    failures = []
+
+    def keep(seed, reason):
+        """保留失敗 seed 的原始碼並輸出（只輸出失敗者）"""
+        failures.append(seed)
+        print(f"FAIL seed {seed}: {reason} ({os.path.join(RANDOM_ROOT, f'seed_{seed}')})")
+
+    def work_dir_for(i, seed):
+        work_dir = os.path.join(RANDOM_ROOT, f'seed_{seed}')
+        os.makedirs(work_dir, exist_ok=True)
+        with open(os.path.join(work_dir, f'seed_{seed}.dat'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(sources[i]) + '\n')
+        write_dm(dms[i], os.path.join(work_dir, 'DM.dat'))
+        return work_dir
+
+    pending = []
+    for i, seed in enumerate(seeds):
+        if not golden_results[i][0]:
+            work_dir_for(i, seed)
+            keep(seed, f"golden model did not reach ECALL within {verify_script.GOLDEN_MAX_STEPS} instructions")
+        elif backend:
+            pending.append(i)
+
+    # RTL
+    start = time.perf_counter()
+    if backend:
+        jobs = max(1, min(args.jobs, len(pending))) if backend.parallel else 1
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = []
+            for i in pending:
+                work_dir = work_dir_for(i, seeds[i])
+                dat2coe.image_to_coe(images[i], os.path.join(work_dir, 'IM.coe'))
+                dat2coe.image_to_mem(images[i], os.path.join(work_dir, 'IM.mem'))
+                golden_results[i][2](os.path.join(work_dir, 'RF.golden'), os.path.join(work_dir, 'DM.golden'),
+                                     binary=True)
+                futures.append(pool.submit(check_rtl, seeds[i], work_dir, images[i], backend))
+            for future in concurrent.futures.as_completed(futures):
+                seed, passed, summary = future.result()
+                if not passed:
+                    keep(seed, summary)
+        backend.close()
+    rtl_time = time.perf_counter() - start
+
+    print(f"Random_Gen: {args.count} programs (seeds {args.seed}-{args.seed + args.count - 1}), "
+          f"{instructions} instructions; generate {gen_time:.2f} s, golden {golden_time:.2f} s ({engine})"
+          + (f", RTL {rtl_time:.2f} s ({backend.name}, {len(pending)} simulated)" if backend else "")
+          + f"; {len(failures)} failing")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -11,7 +11,8 @@ module D_BRAM(
     reg [7:0] DataMem [0:`DATA_MEM_SIZE - 1];
     integer i;
     always @(posedge clka) begin
-        if(wea != 4'b0000) begin
+        // Writes beyond DataMem are dropped explicitly (some simulators would wrap the index)
+        if(wea != 4'b0000 && {addra, 2'b00} < `DATA_MEM_SIZE) begin
             if(wea[0]) DataMem[{addra, 2'b00}  ] <= dina[7:0];
             if(wea[1]) DataMem[{addra, 2'b00}+1] <= dina[15:8];
             if(wea[2]) DataMem[{addra, 2'b00}+2] <= dina[23:16];
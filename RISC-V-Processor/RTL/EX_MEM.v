@@ -9,6 +9,8 @@ module EX_MEM(
     input EX_Mem_w,
     input EX_Reg_w,
     input [1:0] EX_WB_sel,
+    input EX_Halt,
+    input EX_Valid,
     // Data Inputs
     input [`DATA_WIDTH - 1:0] EX_Imm,
     input [`DATA_WIDTH - 1:0] EX_PC_Plus_4,
@@ -17,12 +19,15 @@ module EX_MEM(
     input [`ADDR_WIDTH - 1:0] EX_Rd_Addr,
     input [3:0] EX_Mem_W_Strb,
     input [2:0] EX_Funct3,
+    input [`INSTR_WIDTH - 1:0] EX_Instr,
 
     // Control Signal Outputs
     output reg MEM_Mem_r,
     output reg MEM_Mem_w,
     output reg MEM_Reg_w,
     output reg [1:0] MEM_WB_sel,
+    output reg MEM_Halt,
+    output reg MEM_Valid,
     // Data Outputs
     output reg [`DATA_WIDTH - 1:0] MEM_Imm,
     output reg [`DATA_WIDTH - 1:0] MEM_PC_Plus_4,
@@ -30,7 +35,8 @@ module EX_MEM(
     output reg [`DATA_WIDTH - 1:0] MEM_Mem_W_Data,
     output reg [`ADDR_WIDTH - 1:0] MEM_Rd_Addr,
     output reg [3:0] MEM_Mem_W_Strb,
-    output reg [2:0] MEM_Funct3
+    output reg [2:0] MEM_Funct3,
+    output reg [`INSTR_WIDTH - 1:0] MEM_Instr
 );
     always @(posedge clk or negedge rst_n) begin
         if(!rst_n) begin
@@ -39,6 +45,8 @@ module EX_MEM(
             MEM_Mem_w <= 0;
             MEM_Reg_w <= 0;
             MEM_WB_sel <= 0;
+            MEM_Halt <= 0;
+            MEM_Valid <= 0;
             MEM_Imm <= 0;
             MEM_PC_Plus_4 <= 0;
             MEM_ALU_Result <= 0;
@@ -46,6 +54,7 @@ module EX_MEM(
             MEM_Rd_Addr <= 0;
             MEM_Mem_W_Strb <= 0;
             MEM_Funct3 <= 0;
+            MEM_Instr <= 0;
         end
         else if(EX_MEM_Stall) begin
             // D-Cache stall: hold all current values
@@ -56,6 +65,8 @@ module EX_MEM(
             MEM_Mem_w <= EX_Mem_w;
             MEM_Reg_w <= EX_Reg_w;
             MEM_WB_sel <= EX_WB_sel;
+            MEM_Halt <= EX_Halt;
+            MEM_Valid <= EX_Valid;
             MEM_Mem_W_Strb <= EX_Mem_W_Strb;
             MEM_Funct3 <= EX_Funct3;
 
@@ -65,6 +76,7 @@ module EX_MEM(
             MEM_ALU_Result <= EX_ALU_Result;
             MEM_Mem_W_Data <= EX_Mem_W_Data;
             MEM_Rd_Addr <= EX_Rd_Addr;
+            MEM_Instr <= EX_Instr;
         end
     end
 
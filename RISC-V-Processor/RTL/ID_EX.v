@@ -28,6 +28,9 @@ module ID_EX(
     input [2:0] ID_Funct3,
     input ID_CSR_en,
     input ID_Predict_Taken,
+    input ID_Halt,
+    input ID_Valid,
+    input [`INSTR_WIDTH - 1:0] ID_Instr,
 
     // Control Signal Outputs
     output reg [1:0] EX_ALU_op,
@@ -51,7 +54,10 @@ module ID_EX(
     output reg [6:0] EX_Funct7,
     output reg [2:0] EX_Funct3,
     output reg EX_CSR_en,
-    output reg EX_Predict_Taken
+    output reg EX_Predict_Taken,
+    output reg EX_Halt,
+    output reg EX_Valid,
+    output reg [`INSTR_WIDTH - 1:0] EX_Instr
 );
     always @(posedge clk or negedge rst_n) begin
         if(!rst_n) begin
@@ -75,6 +81,9 @@ module ID_EX(
             EX_Funct3 <= 0;
             EX_CSR_en <= 0;
             EX_Predict_Taken <= 0;
+            EX_Halt <= 0;
+            EX_Valid <= 0;
+            EX_Instr <= 0;
         end
         else if(ID_EX_Stall) begin
             // D-Cache stall: hold all current values (registers retain implicitly)
@@ -91,6 +100,8 @@ module ID_EX(
             EX_Reg_w <= (ID_EX_Flush)? 0 : ID_Reg_w;
             EX_WB_sel <= (ID_EX_Flush)? 0 : ID_WB_sel;
             EX_CSR_en <= (ID_EX_Flush)? 0 : ID_CSR_en;
+            EX_Halt <= (ID_EX_Flush)? 0 : ID_Halt;
+            EX_Valid <= (ID_EX_Flush)? 0 : ID_Valid;
 
             // Data
             EX_PC <= ID_PC;
@@ -103,6 +114,7 @@ module ID_EX(
             EX_Funct7 <= ID_Funct7;
             EX_Funct3 <= ID_Funct3;
             EX_Predict_Taken <= ID_Predict_Taken;
+            EX_Instr <= ID_Instr;
         end
     end
 endmodule
\ No newline at end of file
@@ -10,7 +10,8 @@ module IF_ID(
     input IF_Predict_Taken,
     output reg [`PC_WIDTH - 1:0] ID_PC,
     output reg [`INSTR_WIDTH - 1:0] ID_Instr,
-    output reg ID_Predict_Taken
+    output reg ID_Predict_Taken,
+    output reg ID_Valid         // a fetched instruction (not a reset/flush NOP); retirement trace only
 );
 
     always @(posedge clk or negedge rst_n) begin
@@ -18,17 +19,20 @@ module IF_ID(
             ID_PC <= 0;
             ID_Instr <= `NOP;
             ID_Predict_Taken <= 0;
+            ID_Valid <= 0;
         end
         else begin
             if (IF_ID_w) begin
                 ID_PC <= (IF_ID_Flush)? 0 : IF_PC;
                 ID_Instr <= (IF_ID_Flush)? `NOP : IF_Instr;
                 ID_Predict_Taken <= IF_Predict_Taken;
+                ID_Valid <= !IF_ID_Flush;
             end
             else begin
                 ID_PC <= ID_PC;
                 ID_Instr <= ID_Instr;
                 ID_Predict_Taken <= ID_Predict_Taken;
+                ID_Valid <= ID_Valid;
             end
         end
     end
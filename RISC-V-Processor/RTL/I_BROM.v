@@ -0,0 +1,18 @@
+`include "SYSTEM_DEF.vh"
+
+// Behavioral stand-in for the blk_mem_gen_0 instruction ROM (same ports, 1-cycle read latency).
+// Selected with `define BEHAVIORAL_IM; the testbench loads InstrMem with $readmemh, so a new
+// program only needs a restart instead of regenerating the IP.
+module I_BROM(
+    input clka,
+    input [`BRAM_ADDR_W-1:0] addra,      // 10-bit word address (from AXI4_Lite_Bus)
+    output reg [`INSTR_WIDTH-1:0] douta
+);
+
+    reg [`INSTR_WIDTH-1:0] InstrMem [0:`BRAM_DEPTH - 1];
+
+    always @(posedge clka) begin
+        douta <= InstrMem[addra];
+    end
+
+endmodule
\ No newline at end of file
@@ -7,6 +7,8 @@ module MEM_WB(
     // Control Signals Inputs
     input MEM_Reg_w,
     input [1:0] MEM_WB_sel,
+    input MEM_Halt,
+    input MEM_Valid,
 
     // Data Inputs
     input [`DATA_WIDTH - 1:0] MEM_Imm,
@@ -14,17 +16,23 @@ module MEM_WB(
     input [`DATA_WIDTH - 1:0] MEM_Mem_R_Data,
     input [`DATA_WIDTH - 1:0] MEM_ALU_Result,
     input [`ADDR_WIDTH - 1:0] MEM_Rd_Addr,
+    input [`DATA_WIDTH - 1:0] MEM_Mem_W_Data,
+    input [`INSTR_WIDTH - 1:0] MEM_Instr,
 
     // Control Signal Outputs
     output reg WB_Reg_w,
     output reg [1:0] WB_WB_sel,
+    output reg WB_Halt,
+    output reg WB_Valid,
 
     // Data Outputs
     output reg [`DATA_WIDTH - 1:0] WB_Imm,
     output reg [`DATA_WIDTH - 1:0] WB_PC_Plus_4,
     output reg [`DATA_WIDTH - 1:0] WB_Mem_R_Data,
     output reg [`DATA_WIDTH - 1:0] WB_ALU_Result,
-    output reg [`ADDR_WIDTH - 1:0] WB_Rd_Addr
+    output reg [`ADDR_WIDTH - 1:0] WB_Rd_Addr,
+    output reg [`DATA_WIDTH - 1:0] WB_Mem_W_Data,
+    output reg [`INSTR_WIDTH - 1:0] WB_Instr
 );
 
     always @(posedge clk or negedge rst_n) begin
@@ -32,11 +40,15 @@ module MEM_WB(
             // Control Signals
             WB_Reg_w <= 0;
             WB_WB_sel <= 0;
+            WB_Halt <= 0;
+            WB_Valid <= 0;
             WB_Imm <= 0;
             WB_PC_Plus_4 <= 0;
             WB_Mem_R_Data <= 0;
             WB_ALU_Result <= 0;
             WB_Rd_Addr <= 0;
+            WB_Mem_W_Data <= 0;
+            WB_Instr <= 0;
         end
         else if(MEM_WB_Stall) begin
             // D-Cache stall: hold all current values
@@ -45,6 +57,8 @@ module MEM_WB(
             // Control Signals
             WB_Reg_w <= MEM_Reg_w;
             WB_WB_sel <= MEM_WB_sel;
+            WB_Halt <= MEM_Halt;
+            WB_Valid <= MEM_Valid;
 
             // Data
             WB_Imm <= MEM_Imm;
@@ -52,6 +66,8 @@ module MEM_WB(
             WB_Mem_R_Data <= MEM_Mem_R_Data;
             WB_ALU_Result <= MEM_ALU_Result;
             WB_Rd_Addr <= MEM_Rd_Addr;
+            WB_Mem_W_Data <= MEM_Mem_W_Data;
+            WB_Instr <= MEM_Instr;
         end
 
     end
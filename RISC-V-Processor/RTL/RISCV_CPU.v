@@ -98,6 +98,12 @@ module RISCV_CPU(
     wire    [3:0]   EX_Mem_W_Strb,MEM_Mem_W_Strb;
 
     wire    ID_CSR_en,EX_CSR_en;
+    wire    ID_Halt,EX_Halt,MEM_Halt,WB_Halt;   // ECALL/EBREAK marker; the testbench stops when WB_Halt is set
+
+    // Retirement trace only (read by the testbench, unused by the datapath)
+    wire    ID_Valid,EX_Valid,MEM_Valid,WB_Valid;
+    wire    [`INSTR_WIDTH - 1:0]    EX_Instr,MEM_Instr,WB_Instr;
+    wire    [`DATA_WIDTH - 1:0]     WB_Mem_W_Data;
     wire    [`DATA_WIDTH - 1:0]     CSR_R_Data;
 
     wire    Predict;
@@ -124,6 +130,7 @@ module RISCV_CPU(
     assign ID_Rd_Addr = ID_Instr[11:7];
     assign ID_Funct7 = ID_Instr[31:25];
     assign ID_Funct3 = ID_Instr[14:12];
+    assign ID_Halt = (ID_Instr == `ECALL) || (ID_Instr == `EBREAK);
 
     assign EX_Mem_W_Data = Src2_Data;
 
@@ -229,7 +236,8 @@ module RISCV_CPU(
         .IF_Predict_Taken(Predict_Taken),
         .ID_PC(ID_PC),
         .ID_Predict_Taken(ID_Predict_Taken),
-        .ID_Instr(ID_Instr));
+        .ID_Instr(ID_Instr),
+        .ID_Valid(ID_Valid));
 
     RF Register_File(
         .clk(ACLK),
@@ -303,6 +311,9 @@ module RISCV_CPU(
         .ID_Funct3(ID_Funct3),
         .ID_CSR_en(ID_CSR_en),
         .ID_Predict_Taken(ID_Predict_Taken),
+        .ID_Halt(ID_Halt),
+        .ID_Valid(ID_Valid),
+        .ID_Instr(ID_Instr),
         .EX_ALU_op(EX_ALU_op),
         .EX_ALU_src1(EX_ALU_src1),
         .EX_ALU_src2(EX_ALU_src2),
@@ -322,7 +333,10 @@ module RISCV_CPU(
         .EX_Funct7(EX_Funct7),
         .EX_Funct3(EX_Funct3),
         .EX_CSR_en(EX_CSR_en),
-        .EX_Predict_Taken(EX_Predict_Taken));
+        .EX_Predict_Taken(EX_Predict_Taken),
+        .EX_Halt(EX_Halt),
+        .EX_Valid(EX_Valid),
+        .EX_Instr(EX_Instr));
 
     CSR Control_State_Register(
         .clk(ACLK),
@@ -375,6 +389,8 @@ module RISCV_CPU(
         .EX_Mem_w(EX_Mem_w),
         .EX_Reg_w(EX_Reg_w),
         .EX_WB_sel(EX_WB_sel),
+        .EX_Halt(EX_Halt),
+        .EX_Valid(EX_Valid),
         .EX_Imm(EX_Imm),
         .EX_PC_Plus_4(EX_PC_Plus_4),
         .EX_ALU_Result(EX_ALU_Result),
@@ -382,17 +398,21 @@ module RISCV_CPU(
         .EX_Rd_Addr(EX_Rd_Addr),
         .EX_Mem_W_Strb(EX_Mem_W_Strb),
         .EX_Funct3(EX_Funct3),
+        .EX_Instr(EX_Instr),
         .MEM_Mem_r(MEM_Mem_r),
         .MEM_Mem_w(MEM_Mem_w),
         .MEM_Reg_w(MEM_Reg_w),
         .MEM_WB_sel(MEM_WB_sel),
+        .MEM_Halt(MEM_Halt),
+        .MEM_Valid(MEM_Valid),
         .MEM_Imm(MEM_Imm),
         .MEM_PC_Plus_4(MEM_PC_Plus_4),
         .MEM_ALU_Result(MEM_ALU_Result),
         .MEM_Mem_W_Data(MEM_Mem_W_Data),
         .MEM_Rd_Addr(MEM_Rd_Addr),
         .MEM_Mem_W_Strb(MEM_Mem_W_Strb),
-        .MEM_Funct3(MEM_Funct3));
+        .MEM_Funct3(MEM_Funct3),
+        .MEM_Instr(MEM_Instr));
 
     D_Cache Data_Cache(
         .ACLK(ACLK),
@@ -436,17 +456,25 @@ module RISCV_CPU(
         .MEM_WB_Stall(Pipeline_Stall),
         .MEM_Reg_w(MEM_Reg_w),
         .MEM_WB_sel(MEM_WB_sel),
+        .MEM_Halt(MEM_Halt),
+        .MEM_Valid(MEM_Valid),
         .MEM_Imm(MEM_Imm),
         .MEM_PC_Plus_4(MEM_PC_Plus_4),
         .MEM_Mem_R_Data(MEM_Mem_R_Data),
         .MEM_ALU_Result(MEM_ALU_Result),
         .MEM_Rd_Addr(MEM_Rd_Addr),
+        .MEM_Mem_W_Data(MEM_Mem_W_Data),
+        .MEM_Instr(MEM_Instr),
         .WB_Reg_w(WB_Reg_w),
         .WB_WB_sel(WB_WB_sel),
+        .WB_Halt(WB_Halt),
+        .WB_Valid(WB_Valid),
         .WB_Imm(WB_Imm),
         .WB_PC_Plus_4(WB_PC_Plus_4),
         .WB_Mem_R_Data(WB_Mem_R_Data),
         .WB_ALU_Result(WB_ALU_Result),
-        .WB_Rd_Addr(WB_Rd_Addr));
+        .WB_Rd_Addr(WB_Rd_Addr),
+        .WB_Mem_W_Data(WB_Mem_W_Data),
+        .WB_Instr(WB_Instr));
 
 endmodule
\ No newline at end of file
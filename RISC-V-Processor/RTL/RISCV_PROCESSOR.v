@@ -35,9 +35,13 @@ module RISCV_PROCESSOR(
     wire [`DATA_W-1:0]      D_SLAVE_DOUT;
 
     // =========================================================================
-    // Instruction BRAM (Vivado IP)
+    // Instruction BRAM (Vivado IP, or behavioral I_BROM loaded by the testbench)
     // =========================================================================
+`ifdef BEHAVIORAL_IM
+    I_BROM Instruction_Mem (
+`else
     blk_mem_gen_0 Instruction_Mem (
+`endif
         .addra(I_SLAVE_ADDR),
         .clka(ACLK),
         .douta(I_SLAVE_DOUT));
@@ -7,19 +7,106 @@ module RISCV_PROCESSOR_tb ();
     reg [7:0] DataMem [0:`DATA_MEM_SIZE - 1];
     integer i;
     integer register_file,dm_file;
+    integer rf_bin_file, dm_bin_file;
+
+    // File locations; +WORK_DIR=<dir> redirects IM.mem / DM.dat / State.mem / RF.out / DM.out
+    // (and the .bin dumps) into <dir>
+    reg [8*256-1:0] work_dir;
+    reg [8*256-1:0] im_in_path, dm_in_path, state_in_path, rf_out_path, dm_out_path, trace_out_path;
+    reg [8*256-1:0] rf_bin_path, dm_bin_path;
+
+    // Raw dumps (+BIN_DUMP): RF.out.bin holds x0-x31 as little-endian words and DM.out.bin the
+    // DATA_MEM_SIZE data memory bytes, written after RF.out/DM.out so Verify_Script.py can load
+    // them without parsing text (it ignores a dump older than its text file)
+    reg bin_dump;
+
+    // Fast-forward (Verify_Script.py --fast-forward): when State.mem exists it holds the golden
+    // model's state mid-program as $readmemh words - x0-x31, the PC, then the data memory
+    // (little-endian words). x1-x31, IF_PC and DataMem are loaded right after reset is released
+    // and the run is compared from that point on
+    localparam STATE_WORDS = `GPR_SIZE + 1 + `DATA_MEM_SIZE / 4;
+    reg [`DATA_WIDTH-1:0] StartState [0:STATE_WORDS - 1];
+    reg start_state;
+    integer state_file;
+
+    // Termination: the program ends when ECALL/EBREAK retires (WB_Halt). +MAX_CYCLES=<n>
+    // (default 100000) is only a watchdog; hitting it is reported as TIMEOUT in RF.out
+    integer cycle, max_cycles;
+    reg halted;
+
+    // Retirement trace (Trace.out): one line per instruction leaving WB, in the format the golden
+    // model writes to Trace.golden: "<pc> <instr>" followed by " x<rd>=<data>" for a register
+    // write or " [<addr>]=<data>" for a store (data masked to the store width)
+    integer trace_file = 0;
+    reg [`INSTR_WIDTH-1:0] trace_instr;
+    reg [`DATA_WIDTH-1:0] trace_pc, trace_data;
+
+    task trace_retire;
+        begin
+            trace_instr = test.RISC_V_CPU_inst.WB_Instr;
+            trace_pc = test.RISC_V_CPU_inst.WB_PC_Plus_4 - 4;
+            trace_data = test.RISC_V_CPU_inst.WB_Mem_W_Data;
+            if (trace_instr[6:0] == `S_TYPE) begin
+                if (trace_instr[14:12] == 3'b000) trace_data = trace_data & 32'h000000ff;
+                else if (trace_instr[14:12] == 3'b001) trace_data = trace_data & 32'h0000ffff;
+                $fdisplay(trace_file, "%h %h [%h]=%h", trace_pc, trace_instr,
+                          test.RISC_V_CPU_inst.WB_ALU_Result, trace_data);
+            end
+            else if (test.RISC_V_CPU_inst.WB_Reg_w && test.RISC_V_CPU_inst.WB_Rd_Addr != 0)
+                $fdisplay(trace_file, "%h %h x%0d=%h", trace_pc, trace_instr,
+                          test.RISC_V_CPU_inst.WB_Rd_Addr, test.RISC_V_CPU_inst.WB_Data);
+            else
+                $fdisplay(trace_file, "%h %h", trace_pc, trace_instr);
+        end
+    endtask
+
+    // MEM_WB advances on every edge without a pipeline stall: the instruction in WB retires
+    always @(posedge clk) begin
+        if (trace_file && rst_n && test.RISC_V_CPU_inst.WB_Valid && !test.RISC_V_CPU_inst.Pipeline_Stall)
+            trace_retire;
+    end
+
     RISCV_PROCESSOR test(clk,rst_n);
 
     initial begin
+        if (!$value$plusargs("MAX_CYCLES=%d", max_cycles)) max_cycles = 100000;
         clk = 0;
         rst_n = 1;
         #120;
         @(negedge clk) rst_n = 0;
         @(negedge clk) rst_n = 1;
-        #10000 begin
-            register_file = $fopen("C:/Users/harry/Desktop/Project/RISCV/RISC-V-Processor/Testbench/RF.out", "w");
+        if (start_state) begin
+            #1; // after the RF's reset edge, before the first fetch
+            for (i = 1; i < `GPR_SIZE; i = i + 1)
+                test.RISC_V_CPU_inst.Register_File.GPR[i] = StartState[i];
+            test.RISC_V_CPU_inst.Program_Counter.IF_PC = StartState[`GPR_SIZE];
+            for (i = 0; i < `DATA_MEM_SIZE; i = i + 1)
+                test.Data_Memory.DataMem[i] = StartState[`GPR_SIZE + 1 + i / 4] >> (8 * (i % 4));
+            $display("Started from State.mem at PC %h", StartState[`GPR_SIZE]);
+        end
+        trace_file = $fopen(trace_out_path, "w");
+        cycle = 0;
+        while (!test.RISC_V_CPU_inst.WB_Halt && cycle < max_cycles) begin
+            @(negedge clk);
+            cycle = cycle + 1;
+        end
+        halted = test.RISC_V_CPU_inst.WB_Halt;
+        if (halted) $display("ECALL/EBREAK retired after %0d cycles", cycle);
+        else $display("TIMEOUT: no ECALL/EBREAK retired within %0d cycles", max_cycles);
+        if (trace_file) begin
+            if (halted) trace_retire;
+            $fclose(trace_file);
+            trace_file = 0;
+            $display("Retirement trace written to Trace.out");
+        end
+        else $display("Failed to open Trace.out");
+        begin
+            register_file = $fopen(rf_out_path, "w");
             if (register_file) begin
                 $fdisplay(register_file, "// Register File Contents with Index");
                 $fdisplay(register_file, "// Format: [Index] Data");
+                if (halted) $fdisplay(register_file, "// Status: HALT %0d", cycle);
+                else $fdisplay(register_file, "// Status: TIMEOUT %0d", cycle);
                 for (i = 0; i < `GPR_SIZE; i = i + 1) begin
                     $fdisplay(register_file, "[%0d] %h", i, test.RISC_V_CPU_inst.Register_File.GPR[i]);
                 end
@@ -28,7 +115,7 @@ module RISCV_PROCESSOR_tb ();
             end
             else $display("Failed to open RF.out");
 
-            dm_file = $fopen("C:/Users/harry/Desktop/Project/RISCV/RISC-V-Processor/Testbench/DM.out", "w");
+            dm_file = $fopen(dm_out_path, "w");
             if (dm_file) begin
                 $fdisplay(dm_file, "// Data Memory Contents with Address");
                 $fdisplay(dm_file, "// Format: [Address] Data");
@@ -39,6 +126,25 @@ module RISCV_PROCESSOR_tb ();
                 $display("Data Memory written to DM.out");
             end
             else $display("Failed to open DM.out");
+
+            if (bin_dump) begin
+                rf_bin_file = $fopen(rf_bin_path, "wb");
+                dm_bin_file = $fopen(dm_bin_path, "wb");
+                if (rf_bin_file && dm_bin_file) begin
+                    for (i = 0; i < `GPR_SIZE; i = i + 1)
+                        $fwrite(rf_bin_file, "%c%c%c%c",
+                                test.RISC_V_CPU_inst.Register_File.GPR[i][7:0],
+                                test.RISC_V_CPU_inst.Register_File.GPR[i][15:8],
+                                test.RISC_V_CPU_inst.Register_File.GPR[i][23:16],
+                                test.RISC_V_CPU_inst.Register_File.GPR[i][31:24]);
+                    for (i = 0; i < `DATA_MEM_SIZE; i = i + 1)
+                        $fwrite(dm_bin_file, "%c", test.Data_Memory.DataMem[i]);
+                    $display("Raw dumps written to RF.out.bin and DM.out.bin");
+                end
+                else $display("Failed to open RF.out.bin/DM.out.bin");
+                if (rf_bin_file) $fclose(rf_bin_file);
+                if (dm_bin_file) $fclose(dm_bin_file);
+            end
         end
         #10 $finish;
     end
@@ -47,11 +153,44 @@ module RISCV_PROCESSOR_tb ();
 
     initial begin : Preprocess
         //$readmemh("C:/Users/harry/Desktop/Project/RISCV/Five-Stage-Pipelined-CPU/Testbench/IM.dat", InstrMem);
-        $readmemh("C:/Users/harry/Desktop/Project/RISCV/RISC-V-Processor/Testbench/DM.dat", DataMem);
+        if ($value$plusargs("WORK_DIR=%s", work_dir)) begin
+            $sformat(im_in_path,  "%0s/IM.mem", work_dir);
+            $sformat(dm_in_path,  "%0s/DM.dat", work_dir);
+            $sformat(state_in_path, "%0s/State.mem", work_dir);
+            $sformat(rf_out_path, "%0s/RF.out", work_dir);
+            $sformat(dm_out_path, "%0s/DM.out", work_dir);
+            $sformat(trace_out_path, "%0s/Trace.out", work_dir);
+            $sformat(rf_bin_path, "%0s/RF.out.bin", work_dir);
+            $sformat(dm_bin_path, "%0s/DM.out.bin", work_dir);
+        end
+        else begin
+            im_in_path  = "C:/Users/harry/Desktop/Project/RISCV/RISC-V-Processor/Testbench/IM.mem";
+            dm_in_path  = "C:/Users/harry/Desktop/Project/RISCV/RISC-V-Processor/Testbench/DM.dat";
+            state_in_path = "C:/Users/harry/Desktop/Project/RISCV/RISC-V-Processor/Testbench/State.mem";
+            rf_out_path = "C:/Users/harry/Desktop/Project/RISCV/RISC-V-Processor/Testbench/RF.out";
+            dm_out_path = "C:/Users/harry/Desktop/Project/RISCV/RISC-V-Processor/Testbench/DM.out";
+            trace_out_path = "C:/Users/harry/Desktop/Project/RISCV/RISC-V-Processor/Testbench/Trace.out";
+            rf_bin_path = "C:/Users/harry/Desktop/Project/RISCV/RISC-V-Processor/Testbench/RF.out.bin";
+            dm_bin_path = "C:/Users/harry/Desktop/Project/RISCV/RISC-V-Processor/Testbench/DM.out.bin";
+        end
+        bin_dump = $test$plusargs("BIN_DUMP");
+
+`ifdef BEHAVIORAL_IM
+        // Behavioral I_BROM: (re)load the program on every run/restart
+        $readmemh(im_in_path, test.Instruction_Mem.InstrMem);
+`endif
+        $readmemh(dm_in_path, DataMem);
 
         for (i = 0; i < `DATA_MEM_SIZE; i = i + 1) begin
             test.Data_Memory.DataMem[i] = DataMem[i];
         end
         $display("Initialize the Instr_Mem & Data_Mem");
+
+        state_file = $fopen(state_in_path, "r");
+        start_state = state_file != 0;
+        if (start_state) begin
+            $fclose(state_file);
+            $readmemh(state_in_path, StartState);
+        end
     end
 endmodule
\ No newline at end of file
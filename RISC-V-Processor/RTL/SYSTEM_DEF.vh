@@ -102,6 +102,8 @@
     // Miscellaneous
     // ============================================================================
     `define NOP 32'h00000013
+    `define ECALL  32'h00000073    // Retiring ECALL/EBREAK ends a test program (see WB_Halt)
+    `define EBREAK 32'h00100073
 
     // ============================================================================
     // Branch Prediction Unit (BPU) Configuration
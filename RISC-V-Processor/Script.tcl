@@ -1,9 +1,26 @@
+# Usage: vivado -mode batch -source Script.tcl [-tclargs <work_dir>]
+#   <work_dir> (optional): per-test directory holding IM.coe and DM.dat. The project is
+#   saved as a private copy under <work_dir>/vivado so several simulations can run side
+#   by side, and the testbench writes RF.out/DM.out into <work_dir>. Both modes pass +BIN_DUMP,
+#   so the raw RF.out.bin/DM.out.bin dumps are written next to them.
 open_project C:/Xilinx/Project/RISC-V/RISC-V.xpr
+if {$argc > 0} {
+    set work_dir [file normalize [lindex $argv 0]]
+    save_project_as -force RISC-V $work_dir/vivado
+    set coe_file $work_dir/IM.coe
+    set plusargs "-testplusarg WORK_DIR=$work_dir -testplusarg BIN_DUMP"
+} else {
+    set coe_file {c:/Users/harry/Desktop/Project/RISCV/RISC-V-Processor/Testbench/IM.coe}
+    set plusargs "-testplusarg BIN_DUMP"
+}
+set_property -name {xsim.simulate.xsim.more_options} -value $plusargs -objects [get_filesets sim_1]
+set proj_dir [get_property DIRECTORY [current_project]]
+set ip_xci [get_files blk_mem_gen_0.xci]
 update_compile_order -fileset sources_1
-set_property CONFIG.Coe_File {c:/Users/harry/Desktop/Project/RISCV/RISC-V-Processor/Testbench/IM.coe} [get_ips blk_mem_gen_0]
-generate_target all [get_files  C:/Xilinx/Project/RISC-V/RISC-V.srcs/sources_1/ip/blk_mem_gen_0/blk_mem_gen_0.xci]
-export_ip_user_files -of_objects [get_files C:/Xilinx/Project/RISC-V/RISC-V.srcs/sources_1/ip/blk_mem_gen_0/blk_mem_gen_0.xci] -no_script -sync -force -quiet
-export_simulation -lib_map_path [list {modelsim=C:/Xilinx/Project/RISC-V/RISC-V.cache/compile_simlib/modelsim} {questa=C:/Xilinx/Project/RISC-V/RISC-V.cache/compile_simlib/questa} {riviera=C:/Xilinx/Project/RISC-V/RISC-V.cache/compile_simlib/riviera} {activehdl=C:/Xilinx/Project/RISC-V/RISC-V.cache/compile_simlib/activehdl}] -of_objects [get_files C:/Xilinx/Project/RISC-V/RISC-V.srcs/sources_1/ip/blk_mem_gen_0/blk_mem_gen_0.xci] -directory C:/Xilinx/Project/RISC-V/RISC-V.ip_user_files/sim_scripts -ip_user_files_dir C:/Xilinx/Project/RISC-V/RISC-V.ip_user_files -ipstatic_source_dir C:/Xilinx/Project/RISC-V/RISC-V.ip_user_files/ipstatic -use_ip_compiled_libs -force -quiet
+set_property CONFIG.Coe_File $coe_file [get_ips blk_mem_gen_0]
+generate_target all $ip_xci
+export_ip_user_files -of_objects $ip_xci -no_script -sync -force -quiet
+export_simulation -lib_map_path [list {modelsim=C:/Xilinx/Project/RISC-V/RISC-V.cache/compile_simlib/modelsim} {questa=C:/Xilinx/Project/RISC-V/RISC-V.cache/compile_simlib/questa} {riviera=C:/Xilinx/Project/RISC-V/RISC-V.cache/compile_simlib/riviera} {activehdl=C:/Xilinx/Project/RISC-V/RISC-V.cache/compile_simlib/activehdl}] -of_objects $ip_xci -directory $proj_dir/RISC-V.ip_user_files/sim_scripts -ip_user_files_dir $proj_dir/RISC-V.ip_user_files -ipstatic_source_dir $proj_dir/RISC-V.ip_user_files/ipstatic -use_ip_compiled_libs -force -quiet
 launch_simulation
 run all
 close_sim
@@ -0,0 +1,42 @@
+# Usage: vivado -mode tcl -source Sim_Session.tcl -nolog -nojournal -tclargs <session_dir>
+#   Long-lived simulation session driven by Verify_Script.py --session. The project is saved
+#   as a private copy under <session_dir>/vivado and elaborated ONCE with BEHAVIORAL_IM, which
+#   swaps the blk_mem_gen_0 IP for the behavioral I_BROM. For every test the driver writes
+#   IM.mem/DM.dat (and State.mem) into <session_dir> and sends "run_test": the testbench
+#   reloads them on restart and writes RF.out/DM.out (and their raw .bin dumps) back there.
+#   "end_session" closes the simulator.
+#   Lines starting with @@ on stdout are the handshake with the driver.
+open_project C:/Xilinx/Project/RISC-V/RISC-V.xpr
+set session_dir [file normalize [lindex $argv 0]]
+set rtl_dir [file normalize [file join [file dirname [info script]] RTL]]
+save_project_as -force RISC-V $session_dir/vivado
+if {[llength [get_files -quiet I_BROM.v]] == 0} {
+    add_files -norecurse -fileset sim_1 $rtl_dir/I_BROM.v
+}
+update_compile_order -fileset sim_1
+set_property verilog_define {BEHAVIORAL_IM} [get_filesets sim_1]
+set_property -name {xsim.simulate.runtime} -value {0ns} -objects [get_filesets sim_1]
+set plusargs "-testplusarg WORK_DIR=$session_dir -testplusarg BIN_DUMP"
+set_property -name {xsim.simulate.xsim.more_options} -value $plusargs -objects [get_filesets sim_1]
+if {[catch {launch_simulation} msg]} {
+    puts "@@SESSION_ERROR $msg"
+    flush stdout
+    exit 1
+}
+puts "@@SESSION_READY"
+flush stdout
+
+proc run_test {} {
+    if {[catch {restart; run all} msg]} {
+        puts "@@TEST_ERROR $msg"
+    } else {
+        puts "@@TEST_DONE"
+    }
+    flush stdout
+}
+
+proc end_session {} {
+    close_sim
+    close_project
+    exit
+}
\ No newline at end of file
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+分支預測器模型與大小掃描
+以 Golden_Result.Machine 執行程式取得分支流（pc、種類、是否 taken、目標），統計：
+  - RTL：Pipeline_Model 逐週期重現 BHT.v/BTB.v（以 PC[5:0] 為索引、每個週期都以 EX_PC 更新 BHT），
+         得到與 RTL 相同的預測準確率、BTB 命中率與 flush 週期數
+  - 掃描（--sweep）：一次走過分支流，同時評估多種表格大小與預測方式
+        （bimodal、gshare、tournament，以及把 JAL/JALR 也放進 BTB 的變化），
+        並列出各自的儲存位元數，用來判斷預測器面積是否值得
+掃描使用的是以分支流驅動的理想化模型：計數器只在分支執行時更新，預測錯誤一律以 EX 決定時的
+FLUSH_CYCLES 週期計算，不含 I/D-Cache 的交互影響。
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import Golden_Result as golden
+import Pipeline_Model as pipeline
+from Verify_Script import load_module
+
+MASK = 0xFFFFFFFF
+PC_WIDTH = 32
+
+# RTL/SYSTEM_DEF.vh
+BHT_PC_WIDTH = pipeline.BHT_PC_WIDTH
+BHT_SIZE = pipeline.BHT_SIZE
+BTB_SIZE = pipeline.BTB_SIZE
+
+# 分支/跳躍於 EX 決定，預測錯誤時 IF/ID 與 ID/EX 各 flush 一次
+FLUSH_CYCLES = 2
+
+# ============================================================================
+# 分支流
+# ============================================================================
+
+class Branch:
+    """一筆控制轉移：kind 為 'branch'、'jal' 或 'jalr'"""
+    __slots__ = ('pc', 'kind', 'taken', 'target')
+
+    def __init__(self, pc, kind, taken, target):
+        self.pc = pc
+        self.kind = kind
+        self.taken = taken
+        self.target = target
+
+def branch_trace(machine, max_steps=100000):
+    """逐指令執行 machine，回傳 (分支流, 執行指令數)"""
+    m = machine
+    if len(m.decoded_table) != len(m.instruction_memory) >> 2:
+        m.predecode()
+    trace = []
+    steps = 0
+    while steps < max_steps:
+        pc = m.pc
+        if pc >= len(m.instruction_memory) - 3:
+            break
+        d = m.lookup(pc)
+        if not m.step():
+            break
+        steps += 1
+        if d.opcode == 0x63:
+            trace.append(Branch(pc, 'branch', m.pc != (pc + 4) & MASK, (pc + d.imm) & MASK))
+        elif d.opcode == 0x6F:
+            trace.append(Branch(pc, 'jal', True, m.pc))
+        elif d.opcode == 0x67:
+            trace.append(Branch(pc, 'jalr', True, m.pc))
+        elif d.opcode == 0x73:
+            break
+    return trace, steps
+
+# ============================================================================
+# 預測器（分支流驅動）
+# ============================================================================
+
+class Predictor:
+    """
+    共用的 BTB（direct-mapped、無 tag，與 BTB.v 相同）與統計。
+    子類別提供 direction(pc) / train(pc, taken)；預測 taken 需要方向為 taken 且 BTB 有效，
+    與 RISCV_CPU.v 的 Predict_Taken = Predict && BTB_Valid 相同。
+    btb_jumps 為 True 時 JAL/JALR 也寫入 BTB，且 BTB 中的跳躍一律預測 taken
+    """
+
+    def __init__(self, name, btb_size, shift=2, btb_jumps=False):
+        self.name = name
+        self.btb_size = btb_size
+        self.shift = shift
+        self.btb_jumps = btb_jumps
+        self.btb = [None] * btb_size
+        self.btb_jump = [False] * btb_size
+        self.branches = 0
+        self.jumps = 0
+        self.taken = 0
+        self.mispredicts = 0
+        self.jump_mispredicts = 0
+        self.btb_hits = 0
+
+    def index(self, pc, size):
+        return (pc >> self.shift) & (size - 1)
+
+    def bits(self):
+        """儲存位元數：BTB 每項 PC_WIDTH + valid（btb_jumps 時另加一個 jump 位元）"""
+        return self.btb_size * (PC_WIDTH + 1 + (1 if self.btb_jumps else 0))
+
+    def direction(self, pc):
+        raise NotImplementedError
+
+    def train(self, pc, taken):
+        raise NotImplementedError
+
+    def predict(self, pc):
+        """回傳預測的下一個 PC（不 taken 時為 None）"""
+        idx = self.index(pc, self.btb_size)
+        target = self.btb[idx]
+        if target is None:
+            return None
+        return target if self.btb_jump[idx] or self.direction(pc) else None
+
+    def observe(self, b):
+        predicted = self.predict(b.pc)
+        idx = self.index(b.pc, self.btb_size)
+        # 目標為 PC + 4 時 IF 已經在正確的位址上（Control.v 不 flush）
+        fall = (b.pc + 4) & MASK
+        wrong = (predicted if predicted is not None else fall) != (b.target if b.taken else fall)
+
+        if b.kind == 'branch':
+            self.branches += 1
+            self.taken += b.taken
+            self.mispredicts += wrong
+            self.train(b.pc, b.taken)
+            if b.taken:
+                # BTB 命中率的分母為 taken 分支，JAL/JALR 的命中反映在 jump_mispredicts
+                self.btb_hits += self.btb[idx] == b.target
+                self.btb[idx] = b.target
+                self.btb_jump[idx] = False
+        else:
+            self.jumps += 1
+            self.jump_mispredicts += wrong
+            if self.btb_jumps:
+                self.btb[idx] = b.target
+                self.btb_jump[idx] = True
+
+    def result(self):
+        wrong = self.mispredicts + self.jump_mispredicts
+        return {
+            'branches': self.branches,
+            'taken_branches': self.taken,
+            'jumps': self.jumps,
+            'branch_mispredicts': self.mispredicts,
+            'jump_mispredicts': self.jump_mispredicts,
+            'btb_hits': self.btb_hits,
+            'flush_cycles': FLUSH_CYCLES * wrong,
+        }
+
+class StaticNotTaken(Predictor):
+    """不預測（永遠取 PC + 4）：沒有任何表格"""
+
+    def __init__(self):
+        super().__init__('not-taken', 0)
+
+    def bits(self):
+        return 0
+
+    def predict(self, pc):
+        return None
+
+    def observe(self, b):
+        if b.kind == 'branch':
+            self.branches += 1
+            self.taken += b.taken
+            self.mispredicts += b.taken and b.target != (b.pc + 4) & MASK
+        else:
+            self.jumps += 1
+            self.jump_mispredicts += b.target != (b.pc + 4) & MASK
+
+class Bimodal(Predictor):
+    """以 PC 索引的 2-bit 飽和計數器（BHT.v）；shift=0 即 RTL 的 PC[n-1:0] 索引"""
+
+    def __init__(self, bht_size=BHT_SIZE, btb_size=BTB_SIZE, shift=2, btb_jumps=False, name=None):
+        super().__init__(name or f"bimodal-{bht_size}", btb_size, shift, btb_jumps)
+        self.bht_size = bht_size
+        self.counters = [0] * bht_size
+
+    def bits(self):
+        return super().bits() + 2 * self.bht_size
+
+    def direction(self, pc):
+        return self.counters[self.index(pc, self.bht_size)] >= 2
+
+    def train(self, pc, taken):
+        idx = self.index(pc, self.bht_size)
+        c = self.counters[idx]
+        self.counters[idx] = min(c + 1, 3) if taken else max(c - 1, 0)
+
+class GShare(Predictor):
+    """全域歷史 XOR PC 索引的 2-bit 計數器"""
+
+    def __init__(self, bht_size, history_bits, btb_size=BTB_SIZE, name=None):
+        super().__init__(name or f"gshare-{bht_size}-h{history_bits}", btb_size)
+        self.bht_size = bht_size
+        self.history_bits = history_bits
+        self.history = 0
+        self.counters = [0] * bht_size
+
+    def bits(self):
+        return super().bits() + 2 * self.bht_size + self.history_bits
+
+    def slot(self, pc):
+        return ((pc >> self.shift) ^ self.history) & (self.bht_size - 1)
+
+    def direction(self, pc):
+        return self.counters[self.slot(pc)] >= 2
+
+    def train(self, pc, taken):
+        idx = self.slot(pc)
+        c = self.counters[idx]
+        self.counters[idx] = min(c + 1, 3) if taken else max(c - 1, 0)
+        self.history = ((self.history << 1) | taken) & ((1 << self.history_bits) - 1)
+
+class Tournament(Predictor):
+    """bimodal 與 gshare 並列，以 PC 索引的 2-bit 選擇器（>= 2 選 gshare）決定採用哪一個"""
+
+    def __init__(self, bht_size, history_bits, btb_size=BTB_SIZE, name=None):
+        super().__init__(name or f"tournament-{bht_size}-h{history_bits}", btb_size)
+        self.local = Bimodal(bht_size, 0)
+        self.gshare = GShare(bht_size, history_bits, 0)
+        self.chooser = [2] * bht_size
+
+    def bits(self):
+        return (super().bits() + self.local.bits() + self.gshare.bits()
+                + 2 * len(self.chooser))
+
+    def direction(self, pc):
+        if self.chooser[self.index(pc, len(self.chooser))] >= 2:
+            return self.gshare.direction(pc)
+        return self.local.direction(pc)
+
+    def train(self, pc, taken):
+        local_ok = self.local.direction(pc) == taken
+        global_ok = self.gshare.direction(pc) == taken
+        if local_ok != global_ok:
+            idx = self.index(pc, len(self.chooser))
+            c = self.chooser[idx]
+            self.chooser[idx] = min(c + 1, 3) if global_ok else max(c - 1, 0)
+        self.local.train(pc, taken)
+        self.gshare.train(pc, taken)
+
+def sweep_predictors():
+    """--sweep 評估的預測器組合（每個程式重新建立一次）"""
+    predictors = [StaticNotTaken(),
+                  Bimodal(BHT_SIZE, BTB_SIZE, shift=0, name='rtl (PC[5:0])')]
+    for size in (4, 16, 64, 256, 1024):
+        predictors.append(Bimodal(size, size))
+    for size in (16, 64, 256):
+        predictors.append(Bimodal(size, size, btb_jumps=True, name=f"bimodal-{size}+jumps"))
+    for size in (64, 256, 1024):
+        for history in (2, 4, 8):
+            if 1 << history <= size:
+                predictors.append(GShare(size, history, BTB_SIZE))
+    for size in (64, 256):
+        predictors.append(Tournament(size, size.bit_length() - 1, BTB_SIZE))
+    return predictors
+
+def rtl_stats(image, dm_image, im_size=4096, dm_size=32, max_cycles=100000):
+    """以 Pipeline_Model 取得與 RTL 相同的分支統計（含每週期更新 BHT 的效果）"""
+    result = pipeline.simulate(image, dm_image, im_size, dm_size, max_cycles)
+    return {
+        'branches': result['branches'],
+        'taken_branches': result['taken_branches'],
+        'jumps': result['jumps'],
+        'branch_mispredicts': result['branch_mispredicts'],
+        'btb_hits': result['btb_hits'],
+        'flush_cycles': result['stalls']['branch'] + result['stalls']['jump'],
+        'cycles': result['cycles'],
+    }
+
+def load_program(n, assembler, base_dir):
+    """組譯 Pattern/TestCase<n>.dat，回傳加上 ECALL 的指令記憶體內容（不存在時為 None）"""
+    path = os.path.join(base_dir, '..', 'Pattern', f'TestCase{n}.dat')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        records, _ = assembler.assemble(f.readlines())
+    return assembler.to_image(records) + pipeline.ECALL.to_bytes(4, 'big')
+
+def random_programs(seed, count, length=64):
+    """以 Pattern/Random_Gen.py 產生 count 個程式，回傳 [(名稱, 指令記憶體, 資料記憶體)]"""
+    random_gen = load_module("Random_Gen", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                        '..', 'Pattern', 'Random_Gen.py'))
+    programs = []
+    for s in range(seed, seed + count):
+        lines, dm = random_gen.generate(s, length)
+        records, _ = random_gen.assemble(lines)
+        programs.append((f"seed {s}", random_gen.to_image(records) + pipeline.ECALL.to_bytes(4, 'big'), dm))
+    return programs
+
+def ratio(a, b):
+    return f"{a / b:.1%}" if b else '-'
+
+# ============================================================================
+# 主程式
+# ============================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('testcases', nargs='*', type=int, default=list(range(1, 13)),
+                        help='TestCase 編號（預設 1-12）')
+    parser.add_argument('--sweep', action='store_true',
+                        help='一次走過分支流評估多種大小與預測方式，列出所有程式的總和')
+    parser.add_argument('--random', type=int, default=0, metavar='N',
+                        help='另外加入 N 個 Random_Gen 產生的程式（迴圈較多，分支樣本較足）')
+    parser.add_argument('--seed', type=int, default=1, help='--random 的第一個 seed（預設 1）')
+    args = parser.parse_args()
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    assembler = load_module("Instr_Transfer", os.path.join(base_dir, '..', 'Pattern', 'Instr_Transfer.py'))
+    dm_image = golden.read_hex_bytes(os.path.join(base_dir, 'DM.dat'))
+
+    programs = []
+    for n in args.testcases:
+        image = load_program(n, assembler, base_dir)
+        if image is not None:
+            programs.append((f"TestCase{n}", image, dm_image))
+    if args.random:
+        programs += random_programs(args.seed, args.random)
+
+    if not args.sweep:
+        print(f"{'Program':<12}{'Branch':>7}{'Taken':>7}{'Jump':>6}{'Mispred':>9}{'Acc':>8}"
+              f"{'BTB hit':>9}{'Flush':>7}{'Cycles':>8}")
+        for name, image, dm in programs:
+            try:
+                r = rtl_stats(image, dm)
+            except pipeline.ModelError as e:
+                print(f"{name:<12}  model error: {e}")
+                continue
+            print(f"{name:<12}{r['branches']:>7}{r['taken_branches']:>7}{r['jumps']:>6}"
+                  f"{r['branch_mispredicts']:>9}{ratio(r['branches'] - r['branch_mispredicts'], r['branches']):>8}"
+                  f"{ratio(r['btb_hits'], r['taken_branches']):>9}{r['flush_cycles']:>7}{r['cycles']:>8}")
+    else:
+        totals = {}
+        names = []
+        for _, image, dm in programs:
+            m = golden.Machine(im_size=4096, dm_size=32)
+            m.load_im_bytes(image)
+            m.load_dm_bytes(dm)
+            trace, _ = branch_trace(m)
+            predictors = sweep_predictors()
+            for b in trace:
+                for p in predictors:
+                    p.observe(b)
+            for p in predictors:
+                if p.name not in totals:
+                    names.append(p.name)
+                    totals[p.name] = dict.fromkeys(p.result(), 0)
+                    totals[p.name]['bits'] = p.bits()
+                for k, v in p.result().items():
+                    totals[p.name][k] += v
+
+        print(f"{'Predictor':<22}{'Bits':>8}{'Branch':>8}{'Mispred':>9}{'Acc':>8}{'BTB hit':>9}"
+              f"{'Jump miss':>11}{'Flush':>7}")
+        for name in names:
+            t = totals[name]
+            print(f"{name:<22}{t['bits']:>8}{t['branches']:>8}{t['branch_mispredicts']:>9}"
+                  f"{ratio(t['branches'] - t['branch_mispredicts'], t['branches']):>8}"
+                  f"{ratio(t['btb_hits'], t['taken_branches']):>9}"
+                  f"{t['jump_mispredicts']:>11}{t['flush_cycles']:>7}")
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+I-Cache / D-Cache 模擬器（以位址流驅動）
+以 Golden_Result.Machine 執行程式，收集取指位址與 Load/Store 位址，重現 I_Cache.v / D_Cache.v 的策略：
+  - set-associative、LRU（命中時 LRU[INDEX] <= ~HIT_WAY）
+  - 替換：有空的 way 時 VICTIM_WAY <= !VALID_ARRAY[0][INDEX]，否則依 LRU。
+    way 0 無效時選到 way 1，因此 way 0 永遠不會被填入，2-way 實際上等同 direct-mapped（victim='rtl'）；
+    victim='lru' 為原本設計的「先填空的 way」
+  - D-Cache：讀 miss 補齊整條 cache line；寫入為 write-through、no-write-allocate（命中時更新資料與 LRU）
+輸出命中率、補齊次數、AXI 讀/寫 beat 數與估計的 stall 週期數。
+
+--sweep 時只收集一次位址流，接著在同一份位址流上評估數十種 (way, set, block) 組合。
+位址流只含正確路徑的存取；錯誤路徑上的取指（預測錯誤、I-Cache miss 時重複送出）由 Pipeline_Model 模擬，
+直接執行時會一併列出 Pipeline_Model 的 miss 次數作為對照。
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import Golden_Result as golden
+import Pipeline_Model as pipeline
+import Branch_Predictor as predictor
+from Verify_Script import load_module
+
+MASK = 0xFFFFFFFF
+ADDR_WIDTH = 32
+
+# RTL/SYSTEM_DEF.vh
+WAY = pipeline.WAY
+SET_NUM = pipeline.SET_NUM
+BLOCK_WORD_SIZE = pipeline.BLOCK_WORD_SIZE
+
+# Stall 估計：miss 時 CMP 一個週期，之後每個 word 為 MREQ + R_PENDING + R_VALID 三個週期；
+# store 為 WRITE → WRITE_WAIT × 2（與 Pipeline_Model.STORE_CYCLES 相同）
+STORE_CYCLES = pipeline.STORE_CYCLES
+
+def miss_cycles(block_words):
+    """一次讀 miss 的 stall 週期數"""
+    return 3 * block_words + 1
+
+# ============================================================================
+# 位址流
+# ============================================================================
+
+def address_trace(machine, max_steps=100000):
+    """
+    逐指令執行 machine，回傳 (取指位址, 資料存取)。
+    資料存取為 (位址, 是否為 store) 的 list
+    """
+    m = machine
+    if len(m.decoded_table) != len(m.instruction_memory) >> 2:
+        m.predecode()
+    fetches = []
+    data = []
+    while len(fetches) < max_steps:
+        pc = m.pc
+        if pc >= len(m.instruction_memory) - 3:
+            break
+        d = m.lookup(pc)
+        addr = (m.registers[d.rs1] + d.imm) & MASK
+        fetches.append(pc)
+        if not m.step():
+            break
+        if d.opcode in (0x03, 0x23):
+            data.append((addr, d.opcode == 0x23))
+        if d.opcode == 0x73:
+            break
+    return fetches, data
+
+# ============================================================================
+# Cache
+# ============================================================================
+
+class Cache:
+    """
+    只保存每個 set 內各 block 的 LRU 順序（最近使用的在前），不保存資料。
+    victim='rtl' 且為 2-way 時每個 set 只用得到一個 way（見模組說明）
+    """
+
+    def __init__(self, ways=WAY, sets=SET_NUM, block_words=BLOCK_WORD_SIZE, victim='lru'):
+        self.ways = ways
+        self.num_sets = sets
+        self.block_words = block_words
+        self.victim = victim
+        self.capacity = 1 if victim == 'rtl' and ways == 2 else ways
+        self.offset_bits = (block_words * 4).bit_length() - 1
+        self.sets = [[] for _ in range(sets)]
+        self.reads = 0
+        self.read_hits = 0
+        self.writes = 0
+        self.write_hits = 0
+        self.refills = 0
+
+    @property
+    def name(self):
+        return f"{self.ways}w x {self.num_sets}s x {self.block_words}w"
+
+    def data_bytes(self):
+        return self.ways * self.num_sets * self.block_words * 4
+
+    def tag_bits(self):
+        """tag + valid 位元數（另有每個 set 的 LRU 狀態）"""
+        index_bits = self.num_sets.bit_length() - 1
+        return self.ways * self.num_sets * (ADDR_WIDTH - index_bits - self.offset_bits + 1)
+
+    def probe(self, block):
+        """查詢並更新 LRU，回傳是否命中"""
+        s = self.sets[block % self.num_sets]
+        if block in s:
+            if s[0] != block:
+                s.remove(block)
+                s.insert(0, block)
+            return True
+        return False
+
+    def read(self, addr, repeat=1):
+        """讀取（取指或 Load）；repeat 為連續存取同一個 block 的次數，第一次以外必定命中"""
+        block = addr >> self.offset_bits
+        self.reads += repeat
+        if self.probe(block):
+            self.read_hits += repeat
+            return True
+        self.read_hits += repeat - 1
+        self.refills += 1
+        s = self.sets[block % self.num_sets]
+        s.insert(0, block)
+        if len(s) > self.capacity:
+            s.pop()
+        return False
+
+    def write(self, addr):
+        """Store：write-through、no-write-allocate"""
+        self.writes += 1
+        hit = self.probe(addr >> self.offset_bits)
+        self.write_hits += hit
+        return hit
+
+    def result(self):
+        return {
+            'reads': self.reads,
+            'read_hits': self.read_hits,
+            'writes': self.writes,
+            'write_hits': self.write_hits,
+            'refills': self.refills,
+            'read_beats': self.refills * self.block_words,
+            'write_beats': self.writes,
+            'stall_cycles': self.refills * miss_cycles(self.block_words) + self.writes * STORE_CYCLES,
+        }
+
+def runs(addresses, offset_bits):
+    """把連續落在同一個 block 的存取合併為 (位址, 次數)"""
+    out = []
+    last = None
+    for addr in addresses:
+        block = addr >> offset_bits
+        if block == last:
+            out[-1][1] += 1
+        else:
+            out.append([addr, 1])
+            last = block
+    return out
+
+def simulate(fetches, data, icaches, dcaches):
+    """把同一份位址流送入所有 I-Cache / D-Cache 設定"""
+    by_offset = {}
+    for c in icaches:
+        if c.offset_bits not in by_offset:
+            by_offset[c.offset_bits] = runs(fetches, c.offset_bits)
+        for addr, repeat in by_offset[c.offset_bits]:
+            c.read(addr, repeat)
+    for addr, store in data:
+        for c in dcaches:
+            if store:
+                c.write(addr)
+            else:
+                c.read(addr)
+
+def sweep_geometries():
+    """--sweep 評估的 (way, set, block_words) 組合"""
+    return [(ways, sets, block)
+            for ways in (1, 2, 4)
+            for sets in (16, 64, 256)
+            for block in (4, 8, 16)]
+
+def ratio(a, b):
+    return f"{a / b:.1%}" if b else '-'
+
+# ============================================================================
+# 主程式
+# ============================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('testcases', nargs='*', type=int, default=list(range(1, 13)),
+                        help='TestCase 編號（預設 1-12）')
+    parser.add_argument('--sweep', action='store_true',
+                        help='在同一份位址流上評估多種 cache 組態，列出所有程式的總和')
+    parser.add_argument('--random', type=int, default=0, metavar='N',
+                        help='另外加入 N 個 Random_Gen 產生的程式')
+    parser.add_argument('--seed', type=int, default=1, help='--random 的第一個 seed（預設 1）')
+    args = parser.parse_args()
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    assembler = load_module("Instr_Transfer", os.path.join(base_dir, '..', 'Pattern', 'Instr_Transfer.py'))
+    dm_image = golden.read_hex_bytes(os.path.join(base_dir, 'DM.dat'))
+
+    programs = []
+    for n in args.testcases:
+        image = predictor.load_program(n, assembler, base_dir)
+        if image is not None:
+            programs.append((f"TestCase{n}", image, dm_image))
+    if args.random:
+        programs += predictor.random_programs(args.seed, args.random)
+
+    def trace_of(image, dm):
+        m = golden.Machine(im_size=4096, dm_size=32)
+        m.load_im_bytes(image)
+        m.load_dm_bytes(dm)
+        return address_trace(m)
+
+    if not args.sweep:
+        print(f"{'Program':<12}{'Fetch':>7}{'I-hit':>8}{'I-fill':>7}{'Load':>6}{'Store':>6}{'D-hit':>8}"
+              f"{'D-fill':>7}{'R beat':>7}{'W beat':>7}{'Stall':>7}  {'Model I/D miss':>14}")
+        for name, image, dm in programs:
+            fetches, data = trace_of(image, dm)
+            icache = Cache(victim='rtl')
+            dcache = Cache(victim='rtl')
+            simulate(fetches, data, [icache], [dcache])
+            i, d = icache.result(), dcache.result()
+            try:
+                r = pipeline.simulate(image, dm)
+                model = f"{r['icache_misses']}/{r['dcache_load_misses']}"
+            except pipeline.ModelError:
+                model = 'error'
+            print(f"{name:<12}{i['reads']:>7}{ratio(i['read_hits'], i['reads']):>8}{i['refills']:>7}"
+                  f"{d['reads']:>6}{d['writes']:>6}{ratio(d['read_hits'], d['reads']):>8}{d['refills']:>7}"
+                  f"{i['read_beats'] + d['read_beats']:>7}{d['write_beats']:>7}"
+                  f"{i['stall_cycles'] + d['stall_cycles']:>7}  {model:>14}")
+    else:
+        configs = [('rtl', WAY, SET_NUM, BLOCK_WORD_SIZE)] + [('lru',) + g for g in sweep_geometries()]
+        totals = [dict(i={}, d={}) for _ in configs]
+        for name, image, dm in programs:
+            fetches, data = trace_of(image, dm)
+            icaches = [Cache(ways, sets, block, victim) for victim, ways, sets, block in configs]
+            dcaches = [Cache(ways, sets, block, victim) for victim, ways, sets, block in configs]
+            simulate(fetches, data, icaches, dcaches)
+            for t, ic, dc in zip(totals, icaches, dcaches):
+                for key, c in (('i', ic), ('d', dc)):
+                    for k, v in c.result().items():
+                        t[key][k] = t[key].get(k, 0) + v
+
+        print(f"{'Config':<22}{'Bytes':>7}{'Tag bits':>9}{'I-hit':>8}{'I-fill':>8}{'I-stall':>9}"
+              f"{'D-hit':>8}{'D-fill':>8}{'D-stall':>9}{'Stall':>9}")
+        for (victim, ways, sets, block), t in zip(configs, totals):
+            c = Cache(ways, sets, block, victim)
+            label = c.name + (' (rtl)' if victim == 'rtl' else '')
+            i, d = t['i'], t['d']
+            print(f"{label:<22}{c.data_bytes():>7}{c.tag_bits():>9}"
+                  f"{ratio(i['read_hits'], i['reads']):>8}{i['refills']:>8}{i['stall_cycles']:>9}"
+                  f"{ratio(d['read_hits'], d['reads']):>8}{d['refills']:>8}{d['stall_cycles']:>9}"
+                  f"{i['stall_cycles'] + d['stall_cycles']:>9}")
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+RISC-V RV32I + RV32M 批次 Golden Model（NumPy 向量化）
+N 個程式同步（lockstep）執行：暫存器為 (N, 32) uint32 陣列，PC、指令與資料記憶體
+也以陣列保存；每一步讓所有仍在執行的程式各完成一道指令，ALU/Branch/Load/Store
+依 opcode 分組一次算完。語意與 Golden_Result.Machine 逐位元相同，
+用於隨機程式 fuzzing 時一次產生大量 golden 結果。需要 NumPy。
+
+直接執行時以 TestCase1-12 與 Golden_Result.Machine 逐一比對並回報吞吐量。
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import Golden_Result as golden
+from Verify_Script import load_module
+
+MASK = 0xFFFFFFFF
+
+# ============================================================================
+# 向量化輔助函式（輸入輸出皆為 int64 陣列，數值保持在 32-bit 無號範圍）
+# ============================================================================
+
+def to_signed(x):
+    """32-bit 無號轉有號"""
+    return (x ^ 0x80000000) - 0x80000000
+
+def sign_extend(x, bits):
+    """符號擴展，結果與 Golden_Result.sign_extend 相同（32-bit 無號表示）"""
+    sign_bit = 1 << (bits - 1)
+    return ((x ^ sign_bit) - sign_bit) & MASK
+
+def imm_i(inst):
+    return sign_extend((inst >> 20) & 0xFFF, 12)
+
+def imm_s(inst):
+    return sign_extend((((inst >> 25) & 0x7F) << 5) | ((inst >> 7) & 0x1F), 12)
+
+def imm_b(inst):
+    return sign_extend((((inst >> 31) & 1) << 12) |
+                       (((inst >> 7) & 1) << 11) |
+                       (((inst >> 25) & 0x3F) << 5) |
+                       (((inst >> 8) & 0xF) << 1), 13)
+
+def imm_j(inst):
+    return sign_extend((((inst >> 31) & 1) << 20) |
+                       (((inst >> 12) & 0xFF) << 12) |
+                       (((inst >> 20) & 1) << 11) |
+                       (((inst >> 21) & 0x3FF) << 1), 21)
+
+def alu(funct3, a, b, shamt, alt):
+    """RV32I ALU：funct3 選擇運算，alt 為 SUB/SRA（R-Type funct7 = 0x20 或 SRAI）"""
+    sa = to_signed(a)
+    return np.select(
+        [funct3 == 0, funct3 == 1, funct3 == 2, funct3 == 3,
+         funct3 == 4, funct3 == 5, funct3 == 6],
+        [np.where(alt, a - b, a + b) & MASK,
+         (a << shamt) & MASK,
+         (sa < to_signed(b)).astype(np.int64),
+         (a < b).astype(np.int64),
+         a ^ b,
+         np.where(alt, (sa >> shamt) & MASK, a >> shamt),
+         a | b],
+        a & b)
+
+def muldiv(funct3, a, b):
+    """RV32M：除以零與溢位的結果同 Golden_Result（商 -1、餘數為被除數；溢位商為最小負數、餘數 0）"""
+    sa = to_signed(a)
+    sb = to_signed(b)
+    # 除數為 0 時先以 1 代入，再由 np.where 換成規定值
+    sdiv = np.where(sb == 0, 1, sb)
+    udiv = np.where(b == 0, 1, b)
+    # 向零取整（NumPy 的 // 為 floor）
+    quotient = np.where((sa < 0) != (sdiv < 0), -1, 1) * (np.abs(sa) // np.abs(sdiv))
+    mulhu = (a.astype(np.uint64) * b.astype(np.uint64)) >> np.uint64(32)
+    return np.select(
+        [funct3 == 0, funct3 == 1, funct3 == 2, funct3 == 3,
+         funct3 == 4, funct3 == 5, funct3 == 6],
+        [(sa * sb) & MASK,
+         ((sa * sb) >> 32) & MASK,
+         ((sa * b) >> 32) & MASK,
+         mulhu.astype(np.int64),
+         np.where(sb == 0, MASK, quotient & MASK),
+         np.where(b == 0, MASK, a // udiv),
+         np.where(sb == 0, a, (sa - quotient * sdiv) & MASK)],
+        np.where(b == 0, a, a % udiv))
+
+# Load/Store 寬度（以 funct3 為索引，0 表示未定義）
+LOAD_WIDTH = np.array([1, 2, 4, 0, 1, 2, 0, 0], dtype=np.int64)
+STORE_WIDTH = np.array([1, 2, 4, 0, 0, 0, 0, 0], dtype=np.int64)
+BYTE_OFFSETS = np.arange(4, dtype=np.int64)
+
+# ============================================================================
+# 批次模擬器
+# ============================================================================
+
+class BatchMachine:
+    """n 個獨立 hart 的 RV32IM 模擬器，以陣列同步執行"""
+
+    def __init__(self, n, im_size=256, dm_size=32):
+        self.n = n
+        self.instruction_memory = np.zeros((n, im_size), dtype=np.uint8)
+        self.data_memory = np.zeros((n, dm_size), dtype=np.uint8)
+        self.registers = np.zeros((n, 32), dtype=np.uint32)   # x0-x31
+        self.pc = np.zeros(n, dtype=np.int64)
+
+    def reset(self):
+        """清除所有程式的暫存器、PC 與資料記憶體；保留指令記憶體"""
+        self.registers[:] = 0
+        self.pc[:] = 0
+        self.data_memory[:] = 0
+
+    # ------------------------------------------------------------------------
+    # 記憶體載入
+    # ------------------------------------------------------------------------
+
+    @staticmethod
+    def fill(row, data, base):
+        """將 data 放到 row[base:]，其餘清為 0，超出容量的部分捨棄"""
+        base = min(base, len(row))
+        n = min(len(data), len(row) - base)
+        row[:] = 0
+        row[base:base + n] = np.frombuffer(data, dtype=np.uint8, count=n)
+
+    def load_im_bytes(self, i, data, base=0):
+        """載入第 i 個程式的指令記憶體（大端序位元組，自位址 base 起），超出容量的部分捨棄"""
+        self.fill(self.instruction_memory[i], data, base)
+
+    def load_dm_bytes(self, i, data, base=0):
+        """載入第 i 個程式的資料記憶體（小端序位元組，自位址 base 起），超出容量的部分捨棄"""
+        self.fill(self.data_memory[i], data, base)
+
+    def load_im(self, i, filename='IM.dat'):
+        """讀取第 i 個程式的指令記憶體檔（.dat 或二進位映像檔）"""
+        base, data = golden.read_memory_file(filename, big_endian=True)
+        self.load_im_bytes(i, data, base)
+
+    def load_dm(self, i, filename='DM.dat'):
+        """讀取第 i 個程式的資料記憶體檔（.dat 或二進位映像檔）"""
+        base, data = golden.read_memory_file(filename, big_endian=False)
+        self.load_dm_bytes(i, data, base)
+
+    # ------------------------------------------------------------------------
+    # Fetch
+    # ------------------------------------------------------------------------
+
+    def fetch(self, idx, pc):
+        """讀取程式 idx 在 pc 處的 32-bit 指令（大端序，允許未對齊）"""
+        b = self.instruction_memory[idx[:, None], pc[:, None] + BYTE_OFFSETS].astype(np.int64)
+        return (b[:, 0] << 24) | (b[:, 1] << 16) | (b[:, 2] << 8) | b[:, 3]
+
+    def halted(self):
+        """每個程式是否已結束（同 Machine.halted：ECALL/EBREAK、結束字或 PC 越界）"""
+        limit = self.instruction_memory.shape[1] - 3
+        done = self.pc >= limit
+        idx = np.nonzero(~done)[0]
+        done[idx] = self.fetch(idx, self.pc[idx]) == 0
+        return done
+
+    # ------------------------------------------------------------------------
+    # 主循環
+    # ------------------------------------------------------------------------
+
+    def execute(self, idx):
+        """
+        讓程式 idx 各執行一道指令。
+        回傳與 idx 等長的布林陣列：True 表示該程式已結束（結束字或 PC 越界），本步未執行。
+        """
+        limit = self.instruction_memory.shape[1] - 3
+        pc = self.pc[idx]
+        stop = pc >= limit
+        inst = np.zeros(idx.size, dtype=np.int64)
+        inst[~stop] = self.fetch(idx[~stop], pc[~stop])
+        stop |= (inst == 0) | (pc >= 0xFFFFFF00)
+
+        run = ~stop
+        idx, pc, inst = idx[run], pc[run], inst[run]
+
+        # Decode
+        opcode = inst & 0x7F
+        rd = (inst >> 7) & 0x1F
+        funct3 = (inst >> 12) & 0x7
+        rs1 = (inst >> 15) & 0x1F
+        rs2 = (inst >> 20) & 0x1F
+        funct7 = (inst >> 25) & 0x7F
+
+        R = self.registers
+        M = self.data_memory
+        L = M.shape[1]
+        a = R[idx, rs1].astype(np.int64)
+        b = R[idx, rs2].astype(np.int64)
+
+        value = np.zeros(idx.size, dtype=np.int64)
+        write = np.zeros(idx.size, dtype=bool)
+        next_pc = pc + 4   # 未知指令同 exec_skip
+
+        # R-Type (RV32I + RV32M)
+        s = np.nonzero(opcode == 0x33)[0]
+        if s.size:
+            f3 = funct3[s]
+            value[s] = np.where(funct7[s] == 0x01,
+                                muldiv(f3, a[s], b[s]),
+                                alu(f3, a[s], b[s], b[s] & 0x1F, funct7[s] == 0x20))
+            write[s] = True
+
+        # I-Type ALU
+        s = np.nonzero(opcode == 0x13)[0]
+        if s.size:
+            f3 = funct3[s]
+            imm = imm_i(inst[s])
+            value[s] = alu(f3, a[s], imm, imm & 0x1F, (f3 == 0b101) & (((imm >> 10) & 1) == 1))
+            write[s] = True
+
+        # Load（小端序）：位址越界時不寫回，跨越結尾時寫回 0
+        s = np.nonzero(opcode == 0x03)[0]
+        if s.size:
+            f3 = funct3[s]
+            addr = (a[s] + imm_i(inst[s])) & MASK
+            width = LOAD_WIDTH[f3]
+            in_range = addr < L
+            offsets = np.minimum(np.where(in_range, addr, 0)[:, None] + BYTE_OFFSETS, L - 1)
+            m = M[idx[s, None], offsets].astype(np.int64)
+            half = m[:, 0] | (m[:, 1] << 8)
+            word = half | (m[:, 2] << 16) | (m[:, 3] << 24)
+            loaded = np.select(
+                [f3 == 0, f3 == 1, f3 == 2, f3 == 4, f3 == 5],
+                [sign_extend(m[:, 0], 8), sign_extend(half, 16), word, m[:, 0], half],
+                0)
+            value[s] = np.where(addr + width - 1 < L, loaded, 0)
+            write[s] = in_range
+
+        # Store（小端序）：整個寫入範圍都在資料記憶體內才寫
+        s = np.nonzero(opcode == 0x23)[0]
+        if s.size:
+            addr = (a[s] + imm_s(inst[s])) & MASK
+            width = STORE_WIDTH[funct3[s]]
+            ok = (width > 0) & (addr + width - 1 < L)
+            data = b[s]
+            for k in range(4):
+                w = ok & (width > k)
+                M[idx[s][w], addr[w] + k] = (data[w] >> (8 * k)) & 0xFF
+
+        # Branch（funct3 = 2, 3 未定義，視為不跳）
+        s = np.nonzero(opcode == 0x63)[0]
+        if s.size:
+            f3 = funct3[s]
+            x, y = a[s], b[s]
+            taken = np.select(
+                [f3 == 0, f3 == 1, f3 == 4, f3 == 5, f3 == 6, f3 == 7],
+                [x == y, x != y, to_signed(x) < to_signed(y), to_signed(x) >= to_signed(y), x < y, x >= y],
+                False)
+            next_pc[s] = np.where(taken, (pc[s] + imm_b(inst[s])) & MASK, next_pc[s])
+
+        # LUI / AUIPC
+        s = np.nonzero(opcode == 0x37)[0]
+        value[s] = inst[s] & 0xFFFFF000
+        write[s] = True
+        s = np.nonzero(opcode == 0x17)[0]
+        value[s] = (pc[s] + (inst[s] & 0xFFFFF000)) & MASK
+        write[s] = True
+
+        # JAL / JALR
+        s = np.nonzero(opcode == 0x6F)[0]
+        value[s] = (pc[s] + 4) & MASK
+        write[s] = True
+        next_pc[s] = (pc[s] + imm_j(inst[s])) & MASK
+        s = np.nonzero(opcode == 0x67)[0]
+        value[s] = (pc[s] + 4) & MASK
+        write[s] = True
+        next_pc[s] = (a[s] + imm_i(inst[s])) & 0xFFFFFFFE
+
+        # CSR/System（ECALL/EBREAK）：停止執行
+        next_pc[opcode == 0x73] = 0xFFFFFFFF
+
+        # Write back（x0 恆為 0）
+        w = write & (rd != 0)
+        R[idx[w], rd[w]] = value[w]
+        self.pc[idx] = next_pc
+
+        return stop
+
+    def step(self):
+        """所有尚未結束的程式各執行一道指令，回傳本步實際執行的程式數"""
+        idx = np.nonzero(~self.halted())[0]
+        return int(np.count_nonzero(~self.execute(idx)))
+
+    def run(self, max_steps=10000):
+        """同步執行所有程式直到各自結束或達到 max_steps，回傳每個程式執行的指令數"""
+        steps = np.zeros(self.n, dtype=np.int64)
+        live = np.ones(self.n, dtype=bool)
+        for _ in range(max_steps):
+            idx = np.nonzero(live)[0]
+            if not idx.size:
+                break
+            stop = self.execute(idx)
+            live[idx[stop]] = False
+            steps[idx[~stop]] += 1
+        return steps
+
+    # ------------------------------------------------------------------------
+    # 輸出 Golden 檔案
+    # ------------------------------------------------------------------------
+
+    def machine(self, i):
+        """以第 i 個程式的暫存器、PC 與資料記憶體建立 Golden_Result.Machine（指令記憶體一併複製）"""
+        m = golden.Machine(im_size=self.instruction_memory.shape[1], dm_size=self.data_memory.shape[1])
+        m.load_im_bytes(self.instruction_memory[i].tobytes())
+        m.load_dm_bytes(self.data_memory[i].tobytes())
+        m.registers[:] = [int(x) for x in self.registers[i]]
+        m.pc = int(self.pc[i])
+        return m
+
+    def save_golden(self, i, rf_path='RF.golden', dm_path='DM.golden', binary=False):
+        """產生第 i 個程式的 RF.golden 和 DM.golden（格式與 binary 同 Machine.save_golden）"""
+        self.machine(i).save_golden(rf_path, dm_path, binary)
+
+# ============================================================================
+# 主程式：與 Golden_Result.Machine 比對並量測吞吐量
+# ============================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--copies', type=int, default=1000,
+                        help='每個 TestCase 在批次中的份數（預設 1000）')
+    parser.add_argument('--max-steps', type=int, default=10000,
+                        help='每個程式的指令數上限（預設 10000）')
+    args = parser.parse_args()
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    assembler = load_module("Instr_Transfer", os.path.join(base_dir, '..', 'Pattern', 'Instr_Transfer.py'))
+    dm_image = golden.read_hex_bytes(os.path.join(base_dir, 'DM.dat'))
+    ecall = (0x00000073).to_bytes(4, 'big')
+
+    images = []
+    for i in range(1, 13):
+        path = os.path.join(base_dir, '..', 'Pattern', f'TestCase{i}.dat')
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                records, _ = assembler.assemble(f.readlines())
+            images.append((f'TestCase{i}', assembler.to_image(records) + ecall))
+    programs = images * args.copies
+
+    print("=" * 60)
+    print("Golden_Batch.py vs Golden_Result.py")
+    print("=" * 60)
+
+    # 逐程式的純量模型（每個程式各自建立 Machine，與 fuzzing 的使用方式相同）
+    start = time.perf_counter()
+    scalar = []
+    for _, image in programs:
+        m = golden.Machine()
+        m.load_im_bytes(image)
+        m.load_dm_bytes(dm_image)
+        steps = m.run(args.max_steps)
+        scalar.append((steps, m))
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = BatchMachine(len(programs))
+    for i, (_, image) in enumerate(programs):
+        batch.load_im_bytes(i, image)
+        batch.load_dm_bytes(i, dm_image)
+    batch_steps = batch.run(args.max_steps)
+    batch_time = time.perf_counter() - start
+
+    mismatches = 0
+    for i, (name, _) in enumerate(programs):
+        steps, m = scalar[i]
+        same = (steps == batch_steps[i] and m.pc == batch.pc[i]
+                and m.registers == batch.registers[i].tolist()
+                and bytes(m.data_memory) == batch.data_memory[i].tobytes())
+        if not same:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"  MISMATCH: {name} (program {i})")
+
+    total = int(batch_steps.sum())
+    print(f"  Programs     : {len(programs)} ({len(images)} TestCases x {args.copies})")
+    print(f"  Instructions : {total}")
+    print(f"  Scalar       : {scalar_time:8.3f} s  {len(programs) / scalar_time:12,.0f} programs/s")
+    print(f"  Batch        : {batch_time:8.3f} s  {len(programs) / batch_time:12,.0f} programs/s"
+          f"  ({scalar_time / batch_time:.1f}x)")
+    if mismatches:
+        print(f"  {mismatches} program(s) differ from Golden_Result.Machine")
+        raise SystemExit(1)
+    print("  All results match Golden_Result.Machine bit-for-bit")
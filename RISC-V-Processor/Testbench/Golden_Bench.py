@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Golden_Result.py 效能量測
+比較「原本的 if/elif 派送」（git 歷史中的 Golden_Result.py）、「每步重新 fetch/decode/解析 handler」、
+「預解碼 + 綁定 handler」與「基本區塊轉譯」四種執行方式，以 TestCase1-12 及一個約一百萬指令的
+合成迴圈回報每秒指令數；
+另以 16 KiB 陣列的記憶體 kernel 比較 bytearray 與 PagedMemory 兩種資料記憶體，
+並比較以 .dat 與二進位映像檔 (.bin) 載入數 MB 指令記憶體所需的時間，
+以及開啟執行剖析 (run(profile=...)) 的額外成本與檢查點的存檔/還原時間
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import Golden_Result as golden
+from Verify_Script import load_module
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PATTERN_DIR = os.path.join(BASE_DIR, '..', 'Pattern')
+
+# 合成迴圈：每次迭代 8 道指令，LUI x2, 0x20 => 131072 次迭代
+SYNTHETIC_LOOP = """
+ADDI x1, x0, 0
+LUI x2, {iters_hi}
+ADDI x5, x0, 7
+loop:
+ADDI x1, x1, 1
+ADD x3, x3, x1
+MUL x4, x3, x5
+XOR x6, x6, x4
+SW x6, 0(x0)
+LW x7, 0(x0)
+DIVU x8, x7, x5
+BNE x1, x2, loop
+"""
+
+# 記憶體 kernel：在 0x10000 起的 16 KiB 陣列上交替填值與加總，每輪約 4 萬道指令
+MEMORY_KERNEL = """
+LUI x10, 0x10
+LUI x2, 0x4
+ADDI x9, x0, {passes}
+outer:
+ADDI x1, x0, 0
+fill:
+ADD x3, x10, x1
+SW x1, 0(x3)
+ADDI x1, x1, 4
+BNE x1, x2, fill
+ADDI x1, x0, 0
+sum:
+ADD x3, x10, x1
+LW x4, 0(x3)
+ADD x5, x5, x4
+LBU x6, 1(x3)
+ADDI x1, x1, 4
+BNE x1, x2, sum
+ADDI x9, x9, -1
+BNE x9, x0, outer
+"""
+MEMORY_MACHINES = (
+    ('Memory (flat)', dict(dm_size=0x14000)),
+    ('Memory (paged)', dict(regions=((0x10000, 0x4000),))),
+)
+
+def assemble_to_im(assembler, machine, source_path):
+    """組譯 source_path 並載入 machine 的指令記憶體"""
+    fd, im_path = tempfile.mkstemp(suffix='.dat')
+    os.close(fd)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            assembler.convert_instructions(source_path, im_path)
+        machine.load_im(im_path)
+    finally:
+        os.remove(im_path)
+
+# 改為 handler 表之前的 Golden_Result.py：量測時以 git show 從這個 commit 取出，不另存副本
+BASELINE_COMMIT = '9bfabfaeaf9f3db7e416dfc9bab1f8b709e015a6'
+baseline = None
+
+def load_baseline():
+    """將 BASELINE_COMMIT 的 Golden_Result.py 載入為模組；沒有 git 或該 commit 時回傳 None"""
+    try:
+        source = subprocess.run(['git', 'show', f'{BASELINE_COMMIT}:./Golden_Result.py'], cwd=BASE_DIR,
+                                capture_output=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    module = types.ModuleType('Golden_Baseline')
+    exec(compile(source, f'{BASELINE_COMMIT[:7]}:Golden_Result.py', 'exec'), module.__dict__)
+    return module
+
+def run_if_elif(machine, max_steps):
+    """
+    改為 handler 表之前的主循環（baseline.run）：每道指令 fetch、decode 成 dict，
+    再依 opcode 與 funct3/funct7 的 if/elif 鏈執行。PagedMemory 時以涵蓋各區域的 bytearray 代替
+    """
+    baseline.instruction_memory = machine.instruction_memory
+    if machine.paged:
+        baseline.data_memory = bytearray(max(end for _, end in machine.data_memory.regions))
+    else:
+        baseline.data_memory = machine.data_memory
+    baseline.registers = machine.registers
+    baseline.pc = machine.pc
+    steps = baseline.run(max_steps)
+    machine.pc = baseline.pc
+    return steps
+
+def run_decode_per_step(machine, max_steps):
+    """舊式主循環：每道指令都重新 fetch、decode 並解析 handler"""
+    steps = 0
+    while steps < max_steps and machine.pc < len(machine.instruction_memory) - 3:
+        decoded = machine.decode_at(machine.pc)
+        if decoded.raw == 0 or machine.pc >= 0xFFFFFF00:
+            break
+        decoded.handler(machine, decoded)
+        steps += 1
+    return steps
+
+RUNNERS = (run_if_elif, run_decode_per_step, golden.Machine.interpret, golden.Machine.run)
+
+def measure_all(machine, dm_image, max_steps, repeat):
+    """依 RUNNERS 的順序量測；取不到 baseline 時 if/elif 一欄為 None"""
+    return [measure(runner, machine, dm_image, max_steps, repeat) if baseline or runner is not run_if_elif else None
+            for runner in RUNNERS]
+
+def measure(runner, machine, dm_image, max_steps, repeat):
+    """執行 repeat 次，回傳 (總指令數, 秒數)"""
+    total = 0
+    elapsed = 0.0
+    for _ in range(repeat):
+        machine.reset()
+        machine.load_dm_bytes(dm_image)
+        start = time.perf_counter()
+        total += runner(machine, max_steps)
+        elapsed += time.perf_counter() - start
+    return total, elapsed
+
+def measure_profile(machine, dm_image, max_steps):
+    """回傳 (一般執行秒數, 剖析執行秒數)；兩者的指令數須相同"""
+    plain, plain_elapsed = measure(golden.Machine.run, machine, dm_image, max_steps, 1)
+    profile = golden.Profile()
+    profiled, profiled_elapsed = measure(
+        lambda m, steps: m.run(steps, profile=profile), machine, dm_image, max_steps, 1)
+    assert plain == profiled == sum(profile.pc_counts().values())
+    for cap in range(plain // 3, plain // 3 + 8):
+        check_profile_cap(machine, dm_image, cap)
+    return plain_elapsed, profiled_elapsed
+
+def check_profile_cap(machine, dm_image, max_steps):
+    """確認在 max_steps 停在區塊中間時，剖析執行與一般執行的指令數與結束狀態相同"""
+    states = []
+    for profile in (None, golden.Profile()):
+        machine.reset()
+        machine.load_dm_bytes(dm_image)
+        steps = machine.run(max_steps, profile=profile)
+        states.append((steps, machine.pc, list(machine.registers), memory_image(machine)))
+    assert states[0] == states[1], f"profiled run diverges at max_steps={max_steps}"
+
+def memory_image(machine):
+    """資料記憶體的完整內容（PagedMemory 時為各區域依序相接）"""
+    if not machine.paged:
+        return bytes(machine.data_memory)
+    return b''.join(machine.data_memory.dump(base, end - base) for base, end in machine.data_memory.regions)
+
+def measure_checkpoint(machine, max_steps, repeat=20):
+    """
+    執行到一半時存檢查點，回傳 (檔案大小, 存檔秒數, 平均還原秒數)；
+    並確認還原後執行完的結果與直接執行相同
+    """
+    machine.reset()
+    total = machine.run(max_steps)
+    expected = (machine.pc, list(machine.registers), memory_image(machine))
+
+    machine.reset()
+    half = machine.run(total // 2)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'checkpoint.bin')
+        start = time.perf_counter()
+        machine.checkpoint(path, half)
+        saved = time.perf_counter() - start
+        size = os.path.getsize(path)
+        machine.run(max_steps)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            instret = machine.restore(path)
+        restored = (time.perf_counter() - start) / repeat
+    assert instret + machine.run(max_steps) == total
+    assert (machine.pc, machine.registers, memory_image(machine)) == expected
+    return size, saved, restored
+
+def measure_load(image_mb):
+    """將 image_mb MB 的隨機內容分別寫成 .dat 與 .bin，回傳 [(格式, 載入秒數)]"""
+    data = os.urandom(image_mb << 20)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        dat_path = os.path.join(tmp, 'IM.dat')
+        bin_path = os.path.join(tmp, 'IM.bin')
+        with open(dat_path, 'w', encoding='utf-8') as f:
+            f.write(''.join(f'{b:02X}\n' for b in data))
+        golden.write_image(bin_path, data)
+        for name, path in (('.dat', dat_path), ('.bin', bin_path)):
+            machine = golden.Machine(im_size=len(data))
+            start = time.perf_counter()
+            machine.load_im(path)
+            results.append((name, time.perf_counter() - start))
+            assert machine.instruction_memory == data
+    return results
+
+def report(name, repeat, results):
+    """印出單一程式的量測結果（加速比為 block-compiled 相對於 if/elif 派送；沒有量測的欄位印 -）"""
+    counts = {r[0] for r in results if r}
+    assert len(counts) == 1, f"{name}: runners retired different instruction counts"
+    ips = [(r[0] / r[1] if r[1] else 0.0) if r else None for r in results]
+    speedup = f"{ips[-1] / ips[0]:>6.2f}x" if ips[0] else f"{'-':>7}"
+    print(f"  {name:<16} {counts.pop() // repeat:>9}  "
+          + "  ".join(f"{'-':>14}" if value is None else f"{value:>14,.0f}" for value in ips)
+          + f"  {speedup}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=2000,
+                        help='每個 TestCase 重複執行次數（預設 2000）')
+    parser.add_argument('--loop-iters-hi', type=lambda x: int(x, 0), default=0x20,
+                        help='合成迴圈 LUI 立即數，迭代次數 = 值 << 12（預設 0x20）')
+    parser.add_argument('--memory-passes', type=int, default=8,
+                        help='記憶體 kernel 的輪數（預設 8）')
+    parser.add_argument('--image-mb', type=int, default=4,
+                        help='映像檔載入量測的大小，單位 MB（預設 4，0 表示略過）')
+    args = parser.parse_args()
+
+    assembler = load_module("Instr_Transfer", os.path.join(PATTERN_DIR, 'Instr_Transfer.py'))
+    baseline = load_baseline()
+    if baseline is None:
+        print(f"git show {BASELINE_COMMIT[:7]}:Golden_Result.py failed; skipping the if/elif baseline")
+    machine = golden.Machine()
+    dm_image = golden.read_hex_bytes(os.path.join(BASE_DIR, 'DM.dat'))
+
+    print("=" * 102)
+    print("Golden_Result.py Benchmark (instructions / second)")
+    print("=" * 102)
+    print(f"  {'Program':<16} {'Instrs':>9}  {'if/elif':>14}  {'decode-per-step':>14}  {'predecoded':>14}"
+          f"  {'block-compiled':>14}  {'Speedup':>7}")
+
+    for i in range(1, 13):
+        path = os.path.join(PATTERN_DIR, f'TestCase{i}.dat')
+        if not os.path.exists(path):
+            continue
+        assemble_to_im(assembler, machine, path)
+        results = measure_all(machine, dm_image, 10000, args.repeat)
+        report(f'TestCase{i}', args.repeat, results)
+
+    fd, loop_path = tempfile.mkstemp(suffix='.dat')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(SYNTHETIC_LOOP.format(iters_hi=hex(args.loop_iters_hi)))
+    try:
+        assemble_to_im(assembler, machine, loop_path)
+    finally:
+        os.remove(loop_path)
+    max_steps = 8 * (args.loop_iters_hi << 12) + 16
+    results = measure_all(machine, dm_image, max_steps, 1)
+    report('Synthetic loop', 1, results)
+    overhead = [('Synthetic loop', measure_profile(machine, dm_image, max_steps))]
+
+    checkpoints = []
+    fd, kernel_path = tempfile.mkstemp(suffix='.dat')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(MEMORY_KERNEL.format(passes=args.memory_passes))
+    try:
+        for name, kwargs in MEMORY_MACHINES:
+            kernel_machine = golden.Machine(**kwargs)
+            assemble_to_im(assembler, kernel_machine, kernel_path)
+            max_steps = 41000 * args.memory_passes
+            results = measure_all(kernel_machine, b'', max_steps, 1)
+            report(name, 1, results)
+            overhead.append((name, measure_profile(kernel_machine, b'', max_steps)))
+            checkpoints.append((name, measure_checkpoint(kernel_machine, max_steps)))
+    finally:
+        os.remove(kernel_path)
+
+    print("-" * 102)
+    print("  Profiling overhead (block-compiled run vs run(profile=...))")
+    for name, (plain, profiled) in overhead:
+        print(f"  {name:<16} {plain:>9.3f} s  {profiled:>9.3f} s  {profiled / plain:>6.2f}x")
+
+    print("-" * 102)
+    print("  Checkpoint halfway through the memory kernel (restore, then run to the end matches)")
+    for name, (size, saved, restored) in checkpoints:
+        print(f"  {name:<16} {size:>9,} bytes  save {saved * 1000:>7.2f} ms  restore {restored * 1000:>7.2f} ms")
+
+    if args.image_mb:
+        print("-" * 102)
+        print(f"  Loading a {args.image_mb} MB instruction memory image")
+        for name, elapsed in measure_load(args.image_mb):
+            print(f"  {name:<16} {elapsed * 1000:>12,.1f} ms")
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Golden_Result.py 執行剖析
+組譯 Pattern/*.dat（結尾加上 ECALL）後以 Machine.run(profile=...) 執行，輸出：
+  - JSON：每個 PC 的執行次數與對應的原始碼行/標籤、依 opcode 類別與助記符的指令分布、
+    每個條件分支的 taken/not-taken 次數、Load/Store 的位址直方圖
+  - collapsed stack（flamegraph.pl / speedscope 可直接讀取）：呼叫堆疊;原始碼行 次數
+並在終端機列出最熱的指令與分支。
+呼叫堆疊以 JAL/JALR rd = ra/t0 為呼叫、JALR x0, ra/t0 為返回推得，函式以入口的標籤命名
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import Golden_Result as golden
+from Verify_Script import load_module
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PATTERN_DIR = os.path.join(BASE_DIR, '..', 'Pattern')
+
+ECALL = 0x00000073
+
+OPCODE_CLASSES = {
+    0x33: 'R-type', 0x13: 'I-type', 0x03: 'Load', 0x23: 'Store', 0x63: 'Branch',
+    0x6F: 'JAL', 0x67: 'JALR', 0x37: 'LUI', 0x17: 'AUIPC', 0x73: 'System',
+}
+
+def load_program(path, assembler):
+    """組譯 path，回傳 (加上 ECALL 的指令記憶體, 原始碼行, 每道指令的行號, 標籤表)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    line_numbers = []
+    records, labels = assembler.assemble(lines, line_numbers)
+    image = assembler.to_image(records) + ECALL.to_bytes(4, 'big')
+    return image, lines, line_numbers, labels
+
+def mnemonic(d, source):
+    """執行時的助記符（由 handler 名稱而來；ECALL/CSR 等取原始碼的第一個字）"""
+    name = d.handler.__name__[5:].replace('_paged', '').upper()
+    if name in ('SYSTEM', 'SKIP', 'LOAD_INVALID'):
+        words = source.split(':')[-1].split()
+        return words[0].upper() if words else 'ECALL'
+    return name
+
+def histogram(addresses, bucket):
+    """位址 → 以 bucket bytes 對齊的 {起始位址: 次數}"""
+    shift = bucket.bit_length() - 1
+    counts = Counter(a >> shift for a in addresses)
+    return {f"0x{b << shift:08X}": n for b, n in sorted(counts.items())}
+
+def build_report(machine, profile, lines, line_numbers, labels, bucket=32):
+    """把 Profile 整理成可輸出為 JSON 的 dict"""
+    names = {addr: name for name, addr in labels.items()}
+    counts = profile.pc_counts()
+
+    def where(pc):
+        index = pc >> 2
+        if pc & 3 or index >= len(line_numbers):
+            return None, 'ECALL (appended)' if index == len(line_numbers) else ''
+        number = line_numbers[index]
+        return number, lines[number - 1].strip()
+
+    pcs = []
+    by_class = Counter()
+    by_mnemonic = Counter()
+    for pc, n in sorted(counts.items()):
+        number, source = where(pc)
+        d = machine.lookup(pc)
+        name = mnemonic(d, source)
+        by_class[OPCODE_CLASSES.get(d.opcode, 'Other')] += n
+        by_mnemonic[name] += n
+        pcs.append({'pc': f"0x{pc:08X}", 'count': n, 'line': number, 'source': source,
+                    'mnemonic': name, 'label': names.get(pc)})
+
+    branches = []
+    for pc, (n, taken) in profile.branch_counts().items():
+        number, source = where(pc)
+        branches.append({'pc': f"0x{pc:08X}", 'line': number, 'source': source,
+                         'executed': n, 'taken': taken, 'not_taken': n - taken,
+                         'taken_ratio': round(taken / n, 4) if n else 0.0})
+
+    memory = {'bucket_bytes': bucket, 'loads': {}, 'stores': {}, 'by_pc': []}
+    loads = []
+    stores = []
+    for pc, addresses in sorted(profile.addresses.items()):
+        number, source = where(pc)
+        store = machine.lookup(pc).opcode == 0x23
+        (stores if store else loads).extend(addresses)
+        memory['by_pc'].append({'pc': f"0x{pc:08X}", 'line': number, 'source': source,
+                                'kind': 'store' if store else 'load', 'count': len(addresses),
+                                'distinct': len(set(addresses)),
+                                'min': f"0x{min(addresses):08X}", 'max': f"0x{max(addresses):08X}",
+                                'histogram': histogram(addresses, bucket)})
+    memory['loads'] = histogram(loads, bucket)
+    memory['stores'] = histogram(stores, bucket)
+
+    total = sum(counts.values())
+    return {
+        'instructions': total,
+        'pcs': pcs,
+        'mix': {
+            'by_class': dict(by_class.most_common()),
+            'by_mnemonic': dict(by_mnemonic.most_common()),
+        },
+        'branches': branches,
+        'memory': memory,
+    }
+
+def collapsed_stacks(profile, lines, line_numbers, labels):
+    """以 flamegraph collapsed 格式輸出：每行為「函式;函式;...;行號: 原始碼 次數」"""
+    names = {addr: name for name, addr in labels.items()}
+
+    def frame(pc, depth):
+        return names.get(pc) or ('main' if depth == 0 else f"0x{pc:08X}")
+
+    def leaf(pc):
+        index = pc >> 2
+        if pc & 3 or index >= len(line_numbers):
+            return 'ECALL (appended)' if index == len(line_numbers) else f"0x{pc:08X}"
+        number = line_numbers[index]
+        return f"{number}: {lines[number - 1].strip()}".replace(';', ',')
+
+    out = []
+    for (stack, pc), n in sorted(profile.pc_counts(by_stack=True).items()):
+        out.append(';'.join([frame(f, i) for i, f in enumerate(stack)] + [leaf(pc)]) + f" {n}\n")
+    return ''.join(out)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', help='組合語言原始碼（例如 Pattern/TestCase3.dat）')
+    parser.add_argument('--dm', default=os.path.join(BASE_DIR, 'DM.dat'),
+                        help='資料記憶體（預設 Testbench/DM.dat）')
+    parser.add_argument('--max-steps', type=int, default=100000, help='最多執行的指令數（預設 100000）')
+    parser.add_argument('--json', default=os.path.join(BASE_DIR, 'Profile.json'),
+                        help='JSON 輸出（預設 Testbench/Profile.json）')
+    parser.add_argument('--folded', default=os.path.join(BASE_DIR, 'Profile.folded'),
+                        help='collapsed stack 輸出（預設 Testbench/Profile.folded）')
+    parser.add_argument('--bucket', type=int, default=32,
+                        help='位址直方圖的區間大小，bytes，須為 2 的冪（預設 32，即一條 cache line）')
+    parser.add_argument('--top', type=int, default=10, help='列出的熱點數（預設 10）')
+    args = parser.parse_args()
+
+    assembler = load_module("Instr_Transfer", os.path.join(PATTERN_DIR, 'Instr_Transfer.py'))
+    image, lines, line_numbers, labels = load_program(args.source, assembler)
+
+    machine = golden.Machine(im_size=max(4 * golden.BRAM_DEPTH, len(image)))
+    machine.load_im_bytes(image)
+    machine.load_dm(args.dm)
+    profile = golden.Profile()
+    steps = machine.run(args.max_steps, profile=profile)
+
+    report = build_report(machine, profile, lines, line_numbers, labels, args.bucket)
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=1, ensure_ascii=False)
+    with open(args.folded, 'w', encoding='utf-8') as f:
+        f.write(collapsed_stacks(profile, lines, line_numbers, labels))
+
+    print(f"{args.source}: {steps} instructions" + ('' if machine.halted() else ' (step limit reached)'))
+    print("  Mix: " + ', '.join(f"{k} {v}" for k, v in report['mix']['by_class'].items()))
+    print(f"\n  {'PC':<10} {'Count':>8} {'Line':>5}  Source")
+    for entry in sorted(report['pcs'], key=lambda e: -e['count'])[:args.top]:
+        print(f"  {entry['pc']:<10} {entry['count']:>8} {entry['line'] or '':>5}  {entry['source']}")
+    if report['branches']:
+        print(f"\n  {'Branch':<10} {'Exec':>8} {'Taken':>8} {'Ratio':>7}  Source")
+        for entry in sorted(report['branches'], key=lambda e: -e['executed'])[:args.top]:
+            print(f"  {entry['pc']:<10} {entry['executed']:>8} {entry['taken']:>8}"
+                  f" {entry['taken_ratio']:>7.1%}  {entry['source']}")
+    print(f"\n  JSON:   {args.json}")
+    print(f"  Folded: {args.folded}")
@@ -5,45 +5,13 @@ RISC-V RV32I + RV32M Golden Reference Generator
 支援 RV32I 基本指令集 + RV32M 乘除法擴展 (MUL, DIV, REM)
 """
 
-# 全域變數
-instruction_memory = bytearray(256)  # 256 bytes
-data_memory = bytearray(32)          # 32 bytes
-registers = [0] * 32                 # x0-x31
-pc = 0
+import array
+import mmap
+import os
+import struct
+import sys
 
-# ============================================================================
-# 檔案載入函式
-# ============================================================================
-
-def load_im(filename='IM.dat'):
-    """讀取指令記憶體（大端序）"""
-    global instruction_memory
-    idx = 0
-    with open(filename, 'r', encoding='latin-1') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('//'):
-                continue
-            try:
-                instruction_memory[idx] = int(line, 16)
-                idx += 1
-            except (ValueError, IndexError):
-                continue
-
-def load_dm(filename='DM.dat'):
-    """讀取資料記憶體（小端序）"""
-    global data_memory
-    idx = 0
-    with open(filename, 'r', encoding='latin-1') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('//'):
-                continue
-            try:
-                data_memory[idx] = int(line, 16)
-                idx += 1
-            except (ValueError, IndexError):
-                continue
+import dat2coe
 
 # ============================================================================
 # 輔助函式
@@ -62,20 +30,51 @@ def to_signed(val):
         return val - 0x100000000
     return val
 
+def div_signed(rs1_val, rs2_val):
+    """DIV - 有號除法"""
+    dividend = to_signed(rs1_val)
+    divisor = to_signed(rs2_val)
+    if divisor == 0:
+        # 除以零：商 = -1
+        return 0xFFFFFFFF
+    if dividend == -2147483648 and divisor == -1:
+        # 溢位：商 = 最小負數
+        return 0x80000000
+    # 向零取整
+    return int(dividend / divisor) & 0xFFFFFFFF
+
+def div_unsigned(rs1_val, rs2_val):
+    """DIVU - 無號除法"""
+    if rs2_val == 0:
+        # 除以零：商 = 0xFFFFFFFF
+        return 0xFFFFFFFF
+    return (rs1_val // rs2_val) & 0xFFFFFFFF
+
+def rem_signed(rs1_val, rs2_val):
+    """REM - 有號餘數（RISC-V 使用 truncated division，不是 Python 的 floored division）"""
+    dividend = to_signed(rs1_val)
+    divisor = to_signed(rs2_val)
+    if divisor == 0:
+        # 除以零：餘數 = 被除數
+        return rs1_val
+    if dividend == -2147483648 and divisor == -1:
+        # 溢位：餘數 = 0
+        return 0
+    # remainder = dividend - (dividend/divisor)*divisor，int() 向零取整
+    quotient = int(dividend / divisor)
+    return (dividend - quotient * divisor) & 0xFFFFFFFF
+
+def rem_unsigned(rs1_val, rs2_val):
+    """REMU - 無號餘數"""
+    if rs2_val == 0:
+        # 除以零：餘數 = 被除數
+        return rs1_val
+    return (rs1_val % rs2_val) & 0xFFFFFFFF
+
 # ============================================================================
-# 指令 Fetch & Decode
+# 指令 Decode
 # ============================================================================
 
-def fetch():
-    """從 PC 讀取 32-bit 指令（大端序）"""
-    global pc
-    return (
-        (instruction_memory[pc] << 24) |
-        (instruction_memory[pc+1] << 16) |
-        (instruction_memory[pc+2] << 8) |
-        instruction_memory[pc+3]
-    )
-
 def extract_imm(inst, opcode):
     """根據 opcode 提取立即數"""
     if opcode in [0x13, 0x03, 0x67, 0x73]:  # I-Type
@@ -109,6 +108,21 @@ def extract_imm(inst, opcode):
 
     return 0
 
+class Decoded:
+    """解碼後的指令紀錄"""
+    __slots__ = ('opcode', 'rd', 'rs1', 'rs2', 'funct3', 'funct7', 'imm', 'raw', 'handler')
+
+    def __init__(self, opcode, rd, rs1, rs2, funct3, funct7, imm, raw):
+        self.opcode = opcode
+        self.rd = rd
+        self.rs1 = rs1
+        self.rs2 = rs2
+        self.funct3 = funct3
+        self.funct7 = funct7
+        self.imm = imm
+        self.raw = raw
+        self.handler = None
+
 def decode(inst):
     """解碼 32-bit 指令"""
     opcode = inst & 0x7F
@@ -119,378 +133,1606 @@ def decode(inst):
     funct7 = (inst >> 25) & 0x7F
     imm = extract_imm(inst, opcode)
 
-    return {
-        'opcode': opcode,
-        'rd': rd,
-        'rs1': rs1,
-        'rs2': rs2,
-        'funct3': funct3,
-        'funct7': funct7,
-        'imm': imm,
-        'raw': inst
-    }
+    d = Decoded(opcode, rd, rs1, rs2, funct3, funct7, imm, inst)
+    d.handler = resolve_handler(d)
+    return d
 
 # ============================================================================
-# 指令執行函式
+# 指令執行函式（每個 (opcode, funct3, funct7) 組合各自一個 handler）
 # ============================================================================
 
-def execute_r_type(d):
-    """執行 R-Type 指令"""
-    global pc, registers
-    rs1_val = registers[d['rs1']]
-    rs2_val = registers[d['rs2']]
-    funct3 = d['funct3']
-    funct7 = d['funct7']
-    result = 0
-
-    if funct3 == 0b000:  # ADD/SUB/MUL
-        if funct7 == 0x20:
-            result = (rs1_val - rs2_val) & 0xFFFFFFFF  # SUB
-        elif funct7 == 0x01:
-            # MUL - 取低 32 位
-            product = to_signed(rs1_val) * to_signed(rs2_val)
-            result = product & 0xFFFFFFFF
-        else:
-            result = (rs1_val + rs2_val) & 0xFFFFFFFF  # ADD
-    elif funct3 == 0b001:  # SLL/MULH
-        if funct7 == 0x01:
-            # MULH - 有號×有號，取高 32 位
-            product = to_signed(rs1_val) * to_signed(rs2_val)
-            result = (product >> 32) & 0xFFFFFFFF
-        else:
-            result = (rs1_val << (rs2_val & 0x1F)) & 0xFFFFFFFF  # SLL
-    elif funct3 == 0b010:  # SLT/MULHSU
-        if funct7 == 0x01:
-            # MULHSU - 有號×無號，取高 32 位
-            product = to_signed(rs1_val) * rs2_val  # rs1 有號，rs2 無號
-            result = (product >> 32) & 0xFFFFFFFF
-        else:
-            result = 1 if to_signed(rs1_val) < to_signed(rs2_val) else 0  # SLT
-    elif funct3 == 0b011:  # SLTU/MULHU
-        if funct7 == 0x01:
-            # MULHU - 無號×無號，取高 32 位
-            product = rs1_val * rs2_val
-            result = (product >> 32) & 0xFFFFFFFF
-        else:
-            result = 1 if rs1_val < rs2_val else 0  # SLTU
-    elif funct3 == 0b100:  # XOR/DIV
-        if funct7 == 0x01:
-            # DIV - 有號除法
-            dividend = to_signed(rs1_val)
-            divisor = to_signed(rs2_val)
-            if divisor == 0:
-                # 除以零：商 = -1
-                result = 0xFFFFFFFF
-            elif dividend == -2147483648 and divisor == -1:
-                # 溢位：商 = 最小負數
-                result = 0x80000000
-            else:
-                # 向零取整
-                quotient = int(dividend / divisor)
-                result = quotient & 0xFFFFFFFF
-        else:
-            result = rs1_val ^ rs2_val  # XOR
-    elif funct3 == 0b101:  # SRL/SRA/DIVU
-        if funct7 == 0x01:
-            # DIVU - 無號除法
-            if rs2_val == 0:
-                # 除以零：商 = 0xFFFFFFFF
-                result = 0xFFFFFFFF
-            else:
-                result = (rs1_val // rs2_val) & 0xFFFFFFFF
-        elif funct7 == 0x20:  # SRA
-            result = (to_signed(rs1_val) >> (rs2_val & 0x1F)) & 0xFFFFFFFF
-        else:  # SRL
-            result = rs1_val >> (rs2_val & 0x1F)
-    elif funct3 == 0b110:  # OR/REM
-        if funct7 == 0x01:
-            # REM - 有號餘數（RISC-V 使用 truncated division，不是 Python 的 floored division）
-            dividend = to_signed(rs1_val)
-            divisor = to_signed(rs2_val)
-            if divisor == 0:
-                # 除以零：餘數 = 被除數
-                result = rs1_val
-            elif dividend == -2147483648 and divisor == -1:
-                # 溢位：餘數 = 0
-                result = 0
-            else:
-                # RISC-V REM: remainder = dividend - (dividend/divisor)*divisor
-                # 使用 truncated division (int() 向零取整)
-                quotient = int(dividend / divisor)
-                remainder = dividend - (quotient * divisor)
-                result = remainder & 0xFFFFFFFF
-        else:
-            result = rs1_val | rs2_val  # OR
-    elif funct3 == 0b111:  # AND/REMU
-        if funct7 == 0x01:
-            # REMU - 無號餘數
-            if rs2_val == 0:
-                # 除以零：餘數 = 被除數
-                result = rs1_val
-            else:
-                result = (rs1_val % rs2_val) & 0xFFFFFFFF
-        else:
-            result = rs1_val & rs2_val  # AND
-
-    if d['rd'] != 0:
-        registers[d['rd']] = result & 0xFFFFFFFF
-    pc += 4
-
-def execute_i_alu(d):
-    """執行 I-Type ALU 指令"""
-    global pc, registers
-    rs1_val = registers[d['rs1']]
-    imm = d['imm']
-    funct3 = d['funct3']
-    result = 0
-
-    if funct3 == 0b000:  # ADDI
-        result = (rs1_val + imm) & 0xFFFFFFFF
-    elif funct3 == 0b010:  # SLTI
-        result = 1 if to_signed(rs1_val) < to_signed(imm) else 0
-    elif funct3 == 0b011:  # SLTIU
-        result = 1 if rs1_val < (imm & 0xFFFFFFFF) else 0
-    elif funct3 == 0b100:  # XORI
-        result = rs1_val ^ (imm & 0xFFFFFFFF)
-    elif funct3 == 0b110:  # ORI
-        result = rs1_val | (imm & 0xFFFFFFFF)
-    elif funct3 == 0b111:  # ANDI
-        result = rs1_val & (imm & 0xFFFFFFFF)
-    elif funct3 == 0b001:  # SLLI
-        shamt = imm & 0x1F
-        result = (rs1_val << shamt) & 0xFFFFFFFF
-    elif funct3 == 0b101:  # SRLI/SRAI
-        shamt = imm & 0x1F
-        if (imm >> 10) & 1:  # SRAI
-            result = (to_signed(rs1_val) >> shamt) & 0xFFFFFFFF
-        else:  # SRLI
-            result = rs1_val >> shamt
-
-    if d['rd'] != 0:
-        registers[d['rd']] = result & 0xFFFFFFFF
-    pc += 4
-
-def execute_load(d):
-    """執行 Load 指令（小端序）"""
-    global pc, registers, data_memory
-    addr = (registers[d['rs1']] + d['imm']) & 0xFFFFFFFF
-    funct3 = d['funct3']
+# ---------------------------- R-Type (RV32I) --------------------------------
+
+def exec_add(m, d):
+    """ADD"""
+    if d.rd != 0:
+        m.registers[d.rd] = (m.registers[d.rs1] + m.registers[d.rs2]) & 0xFFFFFFFF
+    m.pc += 4
+
+def exec_sub(m, d):
+    """SUB"""
+    if d.rd != 0:
+        m.registers[d.rd] = (m.registers[d.rs1] - m.registers[d.rs2]) & 0xFFFFFFFF
+    m.pc += 4
+
+def exec_sll(m, d):
+    """SLL"""
+    if d.rd != 0:
+        m.registers[d.rd] = (m.registers[d.rs1] << (m.registers[d.rs2] & 0x1F)) & 0xFFFFFFFF
+    m.pc += 4
+
+def exec_slt(m, d):
+    """SLT"""
+    if d.rd != 0:
+        m.registers[d.rd] = 1 if to_signed(m.registers[d.rs1]) < to_signed(m.registers[d.rs2]) else 0
+    m.pc += 4
+
+def exec_sltu(m, d):
+    """SLTU"""
+    if d.rd != 0:
+        m.registers[d.rd] = 1 if m.registers[d.rs1] < m.registers[d.rs2] else 0
+    m.pc += 4
+
+def exec_xor(m, d):
+    """XOR"""
+    if d.rd != 0:
+        m.registers[d.rd] = m.registers[d.rs1] ^ m.registers[d.rs2]
+    m.pc += 4
+
+def exec_srl(m, d):
+    """SRL"""
+    if d.rd != 0:
+        m.registers[d.rd] = m.registers[d.rs1] >> (m.registers[d.rs2] & 0x1F)
+    m.pc += 4
+
+def exec_sra(m, d):
+    """SRA"""
+    if d.rd != 0:
+        m.registers[d.rd] = (to_signed(m.registers[d.rs1]) >> (m.registers[d.rs2] & 0x1F)) & 0xFFFFFFFF
+    m.pc += 4
+
+def exec_or(m, d):
+    """OR"""
+    if d.rd != 0:
+        m.registers[d.rd] = m.registers[d.rs1] | m.registers[d.rs2]
+    m.pc += 4
+
+def exec_and(m, d):
+    """AND"""
+    if d.rd != 0:
+        m.registers[d.rd] = m.registers[d.rs1] & m.registers[d.rs2]
+    m.pc += 4
+
+# ---------------------------- R-Type (RV32M) --------------------------------
+
+def exec_mul(m, d):
+    """MUL - 取低 32 位"""
+    if d.rd != 0:
+        product = to_signed(m.registers[d.rs1]) * to_signed(m.registers[d.rs2])
+        m.registers[d.rd] = product & 0xFFFFFFFF
+    m.pc += 4
+
+def exec_mulh(m, d):
+    """MULH - 有號×有號，取高 32 位"""
+    if d.rd != 0:
+        product = to_signed(m.registers[d.rs1]) * to_signed(m.registers[d.rs2])
+        m.registers[d.rd] = (product >> 32) & 0xFFFFFFFF
+    m.pc += 4
+
+def exec_mulhsu(m, d):
+    """MULHSU - 有號×無號，取高 32 位"""
+    if d.rd != 0:
+        product = to_signed(m.registers[d.rs1]) * m.registers[d.rs2]  # rs1 有號，rs2 無號
+        m.registers[d.rd] = (product >> 32) & 0xFFFFFFFF
+    m.pc += 4
+
+def exec_mulhu(m, d):
+    """MULHU - 無號×無號，取高 32 位"""
+    if d.rd != 0:
+        product = m.registers[d.rs1] * m.registers[d.rs2]
+        m.registers[d.rd] = (product >> 32) & 0xFFFFFFFF
+    m.pc += 4
+
+def exec_div(m, d):
+    """DIV"""
+    if d.rd != 0:
+        m.registers[d.rd] = div_signed(m.registers[d.rs1], m.registers[d.rs2])
+    m.pc += 4
+
+def exec_divu(m, d):
+    """DIVU"""
+    if d.rd != 0:
+        m.registers[d.rd] = div_unsigned(m.registers[d.rs1], m.registers[d.rs2])
+    m.pc += 4
+
+def exec_rem(m, d):
+    """REM"""
+    if d.rd != 0:
+        m.registers[d.rd] = rem_signed(m.registers[d.rs1], m.registers[d.rs2])
+    m.pc += 4
+
+def exec_remu(m, d):
+    """REMU"""
+    if d.rd != 0:
+        m.registers[d.rd] = rem_unsigned(m.registers[d.rs1], m.registers[d.rs2])
+    m.pc += 4
+
+# ---------------------------- I-Type ALU ------------------------------------
+
+def exec_addi(m, d):
+    """ADDI"""
+    if d.rd != 0:
+        m.registers[d.rd] = (m.registers[d.rs1] + d.imm) & 0xFFFFFFFF
+    m.pc += 4
+
+def exec_slti(m, d):
+    """SLTI"""
+    if d.rd != 0:
+        m.registers[d.rd] = 1 if to_signed(m.registers[d.rs1]) < to_signed(d.imm) else 0
+    m.pc += 4
+
+def exec_sltiu(m, d):
+    """SLTIU"""
+    if d.rd != 0:
+        m.registers[d.rd] = 1 if m.registers[d.rs1] < (d.imm & 0xFFFFFFFF) else 0
+    m.pc += 4
+
+def exec_xori(m, d):
+    """XORI"""
+    if d.rd != 0:
+        m.registers[d.rd] = m.registers[d.rs1] ^ (d.imm & 0xFFFFFFFF)
+    m.pc += 4
+
+def exec_ori(m, d):
+    """ORI"""
+    if d.rd != 0:
+        m.registers[d.rd] = m.registers[d.rs1] | (d.imm & 0xFFFFFFFF)
+    m.pc += 4
+
+def exec_andi(m, d):
+    """ANDI"""
+    if d.rd != 0:
+        m.registers[d.rd] = m.registers[d.rs1] & (d.imm & 0xFFFFFFFF)
+    m.pc += 4
+
+def exec_slli(m, d):
+    """SLLI"""
+    if d.rd != 0:
+        m.registers[d.rd] = (m.registers[d.rs1] << (d.imm & 0x1F)) & 0xFFFFFFFF
+    m.pc += 4
+
+def exec_srli(m, d):
+    """SRLI"""
+    if d.rd != 0:
+        m.registers[d.rd] = m.registers[d.rs1] >> (d.imm & 0x1F)
+    m.pc += 4
+
+def exec_srai(m, d):
+    """SRAI"""
+    if d.rd != 0:
+        m.registers[d.rd] = (to_signed(m.registers[d.rs1]) >> (d.imm & 0x1F)) & 0xFFFFFFFF
+    m.pc += 4
 
+# ---------------------------- Load（小端序）---------------------------------
+
+def exec_lb(m, d):
+    """LB (signed)"""
+    addr = (m.registers[d.rs1] + d.imm) & 0xFFFFFFFF
     # 防止越界
-    if addr >= len(data_memory):
-        pc += 4
-        return
-
-    val = 0
-    if funct3 == 0b000:  # LB (signed)
-        val = data_memory[addr]
-        val = sign_extend(val, 8)
-    elif funct3 == 0b001:  # LH (signed)
-        if addr + 1 < len(data_memory):
-            val = data_memory[addr] | (data_memory[addr+1] << 8)
-            val = sign_extend(val, 16)
-    elif funct3 == 0b010:  # LW
-        if addr + 3 < len(data_memory):
-            val = (data_memory[addr] |
-                   (data_memory[addr+1] << 8) |
-                   (data_memory[addr+2] << 16) |
-                   (data_memory[addr+3] << 24))
-    elif funct3 == 0b100:  # LBU (unsigned)
-        val = data_memory[addr]
-    elif funct3 == 0b101:  # LHU (unsigned)
-        if addr + 1 < len(data_memory):
-            val = data_memory[addr] | (data_memory[addr+1] << 8)
-
-    if d['rd'] != 0:
-        registers[d['rd']] = val & 0xFFFFFFFF
-    pc += 4
-
-def execute_store(d):
-    """執行 Store 指令（小端序）"""
-    global pc, registers, data_memory
-    addr = (registers[d['rs1']] + d['imm']) & 0xFFFFFFFF
-    val = registers[d['rs2']]
-    funct3 = d['funct3']
-
-    if addr >= len(data_memory):
-        pc += 4
-        return
-
-    if funct3 == 0b000:  # SB
-        data_memory[addr] = val & 0xFF
-    elif funct3 == 0b001:  # SH
-        if addr + 1 < len(data_memory):
-            data_memory[addr] = val & 0xFF
-            data_memory[addr+1] = (val >> 8) & 0xFF
-    elif funct3 == 0b010:  # SW
-        if addr + 3 < len(data_memory):
-            data_memory[addr] = val & 0xFF
-            data_memory[addr+1] = (val >> 8) & 0xFF
-            data_memory[addr+2] = (val >> 16) & 0xFF
-            data_memory[addr+3] = (val >> 24) & 0xFF
-
-    pc += 4
-
-def execute_branch(d):
-    """執行 Branch 指令"""
-    global pc, registers
-    rs1_val = registers[d['rs1']]
-    rs2_val = registers[d['rs2']]
-    funct3 = d['funct3']
-
-    taken = False
-    if funct3 == 0b000:  # BEQ
-        taken = rs1_val == rs2_val
-    elif funct3 == 0b001:  # BNE
-        taken = rs1_val != rs2_val
-    elif funct3 == 0b100:  # BLT
-        taken = to_signed(rs1_val) < to_signed(rs2_val)
-    elif funct3 == 0b101:  # BGE
-        taken = to_signed(rs1_val) >= to_signed(rs2_val)
-    elif funct3 == 0b110:  # BLTU
-        taken = rs1_val < rs2_val
-    elif funct3 == 0b111:  # BGEU
-        taken = rs1_val >= rs2_val
-
-    if taken:
-        pc = (pc + d['imm']) & 0xFFFFFFFF
+    if addr < len(m.data_memory) and d.rd != 0:
+        m.registers[d.rd] = sign_extend(m.data_memory[addr], 8)
+    m.pc += 4
+
+def exec_lh(m, d):
+    """LH (signed)"""
+    addr = (m.registers[d.rs1] + d.imm) & 0xFFFFFFFF
+    if addr < len(m.data_memory) and d.rd != 0:
+        val = 0
+        if addr + 1 < len(m.data_memory):
+            val = sign_extend(m.data_memory[addr] | (m.data_memory[addr+1] << 8), 16)
+        m.registers[d.rd] = val
+    m.pc += 4
+
+def exec_lw(m, d):
+    """LW"""
+    addr = (m.registers[d.rs1] + d.imm) & 0xFFFFFFFF
+    if addr < len(m.data_memory) and d.rd != 0:
+        val = 0
+        if addr + 3 < len(m.data_memory):
+            val = (m.data_memory[addr] |
+                   (m.data_memory[addr+1] << 8) |
+                   (m.data_memory[addr+2] << 16) |
+                   (m.data_memory[addr+3] << 24))
+        m.registers[d.rd] = val
+    m.pc += 4
+
+def exec_lbu(m, d):
+    """LBU (unsigned)"""
+    addr = (m.registers[d.rs1] + d.imm) & 0xFFFFFFFF
+    if addr < len(m.data_memory) and d.rd != 0:
+        m.registers[d.rd] = m.data_memory[addr]
+    m.pc += 4
+
+def exec_lhu(m, d):
+    """LHU (unsigned)"""
+    addr = (m.registers[d.rs1] + d.imm) & 0xFFFFFFFF
+    if addr < len(m.data_memory) and d.rd != 0:
+        val = 0
+        if addr + 1 < len(m.data_memory):
+            val = m.data_memory[addr] | (m.data_memory[addr+1] << 8)
+        m.registers[d.rd] = val
+    m.pc += 4
+
+def exec_load_invalid(m, d):
+    """未定義的 Load funct3：位址有效時寫回 0"""
+    addr = (m.registers[d.rs1] + d.imm) & 0xFFFFFFFF
+    if addr < len(m.data_memory) and d.rd != 0:
+        m.registers[d.rd] = 0
+    m.pc += 4
+
+# ---------------------------- Store（小端序）--------------------------------
+
+def exec_sb(m, d):
+    """SB"""
+    addr = (m.registers[d.rs1] + d.imm) & 0xFFFFFFFF
+    if addr < len(m.data_memory):
+        m.data_memory[addr] = m.registers[d.rs2] & 0xFF
+    m.pc += 4
+
+def exec_sh(m, d):
+    """SH"""
+    addr = (m.registers[d.rs1] + d.imm) & 0xFFFFFFFF
+    if addr + 1 < len(m.data_memory):
+        val = m.registers[d.rs2]
+        m.data_memory[addr] = val & 0xFF
+        m.data_memory[addr+1] = (val >> 8) & 0xFF
+    m.pc += 4
+
+def exec_sw(m, d):
+    """SW"""
+    addr = (m.registers[d.rs1] + d.imm) & 0xFFFFFFFF
+    if addr + 3 < len(m.data_memory):
+        val = m.registers[d.rs2]
+        m.data_memory[addr] = val & 0xFF
+        m.data_memory[addr+1] = (val >> 8) & 0xFF
+        m.data_memory[addr+2] = (val >> 16) & 0xFF
+        m.data_memory[addr+3] = (val >> 24) & 0xFF
+    m.pc += 4
+
+# ---------------------- Load/Store（分頁記憶體，未映射時產生 MemoryFault）-------------
+
+def exec_lb_paged(m, d):
+    """LB (signed)"""
+    val = m.data_memory.read8((m.registers[d.rs1] + d.imm) & 0xFFFFFFFF)
+    if d.rd != 0:
+        m.registers[d.rd] = sign_extend(val, 8)
+    m.pc += 4
+
+def exec_lh_paged(m, d):
+    """LH (signed)"""
+    val = m.data_memory.read16((m.registers[d.rs1] + d.imm) & 0xFFFFFFFF)
+    if d.rd != 0:
+        m.registers[d.rd] = sign_extend(val, 16)
+    m.pc += 4
+
+def exec_lw_paged(m, d):
+    """LW"""
+    val = m.data_memory.read32((m.registers[d.rs1] + d.imm) & 0xFFFFFFFF)
+    if d.rd != 0:
+        m.registers[d.rd] = val
+    m.pc += 4
+
+def exec_lbu_paged(m, d):
+    """LBU (unsigned)"""
+    val = m.data_memory.read8((m.registers[d.rs1] + d.imm) & 0xFFFFFFFF)
+    if d.rd != 0:
+        m.registers[d.rd] = val
+    m.pc += 4
+
+def exec_lhu_paged(m, d):
+    """LHU (unsigned)"""
+    val = m.data_memory.read16((m.registers[d.rs1] + d.imm) & 0xFFFFFFFF)
+    if d.rd != 0:
+        m.registers[d.rd] = val
+    m.pc += 4
+
+def exec_load_invalid_paged(m, d):
+    """未定義的 Load funct3：位址有效時寫回 0"""
+    m.data_memory.read8((m.registers[d.rs1] + d.imm) & 0xFFFFFFFF)
+    if d.rd != 0:
+        m.registers[d.rd] = 0
+    m.pc += 4
+
+def exec_sb_paged(m, d):
+    """SB"""
+    m.data_memory.write8((m.registers[d.rs1] + d.imm) & 0xFFFFFFFF, m.registers[d.rs2] & 0xFF)
+    m.pc += 4
+
+def exec_sh_paged(m, d):
+    """SH"""
+    m.data_memory.write16((m.registers[d.rs1] + d.imm) & 0xFFFFFFFF, m.registers[d.rs2] & 0xFFFF)
+    m.pc += 4
+
+def exec_sw_paged(m, d):
+    """SW"""
+    m.data_memory.write32((m.registers[d.rs1] + d.imm) & 0xFFFFFFFF, m.registers[d.rs2])
+    m.pc += 4
+
+# ---------------------------- Branch ----------------------------------------
+
+def exec_beq(m, d):
+    """BEQ"""
+    if m.registers[d.rs1] == m.registers[d.rs2]:
+        m.pc = (m.pc + d.imm) & 0xFFFFFFFF
+    else:
+        m.pc += 4
+
+def exec_bne(m, d):
+    """BNE"""
+    if m.registers[d.rs1] != m.registers[d.rs2]:
+        m.pc = (m.pc + d.imm) & 0xFFFFFFFF
+    else:
+        m.pc += 4
+
+def exec_blt(m, d):
+    """BLT"""
+    if to_signed(m.registers[d.rs1]) < to_signed(m.registers[d.rs2]):
+        m.pc = (m.pc + d.imm) & 0xFFFFFFFF
     else:
-        pc += 4
-
-def execute_lui(d):
-    """執行 LUI 指令"""
-    global pc, registers
-    if d['rd'] != 0:
-        registers[d['rd']] = d['imm'] & 0xFFFFFFFF
-    pc += 4
-
-def execute_auipc(d):
-    """執行 AUIPC 指令"""
-    global pc, registers
-    if d['rd'] != 0:
-        registers[d['rd']] = (pc + d['imm']) & 0xFFFFFFFF
-    pc += 4
-
-def execute_jal(d):
-    """執行 JAL 指令"""
-    global pc, registers
-    if d['rd'] != 0:
-        registers[d['rd']] = (pc + 4) & 0xFFFFFFFF
-    pc = (pc + d['imm']) & 0xFFFFFFFF
-
-def execute_jalr(d):
-    """執行 JALR 指令"""
-    global pc, registers
-    target = (registers[d['rs1']] + d['imm']) & 0xFFFFFFFE
-    if d['rd'] != 0:
-        registers[d['rd']] = (pc + 4) & 0xFFFFFFFF
-    pc = target
-
-def execute_system(d):
-    """執行 System 指令（ECALL/EBREAK）"""
-    global pc
-    # 停止執行
-    pc = 0xFFFFFFFF
-
-def execute(d):
-    """執行解碼後的指令"""
-    global pc
-    opcode = d['opcode']
+        m.pc += 4
+
+def exec_bge(m, d):
+    """BGE"""
+    if to_signed(m.registers[d.rs1]) >= to_signed(m.registers[d.rs2]):
+        m.pc = (m.pc + d.imm) & 0xFFFFFFFF
+    else:
+        m.pc += 4
+
+def exec_bltu(m, d):
+    """BLTU"""
+    if m.registers[d.rs1] < m.registers[d.rs2]:
+        m.pc = (m.pc + d.imm) & 0xFFFFFFFF
+    else:
+        m.pc += 4
+
+def exec_bgeu(m, d):
+    """BGEU"""
+    if m.registers[d.rs1] >= m.registers[d.rs2]:
+        m.pc = (m.pc + d.imm) & 0xFFFFFFFF
+    else:
+        m.pc += 4
+
+# ---------------------------- U/J-Type 與 System ----------------------------
+
+def exec_lui(m, d):
+    """LUI"""
+    if d.rd != 0:
+        m.registers[d.rd] = d.imm & 0xFFFFFFFF
+    m.pc += 4
+
+def exec_auipc(m, d):
+    """AUIPC"""
+    if d.rd != 0:
+        m.registers[d.rd] = (m.pc + d.imm) & 0xFFFFFFFF
+    m.pc += 4
+
+def exec_jal(m, d):
+    """JAL"""
+    if d.rd != 0:
+        m.registers[d.rd] = (m.pc + 4) & 0xFFFFFFFF
+    m.pc = (m.pc + d.imm) & 0xFFFFFFFF
+
+def exec_jalr(m, d):
+    """JALR"""
+    target = (m.registers[d.rs1] + d.imm) & 0xFFFFFFFE
+    if d.rd != 0:
+        m.registers[d.rd] = (m.pc + 4) & 0xFFFFFFFF
+    m.pc = target
+
+def exec_system(m, d):
+    """System 指令（ECALL/EBREAK）：停止執行"""
+    m.pc = 0xFFFFFFFF
+
+def exec_skip(m, d):
+    """未知或未定義的指令，跳過"""
+    m.pc += 4
+
+# ============================================================================
+# 分派表：解碼時一次解析出 handler
+# ============================================================================
+
+# 以 funct3 為索引
+R_TYPE_BASE = (exec_add, exec_sll, exec_slt, exec_sltu, exec_xor, exec_srl, exec_or, exec_and)
+R_TYPE_M    = (exec_mul, exec_mulh, exec_mulhsu, exec_mulhu, exec_div, exec_divu, exec_rem, exec_remu)
+I_TYPE_ALU  = (exec_addi, exec_slli, exec_slti, exec_sltiu, exec_xori, exec_srli, exec_ori, exec_andi)
+LOAD        = (exec_lb, exec_lh, exec_lw, exec_load_invalid, exec_lbu, exec_lhu, exec_load_invalid, exec_load_invalid)
+STORE       = (exec_sb, exec_sh, exec_sw, exec_skip, exec_skip, exec_skip, exec_skip, exec_skip)
+BRANCH      = (exec_beq, exec_bne, exec_skip, exec_skip, exec_blt, exec_bge, exec_bltu, exec_bgeu)
+
+def resolve_handler(d):
+    """依 (opcode, funct3, funct7) 找出對應的 handler"""
+    opcode = d.opcode
+    funct3 = d.funct3
 
     if opcode == 0x33:      # R-Type
-        execute_r_type(d)
+        if d.funct7 == 0x01:
+            return R_TYPE_M[funct3]
+        if d.funct7 == 0x20 and funct3 == 0b000:
+            return exec_sub
+        if d.funct7 == 0x20 and funct3 == 0b101:
+            return exec_sra
+        return R_TYPE_BASE[funct3]
     elif opcode == 0x13:    # I-Type ALU
-        execute_i_alu(d)
+        if funct3 == 0b101 and (d.imm >> 10) & 1:
+            return exec_srai
+        return I_TYPE_ALU[funct3]
     elif opcode == 0x03:    # Load
-        execute_load(d)
+        return LOAD[funct3]
     elif opcode == 0x23:    # Store
-        execute_store(d)
+        return STORE[funct3]
     elif opcode == 0x63:    # Branch
-        execute_branch(d)
+        return BRANCH[funct3]
     elif opcode == 0x37:    # LUI
-        execute_lui(d)
+        return exec_lui
     elif opcode == 0x17:    # AUIPC
-        execute_auipc(d)
+        return exec_auipc
     elif opcode == 0x6F:    # JAL
-        execute_jal(d)
+        return exec_jal
     elif opcode == 0x67:    # JALR
-        execute_jalr(d)
+        return exec_jalr
     elif opcode == 0x73:    # CSR/System
-        execute_system(d)
-    else:
-        # 未知指令，跳過
-        pc += 4
+        return exec_system
+    # 未知指令，跳過
+    return exec_skip
+
+# 資料記憶體為 PagedMemory 時，Load/Store 改用對應的分頁版本
+PAGED_HANDLERS = {
+    exec_lb: exec_lb_paged,
+    exec_lh: exec_lh_paged,
+    exec_lw: exec_lw_paged,
+    exec_lbu: exec_lbu_paged,
+    exec_lhu: exec_lhu_paged,
+    exec_load_invalid: exec_load_invalid_paged,
+    exec_sb: exec_sb_paged,
+    exec_sh: exec_sh_paged,
+    exec_sw: exec_sw_paged,
+}
 
 # ============================================================================
-# 主循環
+# 基本區塊轉譯（Basic-Block Translation）
 # ============================================================================
+# 將一段直線程式碼（止於 Branch/JAL/JALR/ECALL）產生成單一 Python 函式：
+#   def _block(R, M, L) -> next_pc
+# R = registers，M = data_memory，L = len(data_memory)（PagedMemory 時為 0，不會用到）。
+# 程式碼樣板以 handler 為 key，欄位於轉譯時代入常數。
 
-def run(max_cycles=10000):
-    """執行模擬"""
-    global pc
-    cycles = 0
+MAX_BLOCK_LEN = 256
 
-    while cycles < max_cycles and pc < len(instruction_memory) - 3:
-        # Fetch
-        inst = fetch()
+# 直線指令樣板（rd == x0 時不產生程式碼，Store 除外）
+STRAIGHT_TEMPLATES = {
+    exec_add:    "R[{rd}] = (R[{rs1}] + R[{rs2}]) & 0xFFFFFFFF",
+    exec_sub:    "R[{rd}] = (R[{rs1}] - R[{rs2}]) & 0xFFFFFFFF",
+    exec_sll:    "R[{rd}] = (R[{rs1}] << (R[{rs2}] & 0x1F)) & 0xFFFFFFFF",
+    exec_slt:    "R[{rd}] = 1 if (R[{rs1}] ^ 0x80000000) < (R[{rs2}] ^ 0x80000000) else 0",
+    exec_sltu:   "R[{rd}] = 1 if R[{rs1}] < R[{rs2}] else 0",
+    exec_xor:    "R[{rd}] = R[{rs1}] ^ R[{rs2}]",
+    exec_srl:    "R[{rd}] = R[{rs1}] >> (R[{rs2}] & 0x1F)",
+    exec_sra:    "R[{rd}] = (((R[{rs1}] ^ 0x80000000) - 0x80000000) >> (R[{rs2}] & 0x1F)) & 0xFFFFFFFF",
+    exec_or:     "R[{rd}] = R[{rs1}] | R[{rs2}]",
+    exec_and:    "R[{rd}] = R[{rs1}] & R[{rs2}]",
+    exec_mul:    "R[{rd}] = (R[{rs1}] * R[{rs2}]) & 0xFFFFFFFF",
+    exec_mulh:   "R[{rd}] = ((((R[{rs1}] ^ 0x80000000) - 0x80000000) * ((R[{rs2}] ^ 0x80000000) - 0x80000000)) >> 32) & 0xFFFFFFFF",
+    exec_mulhsu: "R[{rd}] = ((((R[{rs1}] ^ 0x80000000) - 0x80000000) * R[{rs2}]) >> 32) & 0xFFFFFFFF",
+    exec_mulhu:  "R[{rd}] = ((R[{rs1}] * R[{rs2}]) >> 32) & 0xFFFFFFFF",
+    exec_div:    "R[{rd}] = div_signed(R[{rs1}], R[{rs2}])",
+    exec_divu:   "R[{rd}] = div_unsigned(R[{rs1}], R[{rs2}])",
+    exec_rem:    "R[{rd}] = rem_signed(R[{rs1}], R[{rs2}])",
+    exec_remu:   "R[{rd}] = rem_unsigned(R[{rs1}], R[{rs2}])",
+    exec_addi:   "R[{rd}] = (R[{rs1}] + {imm}) & 0xFFFFFFFF",
+    exec_slti:   "R[{rd}] = 1 if (R[{rs1}] ^ 0x80000000) < {imm_biased} else 0",
+    exec_sltiu:  "R[{rd}] = 1 if R[{rs1}] < {imm} else 0",
+    exec_xori:   "R[{rd}] = R[{rs1}] ^ {imm}",
+    exec_ori:    "R[{rd}] = R[{rs1}] | {imm}",
+    exec_andi:   "R[{rd}] = R[{rs1}] & {imm}",
+    exec_slli:   "R[{rd}] = (R[{rs1}] << {shamt}) & 0xFFFFFFFF",
+    exec_srli:   "R[{rd}] = R[{rs1}] >> {shamt}",
+    exec_srai:   "R[{rd}] = (((R[{rs1}] ^ 0x80000000) - 0x80000000) >> {shamt}) & 0xFFFFFFFF",
+    exec_lb:     "a = (R[{rs1}] + {imm}) & 0xFFFFFFFF\n"
+                 "if a < L: R[{rd}] = ((M[a] ^ 0x80) - 0x80) & 0xFFFFFFFF",
+    exec_lh:     "a = (R[{rs1}] + {imm}) & 0xFFFFFFFF\n"
+                 "if a < L: R[{rd}] = ((((M[a] | (M[a+1] << 8)) ^ 0x8000) - 0x8000) & 0xFFFFFFFF) if a + 1 < L else 0",
+    exec_lw:     "a = (R[{rs1}] + {imm}) & 0xFFFFFFFF\n"
+                 "if a < L: R[{rd}] = (M[a] | (M[a+1] << 8) | (M[a+2] << 16) | (M[a+3] << 24)) if a + 3 < L else 0",
+    exec_lbu:    "a = (R[{rs1}] + {imm}) & 0xFFFFFFFF\n"
+                 "if a < L: R[{rd}] = M[a]",
+    exec_lhu:    "a = (R[{rs1}] + {imm}) & 0xFFFFFFFF\n"
+                 "if a < L: R[{rd}] = (M[a] | (M[a+1] << 8)) if a + 1 < L else 0",
+    exec_load_invalid: "a = (R[{rs1}] + {imm}) & 0xFFFFFFFF\n"
+                       "if a < L: R[{rd}] = 0",
+    exec_lui:    "R[{rd}] = {imm}",
+    exec_auipc:  "R[{rd}] = {auipc}",
+}
 
-        # 檢查是否為結束或 NOP
-        if inst == 0 or pc >= 0xFFFFFF00:
-            break
+STORE_TEMPLATES = {
+    exec_sb: "a = (R[{rs1}] + {imm}) & 0xFFFFFFFF\n"
+             "if a < L: M[a] = R[{rs2}] & 0xFF",
+    exec_sh: "a = (R[{rs1}] + {imm}) & 0xFFFFFFFF\n"
+             "if a + 1 < L: M[a:a+2] = (R[{rs2}] & 0xFFFF).to_bytes(2, 'little')",
+    exec_sw: "a = (R[{rs1}] + {imm}) & 0xFFFFFFFF\n"
+             "if a + 3 < L: M[a:a+4] = R[{rs2}].to_bytes(4, 'little')",
+}
+
+# 分頁記憶體的 Load/Store 樣板：rd 為 x0 的 Load 仍要存取（未映射時產生 MemoryFault）
+PAGED_TEMPLATES = {
+    exec_lb_paged:  "{dest}((M.read8({addr}) ^ 0x80) - 0x80) & 0xFFFFFFFF",
+    exec_lh_paged:  "{dest}((M.read16({addr}) ^ 0x8000) - 0x8000) & 0xFFFFFFFF",
+    exec_lw_paged:  "{dest}M.read32({addr})",
+    exec_lbu_paged: "{dest}M.read8({addr})",
+    exec_lhu_paged: "{dest}M.read16({addr})",
+    exec_load_invalid_paged: "{dest}M.read8({addr}) & 0",
+    exec_sb_paged:  "M.write8({addr}, R[{rs2}] & 0xFF)",
+    exec_sh_paged:  "M.write16({addr}, R[{rs2}] & 0xFFFF)",
+    exec_sw_paged:  "M.write32({addr}, R[{rs2}])",
+}
+
+# Branch 條件樣板（有號比較以 ^ 0x80000000 轉為無號比較）
+BRANCH_CONDITIONS = {
+    exec_beq:  "R[{rs1}] == R[{rs2}]",
+    exec_bne:  "R[{rs1}] != R[{rs2}]",
+    exec_blt:  "(R[{rs1}] ^ 0x80000000) < (R[{rs2}] ^ 0x80000000)",
+    exec_bge:  "(R[{rs1}] ^ 0x80000000) >= (R[{rs2}] ^ 0x80000000)",
+    exec_bltu: "R[{rs1}] < R[{rs2}]",
+    exec_bgeu: "R[{rs1}] >= R[{rs2}]",
+}
+
+BLOCK_NAMESPACE = {
+    'div_signed': div_signed,
+    'div_unsigned': div_unsigned,
+    'rem_signed': rem_signed,
+    'rem_unsigned': rem_unsigned,
+}
+
+# 區塊結尾指令的種類（剖析時用來統計分支與維護呼叫堆疊）
+BLOCK_BRANCH = 1        # 條件分支
+BLOCK_CALL = 2          # JAL/JALR 且 rd 為 ra/t0
+BLOCK_RETURN = 3        # JALR x0, ra/t0
+LINK_REGISTERS = (1, 5)
 
-        # Decode
-        decoded = decode(inst)
+class Block:
+    """
+    已轉譯的基本區塊；taken/fall 為串接到後繼區塊的連結。
+    pcs[i] 為產生函式第 i + 2 行（第 1 行為 def）的指令位址，用來找出產生 MemoryFault 的指令；
+    kind 為結尾指令的種類（BLOCK_*，其他為 0）
+    """
+    __slots__ = ('start', 'end', 'length', 'fn', 'taken_pc', 'fall_pc', 'taken', 'fall', 'pcs', 'kind')
 
-        # Execute
-        execute(decoded)
+    def __init__(self, start, end, length, fn, taken_pc, fall_pc, pcs=(), kind=0):
+        self.start = start
+        self.end = end
+        self.length = length
+        self.fn = fn
+        self.taken_pc = taken_pc
+        self.fall_pc = fall_pc
+        self.taken = None
+        self.fall = None
+        self.pcs = pcs
+        self.kind = kind
 
-        cycles += 1
+    def fault_pc(self, fault):
+        """由 traceback 中此區塊函式所在的行號找出產生 fault 的指令位址"""
+        tb = fault.__traceback__
+        while tb is not None:
+            if tb.tb_frame.f_code is self.fn.__code__:
+                line = tb.tb_lineno - 2
+                if 0 <= line < len(self.pcs):
+                    return self.pcs[line]
+            tb = tb.tb_next
+        return self.start
 
-    return cycles
+def template_fields(d, addr):
+    """樣板欄位：暫存器編號與轉譯時即可決定的常數"""
+    imm = d.imm & 0xFFFFFFFF
+    return {
+        'rd': d.rd, 'rs1': d.rs1, 'rs2': d.rs2,
+        'imm': imm,
+        'imm_biased': imm ^ 0x80000000,
+        'shamt': d.imm & 0x1F,
+        'auipc': (addr + d.imm) & 0xFFFFFFFF,
+        'addr': f"(R[{d.rs1}] + {imm}) & 0xFFFFFFFF",
+        'dest': f"R[{d.rd}] = " if d.rd != 0 else '',
+    }
 
 # ============================================================================
-# 輸出 Golden 檔案
+# 退休軌跡（Retirement Trace）
 # ============================================================================
+# 每道退休的指令一行 "<pc> <instr>"；寫入暫存器時附加 " x<rd>=<值>"，
+# Store 附加 " [<位址>]=<值>"（值依寫入寬度遮罩）。格式與 testbench 的 Trace.out 相同。
 
-def save_golden():
-    """產生 RF.golden 和 DM.golden"""
-    # RF.golden
-    with open('RF.golden', 'w') as f:
-        f.write("// Register File Contents with Index\n")
-        f.write("// Format: [Index] Data\n")
-        for i in range(32):
-            f.write(f"[{i}] {registers[i]:08x}\n")
-
-    # DM.golden
-    with open('DM.golden', 'w') as f:
-        f.write("// Data Memory Contents with Address\n")
-        f.write("// Format: [Address] Data\n")
-        for i in range(len(data_memory)):
-            f.write(f"[{i}] {data_memory[i]:02x}\n")
+TRACE_RD_OPCODES = frozenset((0x33, 0x13, 0x03, 0x37, 0x17, 0x6F, 0x67))
+STORE_MASKS = (0xFF, 0xFFFF) + (0xFFFFFFFF,) * 6   # 以 funct3 為索引
+
+# ============================================================================
+# 檔案載入函式
+# ============================================================================
+
+def read_hex_bytes(filename):
+    """讀取每行一個 hex byte 的 .dat 檔（略過註解與無法解析的行）"""
+    data = bytearray()
+    with open(filename, 'r', encoding='latin-1') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('//'):
+                continue
+            try:
+                value = int(line, 16)
+            except ValueError:
+                continue
+            if 0 <= value <= 0xFF:
+                data.append(value)
+    return data
+
+# 二進位映像檔（.bin）：16 bytes 標頭 + 原始記憶體內容，標頭欄位皆為小端序
+#   [0:4]   magic b'RVIM'
+#   [4]     版本（1）
+#   [5]     flags，bit 0 = 內容以大端序 word 排列（指令記憶體），否則為小端序（資料記憶體）
+#   [6:8]   標頭長度（bytes）
+#   [8:12]  載入位址
+#   [12:16] 內容長度（bytes）
+IMAGE_MAGIC = b'RVIM'
+IMAGE_VERSION = 1
+IMAGE_HEADER = struct.Struct('<4sBBHII')
+IMAGE_BIG_ENDIAN = 0x01
+
+def is_image(filename):
+    """檔案是否為二進位映像檔（以 magic 判斷）"""
+    with open(filename, 'rb') as f:
+        return f.read(len(IMAGE_MAGIC)) == IMAGE_MAGIC
+
+def swap_words(data):
+    """將內容以 32-bit word 為單位反轉位元組順序（長度不是 4 的倍數時以 0 補齊）"""
+    words = array.array('I')
+    assert words.itemsize == 4
+    words.frombytes(bytes(data) + bytes(-len(data) & 3))
+    words.byteswap()
+    return memoryview(words).cast('B')
+
+def read_image(filename, big_endian=True):
+    """
+    以 mmap 讀取二進位映像檔，回傳 (載入位址, 內容的 memoryview)，不逐 byte 解析。
+    內容的 word 排列與 big_endian 不同時才複製一份並轉換位元組順序
+    """
+    with open(filename, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mm) < IMAGE_HEADER.size:
+        raise ValueError(f"{filename}: truncated image header")
+    magic, version, flags, header_size, load_addr, size = IMAGE_HEADER.unpack_from(mm)
+    if magic != IMAGE_MAGIC or version != IMAGE_VERSION:
+        raise ValueError(f"{filename}: not a version {IMAGE_VERSION} RVIM image")
+    if header_size < IMAGE_HEADER.size or header_size + size > len(mm):
+        raise ValueError(f"{filename}: image payload ({size} bytes) exceeds file size")
+    data = memoryview(mm)[header_size:header_size + size]
+    if bool(flags & IMAGE_BIG_ENDIAN) != big_endian:
+        data = swap_words(data)
+    return load_addr, data
+
+def image_header(size, load_addr=0, big_endian=True):
+    """內容長度為 size bytes 的二進位映像檔標頭（Instr_Transfer / dat2coe 也以此寫檔）"""
+    return IMAGE_HEADER.pack(IMAGE_MAGIC, IMAGE_VERSION, IMAGE_BIG_ENDIAN if big_endian else 0,
+                             IMAGE_HEADER.size, load_addr, size)
+
+def write_image(filename, data, load_addr=0, big_endian=True):
+    """將記憶體內容寫成二進位映像檔"""
+    with open(filename, 'wb') as f:
+        f.write(image_header(len(data), load_addr, big_endian))
+        f.write(data)
+
+def read_memory_file(filename, big_endian=True):
+    """讀取 .dat（每行一個 hex byte）或二進位映像檔，回傳 (載入位址, 內容)"""
+    if is_image(filename):
+        return read_image(filename, big_endian)
+    return 0, read_hex_bytes(filename)
+
+# ============================================================================
+# 分頁記憶體（Paged Memory）
+# ============================================================================
+# 稀疏的 32-bit 位址空間：只有映射過的區域可以存取，頁面在第一次存取時才配置。
+# 每頁為 PAGE_SIZE 的 bytearray（區域最後一頁只配置到區域結尾）；little-endian 主機上
+# 另以 memoryview.cast('I') 存取同一頁，對齊的 word 讀寫一次完成。
+
+PAGE_BITS = 12
+PAGE_SIZE = 1 << PAGE_BITS
+PAGE_MASK = PAGE_SIZE - 1
+WORD_VIEWS = sys.byteorder == 'little'
+
+# RTL/SYSTEM_DEF.vh
+BRAM_DEPTH = dat2coe.BRAM_DEPTH             # BRAM word 數（由 dat2coe.py 從 SYSTEM_DEF.vh 讀出）
+DATA_MEM_SIZE = dat2coe.SYSTEM_DEFINES.get('DATA_MEM_SIZE', 32)  # D_BRAM 實際容量（bytes）
+BRAM_REGIONS = ((0, 4 * BRAM_DEPTH),)       # 與 BRAM 位址空間相同大小的資料區域
+
+class MemoryFault(Exception):
+    """存取未映射的位址"""
+
+    def __init__(self, addr, size, write, pc=None):
+        super().__init__(addr, size, write, pc)
+        self.addr = addr
+        self.size = size
+        self.write = write
+        self.pc = pc
+
+    def __str__(self):
+        kind = 'write' if self.write else 'read'
+        where = f" at pc 0x{self.pc:08x}" if self.pc is not None else ''
+        return f"unmapped {self.size}-byte {kind} of 0x{self.addr:08x}{where}"
+
+class PagedMemory:
+    """
+    以頁表（頁號 → bytearray）表示的資料記憶體。regions 為 (base, size) 的序列，
+    base 須對齊 PAGE_SIZE、size 須為 4 的倍數；存取區域以外的位址產生 MemoryFault
+    """
+    __slots__ = ('regions', 'pages', 'words')
+
+    def __init__(self, regions=((0, DATA_MEM_SIZE),)):
+        self.regions = []
+        self.pages = {}
+        self.words = {}
+        for base, size in regions:
+            self.map(base, size)
+
+    def map(self, base, size):
+        """映射 [base, base + size)"""
+        end = base + size
+        if base & PAGE_MASK or size <= 0 or size & 3 or end > 1 << 32:
+            raise ValueError(f"region 0x{base:08x}+0x{size:x} must start on a {PAGE_SIZE}-byte page "
+                             f"and have a positive size that is a multiple of 4")
+        for b, e in self.regions:
+            if base < e and b < end:
+                raise ValueError(f"region 0x{base:08x}+0x{size:x} overlaps 0x{b:08x}-0x{e:08x}")
+        self.regions.append((base, end))
+
+    def clear(self):
+        """釋放所有頁面（內容歸零），保留映射"""
+        self.pages.clear()
+        self.words.clear()
+
+    def page(self, addr):
+        """回傳 addr 所在的頁面（必要時配置），未映射時回傳 None"""
+        n = addr >> PAGE_BITS
+        p = self.pages.get(n)
+        if p is None:
+            start = n << PAGE_BITS
+            for base, end in self.regions:
+                if base <= start < end:
+                    p = bytearray(min(PAGE_SIZE, end - start))
+                    break
+            else:
+                return None
+            self.pages[n] = p
+            if WORD_VIEWS:
+                self.words[n] = memoryview(p).cast('I')
+        return p if (addr & PAGE_MASK) < len(p) else None
+
+    # 一般路徑：逐 byte，跨頁、未對齊或頁面尚未配置時使用
+
+    def read(self, addr, size):
+        """讀取 size bytes（小端序）"""
+        value = 0
+        for i in range(size):
+            a = (addr + i) & 0xFFFFFFFF
+            p = self.page(a)
+            if p is None:
+                raise MemoryFault(addr, size, False)
+            value |= p[a & PAGE_MASK] << (8 * i)
+        return value
+
+    def write(self, addr, size, value):
+        """寫入 size bytes（小端序）；任何一個 byte 未映射時整筆不寫入"""
+        targets = []
+        for i in range(size):
+            a = (addr + i) & 0xFFFFFFFF
+            p = self.page(a)
+            if p is None:
+                raise MemoryFault(addr, size, True)
+            targets.append((p, a & PAGE_MASK))
+        for i, (p, offset) in enumerate(targets):
+            p[offset] = (value >> (8 * i)) & 0xFF
+
+    # 快速路徑：頁面已配置且存取不跨頁
+
+    def read8(self, addr):
+        p = self.pages.get(addr >> PAGE_BITS)
+        if p is not None:
+            offset = addr & PAGE_MASK
+            if offset < len(p):
+                return p[offset]
+        return self.read(addr, 1)
+
+    def read16(self, addr):
+        p = self.pages.get(addr >> PAGE_BITS)
+        if p is not None:
+            offset = addr & PAGE_MASK
+            if offset + 1 < len(p):
+                return p[offset] | (p[offset + 1] << 8)
+        return self.read(addr, 2)
+
+    def read32(self, addr):
+        if not addr & 3:
+            w = self.words.get(addr >> PAGE_BITS)
+            if w is not None:
+                i = (addr & PAGE_MASK) >> 2
+                if i < len(w):
+                    return w[i]
+        return self.read(addr, 4)
+
+    def write8(self, addr, value):
+        p = self.pages.get(addr >> PAGE_BITS)
+        if p is not None:
+            offset = addr & PAGE_MASK
+            if offset < len(p):
+                p[offset] = value
+                return
+        self.write(addr, 1, value)
+
+    def write16(self, addr, value):
+        p = self.pages.get(addr >> PAGE_BITS)
+        if p is not None:
+            offset = addr & PAGE_MASK
+            if offset + 1 < len(p):
+                p[offset] = value & 0xFF
+                p[offset + 1] = value >> 8
+                return
+        self.write(addr, 2, value)
+
+    def write32(self, addr, value):
+        if not addr & 3:
+            w = self.words.get(addr >> PAGE_BITS)
+            if w is not None:
+                i = (addr & PAGE_MASK) >> 2
+                if i < len(w):
+                    w[i] = value
+                    return
+        self.write(addr, 4, value)
+
+    # 區塊載入/讀出
+
+    def load(self, base, data):
+        """把 data 寫入 [base, base + len(data))"""
+        i = 0
+        while i < len(data):
+            a = (base + i) & 0xFFFFFFFF
+            p = self.page(a)
+            if p is None:
+                raise MemoryFault(a, len(data) - i, True)
+            offset = a & PAGE_MASK
+            n = min(len(data) - i, len(p) - offset)
+            p[offset:offset + n] = data[i:i + n]
+            i += n
+
+    def dump(self, base, size):
+        """讀出 [base, base + size) 的內容"""
+        out = bytearray()
+        while len(out) < size:
+            a = (base + len(out)) & 0xFFFFFFFF
+            p = self.page(a)
+            if p is None:
+                raise MemoryFault(a, size - len(out), False)
+            offset = a & PAGE_MASK
+            out += p[offset:offset + min(size - len(out), len(p) - offset)]
+        return bytes(out)
+
+# ============================================================================
+# 執行剖析
+# ============================================================================
+
+class Profile:
+    """
+    Machine.run(profile=...) 收集的剖析資料。執行時只以區塊為單位計數，結束後再展開成每個 PC：
+      frames     呼叫堆疊（各層函式入口位址的 tuple）→ {Block: 執行次數}
+      stepped    (呼叫堆疊, pc) → 逐指令執行的次數（未對齊 PC、剩餘步數不足一個區塊）
+      taken      Block → 以 taken_pc 離開的次數（結尾為條件分支時即 taken 次數）
+      step_taken 逐指令執行的條件分支 pc → taken 次數
+      addresses  Load/Store 的 pc → 存取位址（array('I')）
+    JAL/JALR 的 rd 為 ra/t0 時視為呼叫、JALR x0, ra/t0 視為返回。
+    剖析用的區塊（含位址 probe）快取在 Profile 內，不影響一般執行的轉譯快取
+    """
+
+    def __init__(self):
+        self.frames = {}
+        self.stepped = {}
+        self.taken = {}
+        self.step_taken = {}
+        self.addresses = {}
+        self.stack = None
+        self.blocks = {}
+        self.table = None
+
+    def count_step(self, stack, pc, d=None, addr=0, next_pc=0):
+        """記錄一道逐指令執行的指令"""
+        key = (stack, pc)
+        self.stepped[key] = self.stepped.get(key, 0) + 1
+        if d is None:
+            return
+        if d.opcode in (0x03, 0x23):
+            self.addresses.setdefault(pc, array.array('I')).append(addr)
+        elif d.opcode == 0x63:
+            self.step_taken[pc] = self.step_taken.get(pc, 0) + (next_pc != pc + 4)
+
+    def pc_counts(self, by_stack=False):
+        """每個 PC 的執行次數；by_stack 時 key 為 (呼叫堆疊, pc)"""
+        counts = {}
+        for stack, frame in self.frames.items():
+            for blk, n in frame.items():
+                for pc in range(blk.start, blk.end, 4):
+                    key = (stack, pc) if by_stack else pc
+                    counts[key] = counts.get(key, 0) + n
+        for (stack, pc), n in self.stepped.items():
+            key = (stack, pc) if by_stack else pc
+            counts[key] = counts.get(key, 0) + n
+        return counts
+
+    def branch_counts(self):
+        """條件分支的 {pc: (執行次數, taken 次數)}"""
+        executed = {}
+        taken = dict(self.step_taken)
+        for (stack, pc), n in self.stepped.items():
+            if pc in self.step_taken:
+                executed[pc] = executed.get(pc, 0) + n
+        for frame in self.frames.values():
+            for blk, n in frame.items():
+                if blk.kind == BLOCK_BRANCH:
+                    executed[blk.end - 4] = executed.get(blk.end - 4, 0) + n
+        for blk, n in self.taken.items():
+            if blk.kind == BLOCK_BRANCH:
+                taken[blk.end - 4] = taken.get(blk.end - 4, 0) + n
+        return {pc: (n, taken.get(pc, 0)) for pc, n in sorted(executed.items())}
+
+# ============================================================================
+# 檢查點（Checkpoint）
+# ============================================================================
+# Machine.checkpoint() / restore() 的二進位格式，所有欄位皆為小端序：
+#   標頭       magic b'RVCK'、版本、flags（bit 0 = PagedMemory）、標頭長度、PC、
+#              已執行的指令數、指令記憶體大小、平面資料記憶體大小、區域數、區段數
+#   暫存器     x0-x31
+#   區域       PagedMemory 的 (base, end)，每個 8 bytes
+#   區段       (種類, base, 長度) + 內容；種類 0 為指令記憶體（大端序 word），1 為資料記憶體。
+#              指令記憶體去掉結尾的 0；資料記憶體以 PAGE_SIZE 為單位，只存內容不全為 0 的頁面
+# 模型沒有 CSR 狀態（CSR 指令與 ECALL 相同地停止執行），因此檢查點不含 CSR
+
+CHECKPOINT_MAGIC = b'RVCK'
+CHECKPOINT_VERSION = 1
+CHECKPOINT_HEADER = struct.Struct('<4sBBHIQIIII')
+CHECKPOINT_REGISTERS = struct.Struct('<32I')
+CHECKPOINT_REGION = struct.Struct('<II')
+CHECKPOINT_SEGMENT = struct.Struct('<BxxxII')
+CHECKPOINT_PAGED = 0x01
+SEGMENT_IM = 0
+SEGMENT_DM = 1
+
+# ============================================================================
+# 模擬器核心
+# ============================================================================
+
+class Machine:
+    """
+    單一 hart 的 RV32IM 模擬器；可在同一個 process 中建立多個實例。
+    預設的資料記憶體為 dm_size bytes 的 bytearray，越界存取與 RTL 相同地被忽略；
+    給定 regions（(base, size) 的序列，例如 BRAM_REGIONS）時改用 PagedMemory，
+    可使用整個 32-bit 位址空間，存取未映射位址時產生 MemoryFault
+    """
+    __slots__ = ('instruction_memory', 'data_memory', 'registers', 'pc',
+                 'decoded_table', 'block_cache', 'paged')
+
+    def __init__(self, im_size=256, dm_size=32, regions=None):
+        self.instruction_memory = bytearray(im_size)
+        self.paged = regions is not None
+        self.data_memory = PagedMemory(regions) if self.paged else bytearray(dm_size)
+        self.registers = [0] * 32          # x0-x31
+        self.pc = 0
+        self.decoded_table = []            # 預解碼表，以 pc >> 2 為索引
+        self.block_cache = {}              # 已轉譯的基本區塊，以起始 PC 為 key
+
+    def reset(self):
+        """清除暫存器、PC 與資料記憶體；保留指令記憶體及其解碼/轉譯快取"""
+        self.registers[:] = [0] * 32
+        self.pc = 0
+        if self.paged:
+            self.data_memory.clear()
+        else:
+            self.data_memory[:] = bytes(len(self.data_memory))
+
+    # ------------------------------------------------------------------------
+    # 記憶體載入
+    # ------------------------------------------------------------------------
+
+    def load_im(self, filename='IM.dat'):
+        """讀取指令記憶體（大端序）；.dat 或二進位映像檔"""
+        base, data = read_memory_file(filename, big_endian=True)
+        self.load_im_bytes(data, base)
+
+    def load_dm(self, filename='DM.dat'):
+        """讀取資料記憶體（小端序）；.dat 或二進位映像檔"""
+        base, data = read_memory_file(filename, big_endian=False)
+        self.load_dm_bytes(data, base)
+
+    @staticmethod
+    def fill(memory, data, base):
+        """將 data 放到 memory[base:]，其餘清為 0，超出容量的部分捨棄"""
+        size = len(memory)
+        base = min(base, size)
+        n = min(len(data), size - base)
+        memory[:base] = bytes(base)
+        memory[base:base + n] = data[:n]
+        memory[base + n:] = bytes(size - base - n)
+
+    def load_im_bytes(self, data, base=0):
+        """以位元組內容載入指令記憶體（自位址 base 起），超出容量的部分捨棄"""
+        self.fill(self.instruction_memory, data, base)
+        self.predecode()
+
+    def load_dm_bytes(self, data, base=0):
+        """以位元組內容載入資料記憶體（自位址 base 起），超出容量的部分捨棄（PagedMemory 時越界產生 MemoryFault）"""
+        if self.paged:
+            self.data_memory.clear()
+            self.data_memory.load(base, data)
+            return
+        self.fill(self.data_memory, data, base)
+
+    # ------------------------------------------------------------------------
+    # Fetch 與預解碼快取
+    # ------------------------------------------------------------------------
+
+    def fetch(self, addr):
+        """從 addr 讀取 32-bit 指令（大端序）"""
+        im = self.instruction_memory
+        return (im[addr] << 24) | (im[addr+1] << 16) | (im[addr+2] << 8) | im[addr+3]
+
+    def decode_at(self, addr):
+        """解碼 addr 處的指令；資料記憶體為 PagedMemory 時換上分頁版本的 Load/Store handler"""
+        d = decode(self.fetch(addr))
+        if self.paged:
+            d.handler = PAGED_HANDLERS.get(d.handler, d.handler)
+        return d
+
+    def predecode(self):
+        """
+        建立以 pc >> 2 為索引的解碼表。各項目在第一次 lookup 時才解碼，
+        載入大型映像檔時只需付出實際執行到的指令的解碼成本
+        """
+        self.decoded_table = [None] * (len(self.instruction_memory) >> 2)
+        self.flush_blocks()
+
+    def invalidate_predecode(self, addr, size=4):
+        """指令記憶體被寫入時，使涵蓋 [addr, addr+size) 的解碼紀錄失效"""
+        first = addr >> 2
+        last = min((addr + size - 1) >> 2, len(self.decoded_table) - 1)
+        for idx in range(first, last + 1):
+            self.decoded_table[idx] = None
+        self.flush_blocks()
+
+    def lookup(self, addr):
+        """取得 addr 處的解碼紀錄，失效或未對齊時重新解碼"""
+        if addr & 3:
+            return self.decode_at(addr)
+        d = self.decoded_table[addr >> 2]
+        if d is None:
+            d = self.decode_at(addr)
+            self.decoded_table[addr >> 2] = d
+        return d
+
+    # ------------------------------------------------------------------------
+    # 基本區塊轉譯
+    # ------------------------------------------------------------------------
+
+    def translate_block(self, start, probe=None):
+        """
+        從 start 開始找出基本區塊並編譯成 Block；無法轉譯時回傳 None。
+        給定 probe（pc → array('I') 的 dict）時，每個 Load/Store 先把存取位址附加到 probe[pc]
+        """
+        limit = len(self.instruction_memory) - 3
+        lines = []
+        pcs = []
+        namespace = dict(BLOCK_NAMESPACE)
+        addr = start
+        length = 0
+        taken_pc = None
+        fall_pc = None
+        terminated = False
+        kind = 0
+
+        while addr < limit and length < MAX_BLOCK_LEN:
+            d = self.lookup(addr)
+            if d.raw == 0:
+                break
+            h = d.handler
+            fields = template_fields(d, addr)
+            length += 1
+            addr += 4
+
+            # probe 行先算出存取位址 a，Load/Store 樣板沿用 a（略過平面記憶體樣板的第一行 a = ...）
+            probed = probe is not None and d.opcode in (0x03, 0x23)
+            if probed:
+                name = f"A{len(namespace)}"
+                namespace[name] = probe.setdefault(addr - 4, array.array('I')).append
+                lines.append(f"{name}(a := {fields['addr']})")
+                fields['addr'] = 'a'
+
+            if h in BRANCH_CONDITIONS:
+                taken_pc = (addr - 4 + d.imm) & 0xFFFFFFFF
+                fall_pc = addr
+                lines.append(f"if {BRANCH_CONDITIONS[h].format(**fields)}: return {taken_pc}")
+                lines.append(f"return {fall_pc}")
+                terminated = True
+                kind = BLOCK_BRANCH
+            elif h is exec_jal:
+                taken_pc = (addr - 4 + d.imm) & 0xFFFFFFFF
+                if d.rd != 0:
+                    lines.append(f"R[{d.rd}] = {addr & 0xFFFFFFFF}")
+                lines.append(f"return {taken_pc}")
+                terminated = True
+                kind = BLOCK_CALL if d.rd in LINK_REGISTERS else 0
+            elif h is exec_jalr:
+                lines.append(f"t = (R[{d.rs1}] + {fields['imm']}) & 0xFFFFFFFE")
+                if d.rd != 0:
+                    lines.append(f"R[{d.rd}] = {addr & 0xFFFFFFFF}")
+                lines.append("return t")
+                terminated = True
+                if d.rd in LINK_REGISTERS:
+                    kind = BLOCK_CALL
+                elif d.rd == 0 and d.rs1 in LINK_REGISTERS:
+                    kind = BLOCK_RETURN
+            elif h is exec_system:
+                lines.append("return 0xFFFFFFFF")
+                terminated = True
+            elif h in STORE_TEMPLATES:
+                lines.extend(STORE_TEMPLATES[h].format(**fields).split('\n')[probed:])
+            elif h in PAGED_TEMPLATES:
+                lines.append(PAGED_TEMPLATES[h].format(**fields))
+            elif h in STRAIGHT_TEMPLATES and d.rd != 0:
+                lines.extend(STRAIGHT_TEMPLATES[h].format(**fields).split('\n')[probed:])
+            # 其餘（rd 為 x0 或 exec_skip）不產生程式碼
+            pcs.extend([addr - 4] * (len(lines) - len(pcs)))
+
+            if terminated:
+                break
+
+        if length == 0:
+            return None
+        if not terminated:
+            # 區塊因結束字、長度上限或記憶體結尾而中止：落到下一個位址
+            fall_pc = addr
+            lines.append(f"return {addr}")
+
+        source = "def _block(R, M, L):\n" + "".join(f"    {line}\n" for line in lines)
+        exec(compile(source, f"<block 0x{start:08x}>", 'exec'), namespace)
+        return Block(start, addr, length, namespace['_block'], taken_pc, fall_pc, tuple(pcs), kind)
+
+    def get_block(self, addr, cache=None, probe=None):
+        """自快取（預設為 block_cache）取得 addr 起始的區塊，必要時轉譯"""
+        if cache is None:
+            cache = self.block_cache
+        blk = cache.get(addr)
+        if blk is None and not addr & 3 and addr < len(self.instruction_memory) - 3:
+            blk = self.translate_block(addr, probe)
+            if blk is not None:
+                cache[addr] = blk
+        return blk
+
+    def flush_blocks(self):
+        """清除所有已轉譯區塊與其串接"""
+        for blk in self.block_cache.values():
+            blk.taken = None
+            blk.fall = None
+        self.block_cache.clear()
+
+    # ------------------------------------------------------------------------
+    # 主循環
+    # ------------------------------------------------------------------------
+
+    def step(self):
+        """執行一道指令；遇到結束字或 PC 越界時回傳 False"""
+        if self.pc >= len(self.instruction_memory) - 3:
+            return False
+        decoded = self.lookup(self.pc)
+        # 檢查是否為結束或 NOP
+        if decoded.raw == 0 or self.pc >= 0xFFFFFF00:
+            return False
+        try:
+            decoded.handler(self, decoded)
+        except MemoryFault as e:
+            e.pc = self.pc
+            raise
+        return True
+
+    def halted(self):
+        """程式是否已結束（ECALL/EBREAK、結束字或 PC 越界）；False 表示因步數上限而中止"""
+        if self.pc >= len(self.instruction_memory) - 3:
+            return True
+        return self.lookup(self.pc).raw == 0
+
+    def interpret(self, max_steps=10000):
+        """逐指令執行（預解碼表 + handler）"""
+        steps = 0
+
+        if len(self.decoded_table) != len(self.instruction_memory) >> 2:
+            self.predecode()
+
+        limit = len(self.instruction_memory) - 3
+        while steps < max_steps and self.pc < limit:
+            # Fetch & Decode（查預解碼表）
+            decoded = self.lookup(self.pc)
+
+            # 檢查是否為結束或 NOP
+            if decoded.raw == 0 or self.pc >= 0xFFFFFF00:
+                break
+
+            # Execute（直接呼叫解碼時綁定的 handler）
+            try:
+                decoded.handler(self, decoded)
+            except MemoryFault as e:
+                e.pc = self.pc
+                raise
+
+            steps += 1
+
+        return steps
+
+    def run(self, max_steps=10000, profile=None):
+        """
+        執行模擬（以基本區塊為單位，剩餘步數不足一個區塊時改為逐指令執行）。
+        給定 Profile 時改由 run_profiled 執行並記錄剖析資料
+        """
+        if profile is not None:
+            return self.run_profiled(profile, max_steps)
+        steps = 0
+
+        if len(self.decoded_table) != len(self.instruction_memory) >> 2:
+            self.predecode()
+
+        R = self.registers
+        M = self.data_memory
+        L = 0 if self.paged else len(M)
+        limit = len(self.instruction_memory) - 3
+        pc = self.pc
+        blk = None
+
+        while steps < max_steps and pc < limit:
+            if blk is None:
+                blk = self.get_block(pc)
+                if blk is None:
+                    # 未對齊 PC 或結束字：逐指令執行一步
+                    self.pc = pc
+                    if not self.step():
+                        break
+                    pc = self.pc
+                    steps += 1
+                    continue
+            if blk.length > max_steps - steps:
+                self.pc = pc
+                return steps + self.interpret(max_steps - steps)
+
+            try:
+                pc = blk.fn(R, M, L)
+            except MemoryFault as e:
+                # 區塊內在 fault 之前的指令已經生效，PC 停在產生 fault 的指令
+                self.pc = e.pc = blk.fault_pc(e)
+                raise
+            steps += blk.length
+
+            # 區塊串接
+            if pc == blk.taken_pc:
+                if blk.taken is None:
+                    blk.taken = self.get_block(pc)
+                blk = blk.taken
+            elif pc == blk.fall_pc:
+                if blk.fall is None:
+                    blk.fall = self.get_block(pc)
+                blk = blk.fall
+            else:
+                blk = None
+
+        self.pc = pc
+        return steps
+
+    def run_profiled(self, profile, max_steps=10000):
+        """與 run() 相同，另外把區塊執行次數、分支結果、呼叫堆疊與存取位址記錄到 profile"""
+        steps = 0
+
+        if len(self.decoded_table) != len(self.instruction_memory) >> 2:
+            self.predecode()
+        if profile.table is not self.decoded_table:
+            # 重新載入指令記憶體後，先前以 probe 轉譯的區塊已失效
+            profile.blocks.clear()
+            profile.table = self.decoded_table
+
+        R = self.registers
+        M = self.data_memory
+        L = 0 if self.paged else len(M)
+        limit = len(self.instruction_memory) - 3
+        pc = self.pc
+        stack = profile.stack or (pc,)
+        frames = profile.frames
+        frame = frames.setdefault(stack, {})
+        taken = profile.taken
+        blk = None
+
+        while steps < max_steps and pc < limit:
+            if blk is None:
+                blk = self.get_block(pc, profile.blocks, profile.addresses)
+            if blk is None or blk.length > max_steps - steps:
+                # 未對齊 PC、結束字或剩餘步數不足一個區塊（含串接而來的區塊）：逐指令執行一步
+                blk = None
+                self.pc = pc
+                d = self.lookup(pc)
+                a = (R[d.rs1] + d.imm) & 0xFFFFFFFF
+                if not self.step():
+                    break
+                profile.count_step(stack, pc, d, a, self.pc)
+                pc = self.pc
+                steps += 1
+                continue
+
+            try:
+                pc = blk.fn(R, M, L)
+            except MemoryFault as e:
+                self.pc = e.pc = blk.fault_pc(e)
+                for addr in range(blk.start, e.pc, 4):
+                    profile.count_step(stack, addr)
+                profile.stack = stack
+                raise
+            steps += blk.length
+            frame[blk] = frame.get(blk, 0) + 1
+
+            # 呼叫堆疊
+            if blk.kind > BLOCK_BRANCH:
+                if blk.kind == BLOCK_CALL:
+                    stack += (pc,)
+                elif len(stack) > 1:
+                    stack = stack[:-1]
+                frame = frames.setdefault(stack, {})
+
+            # 區塊串接
+            if pc == blk.taken_pc:
+                taken[blk] = taken.get(blk, 0) + 1
+                if blk.taken is None:
+                    blk.taken = self.get_block(pc, profile.blocks, profile.addresses)
+                blk = blk.taken
+            elif pc == blk.fall_pc:
+                if blk.fall is None:
+                    blk.fall = self.get_block(pc, profile.blocks, profile.addresses)
+                blk = blk.fall
+            else:
+                blk = None
+
+        self.pc = pc
+        profile.stack = stack
+        return steps
+
+    def trace(self, path='Trace.golden', max_steps=10000):
+        """逐指令執行並把每道退休指令寫入退休軌跡檔 path，回傳執行的指令數"""
+        steps = 0
+
+        if len(self.decoded_table) != len(self.instruction_memory) >> 2:
+            self.predecode()
+
+        R = self.registers
+        limit = len(self.instruction_memory) - 3
+        with open(path, 'w') as f:
+            while steps < max_steps and self.pc < limit:
+                pc = self.pc
+                decoded = self.lookup(pc)
+                if decoded.raw == 0 or pc >= 0xFFFFFF00:
+                    break
+
+                line = f"{pc:08x} {decoded.raw:08x}"
+                if decoded.opcode == 0x23:
+                    addr = (R[decoded.rs1] + decoded.imm) & 0xFFFFFFFF
+                    line += f" [{addr:08x}]={R[decoded.rs2] & STORE_MASKS[decoded.funct3]:08x}"
+                try:
+                    decoded.handler(self, decoded)
+                except MemoryFault as e:
+                    e.pc = pc
+                    raise
+                if decoded.opcode in TRACE_RD_OPCODES and decoded.rd != 0:
+                    line += f" x{decoded.rd}={R[decoded.rd]:08x}"
+                f.write(line + "\n")
+
+                steps += 1
+
+        return steps
+
+    # ------------------------------------------------------------------------
+    # 檢查點
+    # ------------------------------------------------------------------------
+
+    def checkpoint(self, path, instret=0):
+        """將 PC、暫存器與指令/資料記憶體寫成檢查點檔；instret 為到達此狀態時已執行的指令數"""
+        segments = [(SEGMENT_IM, 0, self.instruction_memory.rstrip(b'\0'))]
+        if self.paged:
+            regions = self.data_memory.regions
+            pages = sorted(self.data_memory.pages.items())
+        else:
+            regions = ()
+            dm = self.data_memory
+            pages = [(n >> PAGE_BITS, dm[n:n + PAGE_SIZE]) for n in range(0, len(dm), PAGE_SIZE)]
+        for n, p in pages:
+            if p.count(0) != len(p):
+                segments.append((SEGMENT_DM, n << PAGE_BITS, p))
+
+        with open(path, 'wb') as f:
+            f.write(CHECKPOINT_HEADER.pack(
+                CHECKPOINT_MAGIC, CHECKPOINT_VERSION, CHECKPOINT_PAGED if self.paged else 0,
+                CHECKPOINT_HEADER.size, self.pc, instret, len(self.instruction_memory),
+                0 if self.paged else len(self.data_memory), len(regions), len(segments)))
+            f.write(CHECKPOINT_REGISTERS.pack(*self.registers))
+            for base, end in regions:
+                f.write(CHECKPOINT_REGION.pack(base, end))
+            for kind, base, data in segments:
+                f.write(CHECKPOINT_SEGMENT.pack(kind, base, len(data)))
+                f.write(data)
+
+    def restore(self, path):
+        """
+        自檢查點檔還原狀態並回傳 instret；記憶體大小與區域依檢查點重新設定。
+        指令記憶體與資料記憶體種類都沒變時保留解碼表與已轉譯的區塊
+        """
+        with open(path, 'rb') as f:
+            data = memoryview(f.read())
+        if len(data) < CHECKPOINT_HEADER.size:
+            raise ValueError(f"{path}: truncated checkpoint header")
+        (magic, version, flags, offset, pc, instret, im_size, dm_size,
+         region_count, segment_count) = CHECKPOINT_HEADER.unpack_from(data)
+        if magic != CHECKPOINT_MAGIC or version != CHECKPOINT_VERSION:
+            raise ValueError(f"{path}: not a version {CHECKPOINT_VERSION} RVCK checkpoint")
+
+        self.registers[:] = CHECKPOINT_REGISTERS.unpack_from(data, offset)
+        self.registers[0] = 0
+        offset += CHECKPOINT_REGISTERS.size
+        regions = []
+        for _ in range(region_count):
+            regions.append(CHECKPOINT_REGION.unpack_from(data, offset))
+            offset += CHECKPOINT_REGION.size
+
+        paged = bool(flags & CHECKPOINT_PAGED)
+        if paged:
+            if self.paged and self.data_memory.regions == regions:
+                self.data_memory.clear()
+            else:
+                self.data_memory = PagedMemory((base, end - base) for base, end in regions)
+        elif not self.paged and len(self.data_memory) == dm_size:
+            self.data_memory[:] = bytes(dm_size)
+        else:
+            self.data_memory = bytearray(dm_size)
+
+        im = bytearray(im_size)
+        for _ in range(segment_count):
+            kind, base, size = CHECKPOINT_SEGMENT.unpack_from(data, offset)
+            offset += CHECKPOINT_SEGMENT.size
+            if offset + size > len(data):
+                raise ValueError(f"{path}: segment at 0x{base:08x} ({size} bytes) exceeds file size")
+            segment = data[offset:offset + size]
+            offset += size
+            if kind == SEGMENT_IM:
+                im[base:base + size] = segment
+            elif paged:
+                self.data_memory.load(base, segment)
+            else:
+                self.data_memory[base:base + size] = segment
+
+        if im != self.instruction_memory or paged != self.paged:
+            self.instruction_memory = im
+            self.paged = paged
+            self.predecode()
+        self.pc = pc
+        return instret
+
+    def save_state(self, path='State.mem', dm_size=DATA_MEM_SIZE):
+        """
+        產生 State.mem（$readmemh 格式）：x0-x31、PC 與資料記憶體前 dm_size bytes（小端序 word），
+        RISCV_PROCESSOR_tb 在 reset 後載入，從目前的狀態開始 RTL 模擬
+        """
+        if self.paged:
+            dm = self.data_memory.dump(0, dm_size)
+        else:
+            dm = bytes(self.data_memory[:dm_size]).ljust(dm_size, b'\0')
+        words = struct.unpack(f'<{dm_size // 4}I', dm)
+        with open(path, 'w') as f:
+            f.write("// x0-x31, PC, data memory (little-endian words)\n")
+            f.write(''.join(f"{value:08x}\n" for value in (*self.registers, self.pc, *words)))
+
+    # ------------------------------------------------------------------------
+    # 輸出 Golden 檔案
+    # ------------------------------------------------------------------------
+
+    def save_golden(self, rf_path='RF.golden', dm_path='DM.golden', binary=False):
+        """
+        產生 RF.golden 和 DM.golden。binary=True 時另外寫出原始傾印 <rf_path>.bin（x0-x31，小端序 word）
+        與 <dm_path>.bin（資料記憶體 bytes，同 RISCV_PROCESSOR_tb 的 +BIN_DUMP），供 Verify_Script.py 以
+        NumPy 直接載入比對；分頁記憶體的區域不是自位址 0 起連續時不寫 DM 的傾印（比對時改用文字格式）
+        """
+        # RF.golden
+        with open(rf_path, 'w') as f:
+            f.write("// Register File Contents with Index\n")
+            f.write("// Format: [Index] Data\n")
+            for i in range(32):
+                f.write(f"[{i}] {self.registers[i]:08x}\n")
+
+        # DM.golden
+        with open(dm_path, 'w') as f:
+            f.write("// Data Memory Contents with Address\n")
+            f.write("// Format: [Address] Data\n")
+            if self.paged:
+                for base, end in self.data_memory.regions:
+                    for i, value in enumerate(self.data_memory.dump(base, end - base), base):
+                        f.write(f"[{i}] {value:02x}\n")
+            else:
+                for i in range(len(self.data_memory)):
+                    f.write(f"[{i}] {self.data_memory[i]:02x}\n")
+
+        # 傾印在文字檔之後寫出：Verify_Script.py 只採用不比對應文字檔舊的傾印
+        if binary:
+            self.save_golden_bin(rf_path + '.bin', dm_path + '.bin')
+
+    def save_golden_bin(self, rf_path='RF.golden.bin', dm_path='DM.golden.bin'):
+        """產生 RF.golden.bin 和 DM.golden.bin（原始傾印，說明見 save_golden）"""
+        with open(rf_path, 'wb') as f:
+            f.write(struct.pack('<32I', *self.registers))
+
+        if self.paged:
+            regions = self.data_memory.regions
+            if any(base != end for (_, end), (base, _) in zip([(0, 0)] + regions, regions)):
+                if os.path.exists(dm_path):
+                    os.remove(dm_path)
+                return
+            dm = b''.join(self.data_memory.dump(base, end - base) for base, end in regions)
+        else:
+            dm = self.data_memory
+        with open(dm_path, 'wb') as f:
+            f.write(dm)
 
 # ============================================================================
 # 主程式
 # ============================================================================
 
 if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='產生 RF.golden 和 DM.golden')
+    parser.add_argument('--checkpoint-at', type=int, default=None, metavar='N',
+                        help='執行 N 道指令後把狀態寫入 --checkpoint 檔，再繼續執行到結束')
+    parser.add_argument('--checkpoint', default='Checkpoint.bin', help='檢查點檔（預設 Checkpoint.bin）')
+    parser.add_argument('--restore', default=None, metavar='FILE',
+                        help='自檢查點檔還原後繼續執行（不讀取 IM.dat / DM.dat）')
+    args = parser.parse_args()
+
     print("=" * 50)
     print("RISC-V RV32I Golden Reference Generator")
     print("=" * 50)
 
-    print("\n[1/4] Loading instruction memory...")
-    load_im('IM.dat')
-    print(f"  Loaded {sum(1 for b in instruction_memory if b != 0)} bytes")
+    machine = Machine()
+    instret = 0
+
+    if args.restore:
+        print(f"\n[1/4] Restoring checkpoint {args.restore}...")
+        instret = machine.restore(args.restore)
+        print(f"  PC 0x{machine.pc:08x} after {instret} instructions")
+        print("[2/4] Data memory restored from checkpoint")
+    else:
+        print("\n[1/4] Loading instruction memory...")
+        machine.load_im('IM.dat')
+        print(f"  Loaded {sum(1 for b in machine.instruction_memory if b != 0)} bytes")
 
-    print("[2/4] Loading data memory...")
-    load_dm('DM.dat')
-    print(f"  Loaded {sum(1 for b in data_memory if b != 0)} bytes")
+        print("[2/4] Loading data memory...")
+        machine.load_dm('DM.dat')
+        print(f"  Loaded {sum(1 for b in machine.data_memory if b != 0)} bytes")
 
     print("[3/4] Running simulation...")
-    cycles = run()
+    if args.checkpoint_at is not None:
+        instret += machine.run(max(0, args.checkpoint_at - instret))
+        machine.checkpoint(args.checkpoint, instret)
+        print(f"  Checkpoint at {instret} instructions (PC 0x{machine.pc:08x}) → {args.checkpoint}")
+    cycles = instret + machine.run()
     print(f"  Simulation done: {cycles} cycles")
 
     print("[4/4] Saving golden output...")
-    save_golden()
+    machine.save_golden()
     print("  RF.golden created")
     print("  DM.golden created")
 
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""
+RISC-V 五級管線週期模型（cycle-approximate）
+以 Golden_Result.Machine 提供運算結果（分支方向、跳躍目標、Load/Store 位址），
+逐週期重現 RTL 的控制路徑：
+  - IF：I_Cache 狀態機（命中 0 週期，miss 經 AXI 逐 word 補齊一條 cache line）、
+        BHT/BTB 預測（以 IF_PC[5:0] 為索引，與 BHT.v/BTB.v 相同）
+  - ID：Hazard_Unit 的 load-use stall、Control 的 IF_ID/ID_EX flush，
+        以及 I-Cache 未命中時 ID 指令重複送入 EX（rs1 == rd 時 flush）的行為
+  - EX：分支/跳躍於 EX 決定，預測錯誤時 flush 兩個週期；Forwarding_Unit 的
+        EX/MEM、MEM/WB 轉送路徑使其餘 RAW 相依不需 stall
+  - MEM：D_Cache 狀態機（write-through，讀 miss 補齊 cache line），D_Cache_Busy 時凍結整條管線
+輸出總週期數、CPI 以及每個週期的歸因（issue / 各類 stall）。
+
+直接執行時以 TestCase1-12 跑模型，並與 RTL_CYCLES 中記錄的 RTL 週期數比對，任何一個不同即以
+非 0 結束；--rtl-dir 改為讀取 Verify_Script.py 留在 <dir>/TestCase<n>/RF.out 的
+"// Status: HALT <cycles>"（修改 RTL 後用來重新取得 RTL_CYCLES）。
+"""
+
+import argparse
+import os
+import re
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import Golden_Result as golden
+from dat2coe import SYSTEM_DEFINES
+from Verify_Script import load_module
+
+MASK = 0xFFFFFFFF
+
+# RTL/SYSTEM_DEF.vh（由 dat2coe.read_defines 解析）
+NOP = SYSTEM_DEFINES['NOP']
+ECALL = SYSTEM_DEFINES['ECALL']
+EBREAK = SYSTEM_DEFINES['EBREAK']
+WAY = SYSTEM_DEFINES['WAY']
+SET_NUM = SYSTEM_DEFINES['SET_NUM']
+BLOCK_WORD_SIZE = SYSTEM_DEFINES['BLOCK_WORD_SIZE']
+OFFSET_WIDTH = SYSTEM_DEFINES['OFFSET_WIDTH']
+INDEX_WIDTH = SYSTEM_DEFINES['INDEX_WIDTH']
+BHT_PC_WIDTH = SYSTEM_DEFINES['BHT_PC_WIDTH']
+BHT_SIZE = SYSTEM_DEFINES['BHT_SIZE']
+BTB_SIZE = SYSTEM_DEFINES['BTB_SIZE']
+
+# RTL 執行 TestCase1-12 的週期數（Verilator，RF.out 的 "// Status: HALT <cycles>"）
+RTL_CYCLES = {1: 68, 2: 133, 3: 138, 4: 70, 5: 102, 6: 103, 7: 76, 8: 184, 9: 110, 10: 130, 11: 206, 12: 243}
+
+# AXI4-Lite 時序（AXI4_Lite_Bus.v）：每個 word 為 MREQ（AR 握手）+ REFILL 兩週期（R_PENDING、R_VALID）
+REFILL_CYCLES = 3 * BLOCK_WORD_SIZE
+# Store：CMP → WRITE（AW/W 握手）→ WRITE_WAIT（BRAM 寫入）→ WRITE_WAIT（B 回應）
+STORE_CYCLES = 3
+
+# 週期歸因
+CAUSES = ('issue', 'icache', 'load_use', 'branch', 'jump', 'dcache_load', 'dcache_miss', 'dcache_store',
+          'fill', 'drain')
+
+class ModelError(Exception):
+    """模型與 golden model 不同步（非正確路徑的指令進入 EX）"""
+
+# ============================================================================
+# 管線暫存器內容
+# ============================================================================
+
+class Slot:
+    """
+    一個管線暫存器的內容。欄位對應 RTL 中跟著指令走的訊號：
+    pc/pred 在 flush 時仍會被帶入下一級（ID_EX 只清除控制訊號），因此 bubble 也保留這兩個欄位
+    """
+    __slots__ = ('pc', 'raw', 'rs1', 'rs2', 'rd', 'load', 'store', 'branch', 'jump', 'halt',
+                 'pred', 'btb', 'valid', 'issued', 'counted', 'taken', 'target', 'addr', 'cause')
+
+    def __init__(self, pc=0, raw=NOP, pred=False, valid=False, cause='fill'):
+        opcode = raw & 0x7F
+        self.pc = pc
+        self.raw = raw
+        # RISCV_CPU.v：LUI 的 rs1/rs2 位址強制為 0，其餘指令一律取 [19:15]/[24:20]（含立即值位元）
+        self.rs1 = 0 if opcode == 0x37 else (raw >> 15) & 0x1F
+        self.rs2 = 0 if opcode == 0x37 else (raw >> 20) & 0x1F
+        self.rd = (raw >> 7) & 0x1F
+        self.load = opcode == 0x03
+        self.store = opcode == 0x23
+        self.branch = opcode == 0x63
+        self.jump = opcode in (0x6F, 0x67)
+        self.halt = raw in (ECALL, EBREAK)
+        self.pred = pred
+        self.btb = None             # 取指時 BTB 的內容（無效時為 None），用來統計 BTB 命中率
+        self.valid = valid          # ID_Valid：由 I-Cache 取得的指令（非 reset/flush 產生的 NOP）
+        self.issued = False         # 已送入 EX 過（之後再送入即為重複發出）
+        self.counted = False        # 分支統計已計入（重複發出或錯誤路徑上的指令不再計入）
+        self.taken = False
+        self.target = 0
+        self.addr = 0               # EX_ALU_Result，即此指令在 MEM 時送給 D-Cache 的 CPU_REQ_ADDR
+        self.cause = cause          # 此 slot 本身若不是有效指令，佔用週期的原因
+
+    @classmethod
+    def bubble(cls, source, cause, addr=0):
+        """ID_EX flush 產生的 bubble：控制訊號歸零，pc/pred 與運算元仍取自 ID（ALU 做 rs1 + rs2）"""
+        s = cls(source.pc, NOP, source.pred, False, cause)
+        s.rs1 = s.rs2 = s.rd = 0
+        s.addr = addr
+        return s
+
+# ============================================================================
+# Cache 標籤（2-way set-associative，LRU 與 I_Cache.v/D_Cache.v 相同）
+# ============================================================================
+
+class CacheTags:
+    """只保存 tag/valid/LRU；資料內容由 golden model 提供"""
+
+    def __init__(self):
+        self.tags = [[None] * SET_NUM for _ in range(WAY)]
+        self.lru = [0] * SET_NUM
+
+    @staticmethod
+    def split(addr):
+        """位址拆成 (index, tag)"""
+        return (addr >> OFFSET_WIDTH) & (SET_NUM - 1), addr >> (OFFSET_WIDTH + INDEX_WIDTH)
+
+    def lookup(self, addr):
+        """命中時回傳 way，否則 None"""
+        index, tag = self.split(addr)
+        for way in range(WAY):
+            if self.tags[way][index] == tag:
+                return way
+        return None
+
+    def touch(self, addr, way):
+        """命中時更新 LRU（LRU[INDEX] <= ~HIT_WAY）"""
+        self.lru[self.split(addr)[0]] = 1 - way
+
+    def victim(self, addr):
+        """
+        選擇替換的 way，與 RTL 相同：有空的 way 時 VICTIM_WAY <= !VALID_ARRAY[0][INDEX]，否則依 LRU。
+        way 0 無效時選到的是 way 1，因此 way 0 永遠不會被填入
+        """
+        index, _ = self.split(addr)
+        if self.tags[0][index] is None or self.tags[1][index] is None:
+            return 1 if self.tags[0][index] is None else 0
+        return self.lru[index]
+
+    def fill(self, addr, way):
+        index, tag = self.split(addr)
+        self.tags[way][index] = tag
+        self.lru[index] = 1 - way
+
+class ICache:
+    """I_Cache.v 狀態機：IDLE → CMP（命中即回傳）；miss → MREQ/REFILL × 8 → READ"""
+
+    def __init__(self, machine):
+        self.machine = machine
+        self.tags = CacheTags()
+        self.state = 'IDLE'
+        self.remaining = 0
+        self.miss_addr = 0
+        self.victim = 0
+        self.misses = 0
+
+    def output(self, pc):
+        """本週期的 (CPU_REQ_VALID, CPU_REQ_DATA)"""
+        if self.state == 'CMP' and self.tags.lookup(pc) is not None:
+            return True, self.word(pc)
+        if self.state == 'READ':
+            # READ 回傳的是 miss 當時的位址，而不是目前的 IF_PC
+            return True, self.word(self.miss_addr)
+        return False, NOP
+
+    def word(self, addr):
+        if addr > len(self.machine.instruction_memory) - 4:
+            return 0
+        return self.machine.fetch(addr)
+
+    def clock(self, pc):
+        if self.state in ('IDLE', 'READ'):
+            self.state = 'CMP'
+        elif self.state == 'CMP':
+            way = self.tags.lookup(pc)
+            if way is not None:
+                self.tags.touch(pc, way)
+            else:
+                self.misses += 1
+                self.miss_addr = pc
+                self.victim = self.tags.victim(pc)
+                self.state = 'REFILL'
+                self.remaining = REFILL_CYCLES
+        elif self.state == 'REFILL':
+            self.remaining -= 1
+            if not self.remaining:
+                self.tags.fill(self.miss_addr, self.victim)
+                self.state = 'READ'
+
+class DCache:
+    """D_Cache.v 狀態機：讀命中 0 週期、讀 miss 補齊 cache line；寫入一律 write-through 並等待 B 回應"""
+
+    def __init__(self):
+        self.tags = CacheTags()
+        self.state = 'IDLE'
+        self.remaining = 0
+        self.victim = 0
+        self.miss_addr = 0
+        self.stale_read = False     # 無請求的 CMP 未命中時送出的多餘 AR，其 R_VALID 會留在 bus 上
+        self.load_misses = 0
+        self.loads = 0
+        self.stores = 0
+
+    def stall(self, mem):
+        """本週期的 D_Cache_Stall"""
+        if mem.load:
+            return not ((self.state == 'CMP' and self.tags.lookup(mem.addr) is not None) or self.state == 'READ')
+        if mem.store:
+            return not (self.state == 'WRITE' and self.remaining == 0)
+        return False
+
+    def missing(self, mem):
+        """本週期的讀取 stall 是否來自 cache miss（CMP 未命中或補齊中）"""
+        return self.state == 'REFILL' or (self.state == 'CMP' and self.tags.lookup(mem.addr) is None)
+
+    def clock(self, mem):
+        request = mem.load or mem.store
+        if self.state == 'IDLE':
+            self.state = 'CMP' if request else 'IDLE'
+        elif self.state == 'CMP':
+            if mem.store:
+                self.stores += 1
+                way = self.tags.lookup(mem.addr)
+                if way is not None:
+                    self.tags.touch(mem.addr, way)
+                self.state = 'WRITE'
+                self.remaining = STORE_CYCLES - 1
+            elif mem.load:
+                self.loads += 1
+                way = self.tags.lookup(mem.addr)
+                if way is not None:
+                    self.tags.touch(mem.addr, way)
+                else:
+                    self.load_misses += 1
+                    self.victim = self.tags.victim(mem.addr)
+                    self.miss_addr = mem.addr
+                    self.state = 'REFILL'
+                    # 殘留的 R_VALID 使第一個 word 的 AR 握手延後一個週期
+                    self.remaining = REFILL_CYCLES + (1 if self.stale_read else 0)
+                    self.stale_read = False
+            else:
+                # CMP 不論有無請求都以 MEM_ALU_Result 查表：命中會更新 LRU，未命中則照樣送出 AR
+                way = self.tags.lookup(mem.addr)
+                if way is not None:
+                    self.tags.touch(mem.addr, way)
+                else:
+                    self.stale_read = True
+                self.state = 'IDLE'
+        elif self.state == 'REFILL':
+            self.remaining -= 1
+            if not self.remaining:
+                self.tags.fill(self.miss_addr, self.victim)
+                self.state = 'READ'
+        elif self.state == 'WRITE':
+            if self.remaining:
+                self.remaining -= 1
+            else:
+                self.state = 'CMP' if request else 'IDLE'
+        elif self.state == 'READ':
+            self.state = 'CMP' if request else 'IDLE'
+
+# ============================================================================
+# 管線模型
+# ============================================================================
+
+class PipelineModel:
+    """
+    逐週期的五級管線模型。machine 為已載入 IM/DM 的 Golden_Result.Machine（會被執行到結束）；
+    run() 回傳 {'cycles', 'instructions', 'cpi', 'stalls': {原因: 週期數}, ...}
+    """
+
+    def __init__(self, machine):
+        self.m = machine
+        self.icache = ICache(machine)
+        self.dcache = DCache()
+        self.bht = [0] * BHT_SIZE
+        self.btb = [0] * BTB_SIZE
+        self.btb_valid = [False] * BTB_SIZE
+        self.pc = 0
+        self.i_valid_reg = False    # I_CPU_REQ_VALID_REG
+        self.id = Slot()
+        self.ex = Slot()
+        self.mem = Slot()
+        self.wb = Slot()
+        self.halt_issued = False
+        self.counts = dict.fromkeys(CAUSES, 0)
+        self.mispredicts = 0
+        self.jumps = 0
+        self.branches = 0
+        self.taken_branches = 0
+        self.branch_mispredicts = 0
+        self.btb_hits = 0
+
+    def predict(self, pc):
+        """IF 階段的 Predict_Taken：BHT 為 taken 且 BTB 有效"""
+        idx = pc & (BHT_SIZE - 1)
+        return self.bht[idx] >= 2 and self.btb_valid[idx]
+
+    def issue(self, slot):
+        """ID 的指令第一次送入 EX：以 golden model 執行並記錄分支方向、目標與記憶體位址"""
+        slot.issued = True
+        if not slot.valid or self.halt_issued:
+            slot.counted = True
+            return
+        m = self.m
+        expected = self.icache.word(m.pc)
+        if slot.pc != m.pc or slot.raw != expected:
+            raise ModelError(f"instruction {slot.raw:08x} at pc 0x{slot.pc:08x} reached EX, "
+                             f"but the golden model is at pc 0x{m.pc:08x} ({expected:08x})")
+        if slot.halt:
+            self.halt_issued = True
+            return
+        d = golden.decode(slot.raw)
+        rs1 = m.registers[d.rs1]
+        rs2 = m.registers[d.rs2]
+        if slot.branch:
+            s1, s2 = golden.to_signed(rs1), golden.to_signed(rs2)
+            slot.taken = {0: rs1 == rs2, 1: rs1 != rs2, 4: s1 < s2, 5: s1 >= s2,
+                          6: rs1 < rs2, 7: rs1 >= rs2}.get(d.funct3, False)
+            slot.target = (slot.pc + d.imm) & MASK
+        elif slot.jump:
+            # EX_ALU_Result：JAL 為 PC + imm，JALR 為 rs1 + imm
+            slot.target = ((rs1 if d.opcode == 0x67 else slot.pc) + d.imm) & MASK
+        elif slot.load or slot.store:
+            slot.addr = (rs1 + d.imm) & MASK
+        elif d.opcode == 0x37:
+            slot.addr = d.imm & MASK
+        elif d.opcode == 0x17:
+            slot.addr = (slot.pc + d.imm) & MASK
+        m.step()
+        if slot.branch or slot.jump:
+            slot.addr = slot.target
+        elif not (slot.load or slot.store) and d.opcode not in (0x37, 0x17):
+            slot.addr = m.registers[d.rd] if d.rd else 0
+
+    def cycle(self):
+        """模擬一個時脈週期，回傳此週期的歸因"""
+        ex, idn, mem = self.ex, self.id, self.mem
+        pc = self.pc
+
+        i_valid, i_word = self.icache.output(pc)
+        d_stall = self.dcache.stall(mem)
+
+        # EX：分支/跳躍判定（Control.v）
+        taken = ex.branch and ex.taken
+        redirect = taken or ex.jump
+        if redirect and idn.pc == ex.target:
+            if_id_flush = flush_1 = False
+        else:
+            if_id_flush = flush_1 = redirect or ex.pred
+
+        # Hazard_Unit.v
+        if d_stall:
+            if_id_w, flush_0 = False, False
+        elif ex.load and ex.rd in (idn.rs1, idn.rs2):
+            if_id_w, flush_0 = False, True
+        else:
+            if_id_w, flush_0 = True, False
+
+        predict = self.predict(pc)
+        id_ex_flush = flush_1 or flush_0 or (not self.i_valid_reg and not d_stall and idn.rs1 == idn.rd)
+        write_if_id = if_id_w and (i_valid or (self.i_valid_reg and if_id_flush))
+
+        # 週期歸因
+        control = 'jump' if ex.jump else 'branch'
+        if d_stall:
+            cause = 'dcache_store' if mem.store else ('dcache_miss' if self.dcache.missing(mem) else 'dcache_load')
+        elif flush_1:
+            cause = control
+        elif flush_0:
+            cause = 'load_use'
+        elif id_ex_flush or idn.issued:
+            cause = 'icache'
+        elif self.halt_issued:
+            cause = 'drain'
+        elif not idn.valid:
+            cause = idn.cause
+        else:
+            cause = 'issue'
+        if flush_1 and not d_stall:
+            if redirect and ex.jump:
+                self.jumps += 1
+            else:
+                self.mispredicts += 1
+        if ex.branch and not ex.counted and not d_stall:
+            ex.counted = True
+            self.branches += 1
+            self.branch_mispredicts += flush_1
+            if taken:
+                self.taken_branches += 1
+                self.btb_hits += ex.btb == ex.target
+
+        # 時脈上升緣
+        if not d_stall:
+            if ex.pred and not redirect:
+                self.pc = (ex.pc + 4) & MASK
+            elif redirect and not ex.pred:
+                self.pc = ex.target
+            elif predict:
+                self.pc = self.btb[pc & (BTB_SIZE - 1)]
+            elif if_id_w and i_valid:
+                self.pc = (pc + 4) & MASK
+
+        if write_if_id:
+            if if_id_flush:
+                self.id = Slot(0, NOP, predict, False, control)
+            else:
+                self.id = Slot(pc, i_word, predict, True)
+                idx = pc & (BTB_SIZE - 1)
+                self.id.btb = self.btb[idx] if self.btb_valid[idx] else None
+
+        if not d_stall:
+            if id_ex_flush:
+                regs = self.m.registers
+                self.ex = Slot.bubble(idn, cause if cause != 'issue' else 'icache',
+                                      (regs[idn.rs1] + regs[idn.rs2]) & MASK)
+            else:
+                if not idn.issued:
+                    self.issue(idn)
+                self.ex = idn
+            self.mem = ex
+            self.wb = mem
+
+        idx = ex.pc & (BHT_SIZE - 1)
+        if taken and not d_stall:
+            self.bht[idx] = min(self.bht[idx] + 1, 3)
+            self.btb[idx] = ex.target
+            self.btb_valid[idx] = True
+        else:
+            self.bht[idx] = max(self.bht[idx] - 1, 0)
+
+        self.i_valid_reg = i_valid
+        self.icache.clock(pc)
+        self.dcache.clock(mem)
+        return cause
+
+    def run(self, max_cycles=100000):
+        """執行到 ECALL/EBREAK 進入 WB（WB_Halt）為止"""
+        cycles = 0
+        while not self.wb.halt and cycles < max_cycles:
+            self.counts[self.cycle()] += 1
+            cycles += 1
+        instructions = self.counts['issue']
+        return {
+            'cycles': cycles,
+            'halted': self.wb.halt,
+            'instructions': instructions,
+            'cpi': cycles / instructions if instructions else 0.0,
+            'stalls': {k: v for k, v in self.counts.items() if k != 'issue'},
+            'icache_misses': self.icache.misses,
+            'dcache_loads': self.dcache.loads,
+            'dcache_load_misses': self.dcache.load_misses,
+            'dcache_stores': self.dcache.stores,
+            'mispredicts': self.mispredicts,
+            'jumps': self.jumps,
+            'branches': self.branches,
+            'taken_branches': self.taken_branches,
+            'branch_mispredicts': self.branch_mispredicts,
+            'btb_hits': self.btb_hits,
+        }
+
+def simulate(image, dm_image, im_size=4096, dm_size=32, max_cycles=100000):
+    """以指令與資料記憶體內容執行模型，回傳 PipelineModel.run() 的結果"""
+    m = golden.Machine(im_size=im_size, dm_size=dm_size)
+    m.load_im_bytes(image)
+    m.load_dm_bytes(dm_image)
+    return PipelineModel(m).run(max_cycles)
+
+def read_rtl_cycles(rf_out):
+    """由 RTL 的 RF.out 讀出 "// Status: HALT <cycles>"，沒有時回傳 None"""
+    if not os.path.exists(rf_out):
+        return None
+    with open(rf_out, 'r') as f:
+        match = re.search(r'//\s*Status:\s*HALT\s+(\d+)', f.read())
+    return int(match.group(1)) if match else None
+
+# ============================================================================
+# 主程式：TestCase1-12 的週期數、CPI、stall 分布，並與 RTL 週期數比對
+# ============================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('testcases', nargs='*', type=int, default=list(range(1, 13)),
+                        help='TestCase 編號（預設 1-12）')
+    parser.add_argument('--rtl-dir',
+                        help='改為讀取 <dir>/TestCase<n>/RF.out 的 RTL 週期數（例如 Testbench/Work），'
+                             '預設使用 RTL_CYCLES')
+    args = parser.parse_args()
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    assembler = load_module("Instr_Transfer", os.path.join(base_dir, '..', 'Pattern', 'Instr_Transfer.py'))
+    dm_image = golden.read_hex_bytes(os.path.join(base_dir, 'DM.dat'))
+    ecall = ECALL.to_bytes(4, 'big')
+
+    shown = ('icache', 'load_use', 'branch', 'jump', 'dcache_load', 'dcache_miss', 'dcache_store')
+    print(f"{'TestCase':<10}{'Instr':>7}{'Cycles':>8}{'CPI':>7}{'RTL':>8}{'Err':>8}  "
+          + " ".join(f"{k:>12}" for k in shown))
+    errors = []
+    failed = []
+    for n in args.testcases:
+        path = os.path.join(base_dir, '..', 'Pattern', f'TestCase{n}.dat')
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            records, _ = assembler.assemble(f.readlines())
+        try:
+            result = simulate(assembler.to_image(records) + ecall, dm_image)
+        except ModelError as e:
+            print(f"TestCase{n:<2}  model error: {e}")
+            failed.append(n)
+            continue
+        if args.rtl_dir:
+            rtl = read_rtl_cycles(os.path.join(args.rtl_dir, f'TestCase{n}', 'RF.out'))
+        else:
+            rtl = RTL_CYCLES.get(n)
+        err = ''
+        if rtl:
+            errors.append(abs(result['cycles'] - rtl) / rtl)
+            err = f"{(result['cycles'] - rtl) / rtl:+.1%}"
+            if result['cycles'] != rtl:
+                failed.append(n)
+        print(f"{'TestCase' + str(n):<10}{result['instructions']:>7}{result['cycles']:>8}{result['cpi']:>7.2f}"
+              f"{rtl or '-':>8}{err:>8}  " + " ".join(f"{result['stalls'][k]:>12}" for k in shown))
+    if errors:
+        print(f"Mean |error| vs RTL over {len(errors)} test case(s): {sum(errors) / len(errors):.2%}")
+    else:
+        print("No RTL cycle counts found (run Verify_Script.py all -j <n> first to fill Testbench/Work/TestCase<n>/).")
+    if failed:
+        print("Model differs from RTL: " + ", ".join(f"TestCase{n}" for n in failed))
+        sys.exit(1)
@@ -1,46 +1,144 @@
 import sys
 import os
+import re
+import struct
+import argparse
 
-def dat_to_coe(input_path, output_path, depth=1024):
-    bytes_list = []
-
-    with open(input_path, 'r', encoding='latin-1') as f:
-        for line in f:
-            line = line.strip()
-            # 跳過空行和註解
-            if not line or line.startswith('//'):
-                continue
-            # 只取 2 字元的 hex byte
-            if len(line) == 2:
-                bytes_list.append(int(line, 16))
-
-    # 每 4 bytes 組成一個 32-bit word (big-endian: byte0=MSB)
-    words = []
-    for i in range(0, len(bytes_list), 4):
-        chunk = bytes_list[i:i+4]
-        if len(chunk) < 4:
-            chunk += [0] * (4 - len(chunk))  # 補 0
-        word = (chunk[0] << 24) | (chunk[1] << 16) | (chunk[2] << 8) | chunk[3]
-        words.append(word)
-
-    # 補齊到 depth
-    while len(words) < depth:
-        words.append(0x00000013)  # NOP
+try:
+    import numpy as np
+except ImportError:
+    np = None  # NumPy 為選用套件；沒有時以 bytes.hex() + join 產生相同的輸出
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SYSTEM_DEF = os.path.join(BASE_DIR, '..', 'RTL', 'SYSTEM_DEF.vh')
+
+NOP = (0x00000013).to_bytes(4, 'big')
+
+# IM.dat 中每行一個 hex byte（略過註解與其他行）
+DAT_BYTE = re.compile(rb'^[ \t]*([0-9A-Fa-f]{2})[ \t]*\r?$', re.MULTILINE)
+
+# SYSTEM_DEF.vh 中的數值 `define：十進位或 Verilog 常數（7'b0110011、32'h00000013）
+DEFINE = re.compile(r"^[ \t]*`define[ \t]+(\w+)[ \t]+(?:\d*'([bBdDhH]))?([0-9A-Fa-f_]+)(?![\w'])", re.MULTILINE)
+DEFINE_BASES = {'b': 2, 'd': 10, 'h': 16}
+
+def read_defines(path=SYSTEM_DEF):
+    """讀出 SYSTEM_DEF.vh 所有數值 `define，回傳 {名稱: int}（檔案不存在時為空 dict）"""
+    try:
+        with open(path, 'r', encoding='latin-1') as f:
+            text = f.read()
+    except OSError:
+        return {}
+    defines = {}
+    for name, base, digits in DEFINE.findall(text):
+        try:
+            defines[name] = int(digits.replace('_', ''), DEFINE_BASES[base.lower()] if base else 10)
+        except ValueError:
+            pass  # 例如沒有基底的 hex 字串：不是數值 define
+    return defines
+
+def read_bram_depth(path=SYSTEM_DEF, default=1024):
+    """從 SYSTEM_DEF.vh 的 `define BRAM_DEPTH 讀出指令 BRAM 的 word 數"""
+    return read_defines(path).get('BRAM_DEPTH', default)
+
+# 其他工具（Golden_Result、Pipeline_Model 等）的硬體參數都從這裡取得
+SYSTEM_DEFINES = read_defines()
+BRAM_DEPTH = SYSTEM_DEFINES.get('BRAM_DEPTH', 1024)
+
+def pad_image(image, depth=None):
+    """將指令記憶體位元組補齊為整數個 word，並以 NOP 一次補齊到 depth 個 word"""
+    depth = BRAM_DEPTH if depth is None else depth
+    image = bytes(image) + bytes(-len(image) & 3)  # 補 0 到 4 的倍數
+    return image + NOP * max(0, depth - len(image) // 4)
+
+def image_to_words(image, depth=None):
+    """將指令記憶體位元組轉成 32-bit word 串列（big-endian: byte0=MSB），並以 NOP 補齊到 depth"""
+    padded = pad_image(image, depth)
+    if np is not None:
+        return np.frombuffer(padded, dtype='>u4').tolist()
+    return list(struct.unpack(f'>{len(padded) // 4}I', padded))
+
+def format_words(padded, sep, last):
+    """
+    以大寫 hex 輸出每個 word，word 之間以 sep 分隔、最後一個 word 之後為 last。
+    有 NumPy 時以 (word 數, 每行長度) 的字元陣列一次組出整段輸出
+    """
+    digits = padded.hex().upper()
+    if np is None:
+        return sep.join(digits[i:i + 8] for i in range(0, len(digits), 8)) + last
+    width = 8 + len(sep)
+    rows = np.empty((len(padded) // 4, width), dtype=np.uint8)
+    rows[:, :8] = np.frombuffer(digits.encode('ascii'), dtype=np.uint8).reshape(-1, 8)
+    rows[:, 8:] = np.frombuffer(sep.encode('ascii'), dtype=np.uint8)
+    text = rows.tobytes()[:-len(sep)].decode('ascii')
+    return text + last
+
+def image_to_coe(image, output_path, depth=None):
+    """將指令記憶體位元組寫成 .coe，回傳 word 數"""
+    padded = pad_image(image, depth)
 
     with open(output_path, 'w') as f:
-        f.write('memory_initialization_radix=16;\n')
-        f.write('memory_initialization_vector=\n')
-        for idx, word in enumerate(words):
-            if idx < len(words) - 1:
-                f.write(f'{word:08X},\n')
-            else:
-                f.write(f'{word:08X};\n')
-
-    print(f'Done: {len(bytes_list)} bytes → {len(words)} words')
+        f.write('memory_initialization_radix=16;\n'
+                'memory_initialization_vector=\n'
+                + format_words(padded, ',\n', ';\n'))
+
+    return len(padded) // 4
+
+def image_to_mem(image, output_path, depth=None):
+    """將指令記憶體位元組寫成 $readmemh 格式 (每行一個 word)，供行為模型 I_BROM 載入，回傳 word 數"""
+    padded = pad_image(image, depth)
+
+    with open(output_path, 'w') as f:
+        f.write(format_words(padded, '\n', '\n'))
+
+    return len(padded) // 4
+
+def image_to_bin(image, output_path, depth=None):
+    """將指令記憶體位元組補齊後寫成二進位映像檔（標頭 + 大端序 word），回傳 word 數"""
+    import Golden_Result as golden
+    padded = pad_image(image, depth)
+    golden.write_image(output_path, padded)
+    return len(padded) // 4
+
+def read_dat(input_path):
+    """讀取 IM.dat（每行一個 hex byte），一次比對所有行後以 bytes.fromhex 轉換"""
+    with open(input_path, 'rb') as f:
+        return bytes.fromhex(b''.join(DAT_BYTE.findall(f.read())).decode('ascii'))
+
+def read_input(input_path):
+    """讀取 IM.dat 或二進位映像檔 (IM.bin)，回傳 (指令記憶體位元組, 說明)；映像檔的載入位址之前補 0"""
+    import Golden_Result as golden
+    if golden.is_image(input_path):
+        base, data = golden.read_image(input_path, big_endian=True)
+        return bytes(base) + data, f'{len(data)} bytes @ 0x{base:08X}'
+    image = read_dat(input_path)
+    return image, f'{len(image)} bytes'
+
+def dat_to_coe(input_path, output_path, depth=None):
+    """將 IM.dat 或二進位映像檔 (IM.bin) 轉成 .coe"""
+    image, description = read_input(input_path)
+    word_count = image_to_coe(image, output_path, depth)
+
+    print(f'Done: {description} → {word_count} words')
     print(f'Output: {output_path}')
 
 if __name__ == '__main__':
-    base = os.path.dirname(os.path.abspath(__file__))
-    input_file  = os.path.join(base, 'IM.dat')
-    output_file = os.path.join(base, 'IM.coe')
-    dat_to_coe(input_file, output_file)
+    parser = argparse.ArgumentParser(description='將 IM.dat 或 IM.bin 轉成 .coe（以及 .mem / .bin）')
+    parser.add_argument('input', nargs='?', default=os.path.join(BASE_DIR, 'IM.dat'),
+                        help='輸入檔（預設 Testbench/IM.dat）')
+    parser.add_argument('--depth', type=int, default=None,
+                        help=f'BRAM word 數（預設取自 SYSTEM_DEF.vh：{BRAM_DEPTH}）')
+    parser.add_argument('--mem', action='store_true', help='另外輸出 IM.mem（$readmemh 格式）')
+    parser.add_argument('--bin', action='store_true', help='另外輸出補齊後的二進位映像檔 IM_padded.bin')
+    args = parser.parse_args()
+
+    image, description = read_input(args.input)
+    outputs = [('IM.coe', image_to_coe)]
+    if args.mem:
+        outputs.append(('IM.mem', image_to_mem))
+    if args.bin:
+        outputs.append(('IM_padded.bin', image_to_bin))
+    for filename, write in outputs:
+        output_file = os.path.join(BASE_DIR, filename)
+        word_count = write(image, output_file, args.depth)
+        print(f'Done: {description} → {word_count} words')
+        print(f'Output: {output_file}')